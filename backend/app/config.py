@@ -1,4 +1,5 @@
 # app/config.py
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -13,17 +14,161 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_NAME: str
 
+    # Connection pool (applies to the primary and every replica engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800        # seconds before a connection is replaced
+    DB_POOL_TIMEOUT: int = 30          # seconds to wait for a free connection
+
+    # Read replicas: comma-separated SQLAlchemy URLs, empty = primary only
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_CHECK_INTERVAL: int = 10     # seconds between replica health checks
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # replicas lagging more than this are skipped
+
     REDIS_URL: str
 
+    # Ingestion events (Redis Streams)
+    INGESTION_STREAM_MAXLEN: int = 10000      # approximate cap of the global stream
+    INGESTION_DOC_STREAM_TTL: int = 86400     # seconds a document's replay stream is kept
+    INGESTION_STATUS_BATCH_SIZE: int = 500    # status events coalesced per DB write
+    INGESTION_STATUS_FLUSH_SECONDS: float = 0.5
+    STREAM_MAX_DELIVERIES: int = 5            # persistence attempts before an entry is dead-lettered
+    DEAD_LETTER_STREAM_MAXLEN: int = 10000    # approximate cap of each "<stream>:dead" stream
+
+    # WebSocket fan-out: bounded per-connection send queue
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SLOW_CONSUMER_POLICY: Literal["drop_oldest", "close"] = "drop_oldest"
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_HEARTBEAT_SECONDS: float = 20.0       # server ping after this long without client messages
+    WS_IDLE_TIMEOUT_SECONDS: float = 60.0    # close sessions silent for longer than this
+    WS_MAX_SUBSCRIPTIONS: int = 500          # documents per session
+    WS_MAX_CHAT_STREAMS: int = 3             # concurrent chat answers per session
+
     CHROMA_PATH: str
 
+    # Semantic answer cache (chat)
+    SEMANTIC_CACHE_THRESHOLD: float = 0.9        # min cosine similarity for a hit
+    SEMANTIC_CACHE_TTL_SECONDS: int = 86400
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000       # per scope, least recently used evicted first
+
+    # Chat pipeline
+    CHAT_RETRIEVAL_K: int = 5                    # chunks passed to generation
+    CHAT_RETRIEVAL_OVERFETCH: int = 4            # candidates per chunk kept, before access filtering
+    CHAT_MAX_ANSWER_TOKENS: int = 512
+    CHAT_HISTORY_TURNS: int = 3                  # previous turns included verbatim in the prompt
+    CHAT_HISTORY_MAX_AGE_SECONDS: int = 1800     # older turns are not part of the conversation
+    CHAT_SUMMARY_ENABLED: bool = True            # earlier turns as a rolling summary (Redis)
+    CHAT_SUMMARY_MAX_TOKENS: int = 200
+    CHAT_SUMMARY_BATCH_TURNS: int = 20           # turns folded into the summary per update
+    CHAT_PROMPT_MAX_TOKENS: int = 3000           # whole prompt (estimated), whatever the conversation length
+    CHAT_PROMPT_HISTORY_TOKENS: int = 800        # of which summary + recent turns at most
+    CHAT_HISTORY_BATCH_SIZE: int = 100           # chat history rows per INSERT
+    CHAT_HISTORY_FLUSH_MS: int = 20              # max wait for a batch to fill
+    CHAT_HISTORY_RETENTION_DAYS: int = 90        # older turns move to chat_history_archive
+    CHAT_ARCHIVE_BATCH_SIZE: int = 1000          # turns archived per transaction
+    CHAT_ARCHIVE_INTERVAL_SECONDS: int = 3600    # Celery beat schedule of the archival task
+
+    # Identical in-flight questions share one execution across workers (Redis)
+    CHAT_COALESCE_ENABLED: bool = True
+    CHAT_COALESCE_LOCK_SECONDS: int = 60         # a dead leader's flight is abandoned after this
+    CHAT_COALESCE_STREAM_TTL_SECONDS: int = 120  # late joiners replay the answer until then
+
+    # Chat stage deadlines (ms); a stage over its deadline degrades instead of failing
+    CHAT_EMBED_TIMEOUT_MS: int = 2000            # → lexical-only retrieval, no answer cache
+    CHAT_CACHE_TIMEOUT_MS: int = 300             # → cache miss
+    CHAT_VALIDATE_TIMEOUT_MS: int = 300          # → cached answer rejected
+    CHAT_RETRIEVAL_TIMEOUT_MS: int = 3000        # → answer without context
+    CHAT_HISTORY_TIMEOUT_MS: int = 300           # → no conversation history
+    CHAT_FIRST_TOKEN_TIMEOUT_MS: int = 15000     # → apology instead of an answer
+    CHAT_TOKEN_TIMEOUT_MS: int = 5000            # max gap between tokens → answer cut short
+
+    # Answer validation (MonitorService): "async" returns answers at once and validates
+    # them on the Celery "monitor" queue; "sync" validates before the done event
+    MONITOR_MODE: Literal["sync", "async"] = "async"
+    MONITOR_SAMPLE_RATE: float = 1.0             # share of fresh answers validated
+    MONITOR_MAX_BACKLOG: int = 1000              # queued validations beyond which answers are not validated
+    MONITOR_FAILURE_ACTION: Literal["flag", "retract"] = "flag"   # WebSocket event for a failed answer
+    MONITOR_MIN_GROUNDING: float = 0.5           # share of answer terms that must occur in the sources
+    MONITOR_LLM_JUDGE: bool = True               # also ask the LLM whether the answer is supported
+    MONITOR_SYNC_TIMEOUT_MS: int = 10000         # "sync" mode; over it → validated in the background
+    MONITOR_VERDICT_TTL_SECONDS: int = 600       # identical (query, answer, sources) reuse the verdict
+    MONITOR_STREAM_MAXLEN: int = 10000
+    MONITOR_LOG_BATCH_SIZE: int = 200            # MonitorLog rows per INSERT
+    MONITOR_LOG_FLUSH_SECONDS: float = 1.0
+
+    # Retrieval: BM25 index (SQLite FTS5 file, relative to app/ like CHROMA_PATH) fused with vectors
+    LEXICAL_INDEX_PATH: str = "lexical_index/chunks.sqlite3"
+    RETRIEVAL_HYBRID: bool = True
+    LEXICAL_MAX_TERM_RATIO: float = 0.02   # query terms in more chunks than this are skipped
+    LEXICAL_MAX_QUERY_TERMS: int = 4       # rarest remaining terms searched
+    RETRIEVAL_RRF_K: int = 60
+    RETRIEVAL_SEARCH_TIMEOUT_MS: int = 1500      # a vector / BM25 search still running is dropped
+    RETRIEVAL_CACHE_TTL_SECONDS: int = 600          # results also go stale on a generation bump
+    RETRIEVAL_EMBEDDING_TTL_SECONDS: int = 86400    # query embeddings don't depend on the corpus
+
+    # Cross-encoder reranking of fused candidates (needs sentence-transformers)
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_MAX_CANDIDATES: int = 20      # scored in one batch
+    RERANK_MAX_LENGTH: int = 256         # tokens per (query, chunk) pair
+    RERANK_TIMEOUT_MS: int = 250         # over budget → fused order
+    RERANK_TOP_K: int = 3                # chunks passed to generation when reranking
+
+    # LLM provider ("stub" = local, no network; "http" = OpenAI-compatible endpoint)
+    LLM_PROVIDER: Literal["stub", "http"] = "stub"
+    LLM_STUB_TOKENS_PER_SECOND: float = 30.0
+    LLM_STUB_FIRST_TOKEN_SECONDS: float = 0.3
+    LLM_BASE_URL: str = "http://localhost:8100/v1"
+    LLM_API_KEY: str = ""
+    LLM_MODEL: str = "gpt-4o-mini"
+    LLM_MAX_CONNECTIONS: int = 20                # keep-alive pool per process
+    LLM_KEEPALIVE_SECONDS: float = 30.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 3                     # retries of a rate-limited (429) request
+
+    # LLM admission (per process): calls over a limit wait, interactive before background
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONCURRENCY_PER_DEPARTMENT: int = 6
+    LLM_TOKENS_PER_MINUTE: int = 200000          # prompt + max_tokens reserved per call
+
+    # Password hashing (Argon2). Changing the cost rehashes passwords on next login.
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400   # KiB
+    ARGON2_PARALLELISM: int = 8
+    PASSWORD_HASH_WORKERS: int = 4     # dedicated hashing threads per API worker
+    PASSWORD_HASH_MAX_PENDING: int = 64  # running + queued hashes before rejecting with 503
+
+    # Login throttling (sliding window, shared through Redis)
+    LOGIN_RATE_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    LOGIN_RATE_LIMIT_PER_IP: int = 50
+
+    # Logging (app/core/logging_config.py): records are written to stdout by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""                 # per-logger overrides, e.g. "app.core.redis_client=DEBUG,uvicorn.access=WARNING"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10000          # records waiting for the writer; beyond it records are dropped
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # share of high-frequency debug lines (cache hits, WebSocket sends) kept
+
+    # Prometheus scrapes GET /monitor/metrics with "Authorization: Bearer <token>"; empty → endpoint disabled
+    METRICS_SCRAPE_TOKEN: str = ""
+
     JWT_SECRET_KEY: str
+    AUTH_TOKEN_CACHE_SIZE: int = 10000            # verified tokens kept per process
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 5.0  # max delay before other workers see a revocation
     model_config = SettingsConfigDict(
         env_file=".env",          # Load variables from .env automatically
         env_file_encoding="utf-8"
     )
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def log_levels(self) -> dict[str, str]:
+        pairs = (item.split("=", 1) for item in self.LOG_LEVELS.split(",") if "=" in item)
+        return {name.strip(): level.strip().upper() for name, level in pairs}
+
 # Instantiate settings
 settings = Settings()
-
-print(f"⚙️ Loaded settings for {settings.PROJECT_NAME} [{settings.ENVIRONMENT}]")
@@ -2,6 +2,10 @@ from app.services.docs_service import DocsService
 
 class AdminDocsController:
 
+    @staticmethod
+    async def list_documents(params):
+        return await DocsService.list_all_documents(params)
+
     @staticmethod
     async def create_document(dto):
         return await DocsService.add_document(
@@ -18,6 +22,14 @@ class AdminDocsController:
             dto.allowed_department_ids
         )
 
+    @staticmethod
+    async def bulk_update_document_access(dto):
+        return await DocsService.bulk_update_document_access(
+            dto.document_ids,
+            dto.add_department_ids,
+            dto.remove_department_ids,
+        )
+
     @staticmethod
     async def delete_document(doc_id: int):
         return await DocsService.delete_document(doc_id)
@@ -8,7 +8,7 @@ class AuthController:
 
     @staticmethod
     async def register(request: RegisterRequest):
-        return AuthService.register(
+        return await AuthService.register(
             name=request.name,
             email=request.email,
             password=request.password,
@@ -17,8 +17,13 @@ class AuthController:
         )
 
     @staticmethod
-    async def login(request: LoginRequest):
-        return AuthService.login(
+    async def login(request: LoginRequest, client_ip: str | None = None):
+        return await AuthService.login(
             email=request.email,
-            password=request.password
+            password=request.password,
+            client_ip=client_ip
         )
+
+    @staticmethod
+    async def logout(user: dict):
+        return await AuthService.logout(user)
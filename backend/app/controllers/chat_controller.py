@@ -0,0 +1,27 @@
+# app/controllers/chat_controller.py
+
+import json
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from app.schemas.chat_schema import ChatHistoryParams, ChatRequest
+from app.services.chat_history_service import ChatHistoryService
+from app.services.chat_service import ChatService
+
+
+class ChatController:
+
+    @staticmethod
+    async def ask(user: dict, request: ChatRequest):
+        return await ChatService.answer(user, request.query)
+
+    @staticmethod
+    async def stream(user: dict, request: ChatRequest) -> AsyncIterator[str]:
+        """Answer events formatted as Server-Sent Events."""
+        async with aclosing(ChatService.stream_answer(user, request.query)) as events:
+            async for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    @staticmethod
+    async def history(user: dict, params: ChatHistoryParams) -> dict:
+        return await ChatHistoryService.history_page(user, params)
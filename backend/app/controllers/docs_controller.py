@@ -3,17 +3,17 @@ from app.services.docs_service import DocsService
 class DocsController:
 
     @staticmethod
-    async def list_allowed_docs(current_user):
+    async def list_allowed_docs(current_user, params):
         # Admins see everything
         if current_user["role"] == "admin":
-            return await DocsService.list_all_documents()
+            return await DocsService.list_all_documents(params)
 
         # Regular employees/managers see department docs
         department_id = current_user["department_id"]
-        return await DocsService.list_documents_with_access(department_id)
+        return await DocsService.list_documents_with_access(department_id, params)
 
     
     @staticmethod
-    async def list_my_owned_documents(user):
+    async def list_my_owned_documents(user, params):
         """Documents that originated from (are owned by) the user's department."""
-        return await DocsService.list_owned_documents(user["department_id"])
\ No newline at end of file
+        return await DocsService.list_owned_documents(user["department_id"], params)
\ No newline at end of file
@@ -1,21 +1,210 @@
 # app/controllers/ws_controller.py
 
-from app.core.websocket_manager import manager
-from fastapi import WebSocket
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+
+from app.config import settings
+from app.core.event_listener import status_message
+from app.core.redis_client import read_document_events
+from app.core.websocket_manager import (
+    Connection, manager, department_channel, doc_channel, user_channel, status_payload,
+)
+from app.services.chat_service import ChatService
+from app.services.docs_service import DocsService
+from app.utils.auth import authenticate_token
+from fastapi import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
 
 
 class WSController:
+    """
+    One authenticated socket per user session, multiplexing document subscriptions.
+    Status events of the user's department's documents arrive without subscribing.
+
+    Client → server (JSON):
+        {"action": "subscribe",   "doc_ids": [1, 2], "last_event_ids": {"1": "<event id>"}}
+        {"action": "unsubscribe", "doc_ids": [1]}
+        {"action": "chat",   "request_id": "r1", "query": "..."}
+        {"action": "cancel", "request_id": "r1"}
+        {"action": "pong"} / {"action": "ping"}
+    Server → client:
+        {"type": "status", ...}, {"type": "subscribed", "doc_ids": [...], "denied": [...]},
+        {"type": "unsubscribed", "doc_ids": [...]}, {"type": "ping"}, {"type": "pong"},
+        chat events ({"type": "sources" | "token" | "done" | "cancelled", "request_id": ...}),
+        {"type": "answer_flagged" | "answer_retracted", "answer_id": ..., "reason": "..."}
+            (an answer, identified by the answer_id of its done event, failed validation),
+        {"type": "error", "detail": "..."}
+    """
+
+    @staticmethod
+    async def session(websocket: WebSocket, token: str | None,
+                      doc_ids: list[int] = (), last_event_ids: dict | None = None):
+        user = await authenticate_token(token) if token else None
+        if not user:
+            await websocket.close(code=1008)  # Policy Violation (rejects the handshake)
+            return
+
+        channels = [user_channel(user["user_id"])]
+        if user.get("department_id"):
+            channels.append(department_channel(user["department_id"]))
+        connection = await manager.connect(websocket, channels)
+        try:
+            if doc_ids:
+                await WSController._subscribe(connection, user, list(doc_ids), last_event_ids or {})
+            await WSController._serve(connection, user)
+        finally:
+            await manager.disconnect(connection)
 
+    # ------------------------------------------------------------
+    # 🔹 Receive loop with server-side heartbeat
+    # ------------------------------------------------------------
     @staticmethod
-    async def document_connection(websocket: WebSocket, doc_id: int):
+    async def _serve(connection: Connection, user: dict):
         """
-        Handles the websocket lifecycle for a specific document.
-        Router should not contain any logic.
+        Wait for client messages; after WS_HEARTBEAT_SECONDS of silence send a
+        ping, and close the session once it has been silent for WS_IDLE_TIMEOUT_SECONDS.
+        No extra task per connection: the heartbeat is the receive timeout.
         """
-        await manager.connect(doc_id, websocket)
+        websocket = connection.websocket
+        last_seen = time.monotonic()
+
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=settings.WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if time.monotonic() - last_seen >= settings.WS_IDLE_TIMEOUT_SECONDS:
+                    await websocket.close(code=1001)  # Going Away
+                    return
+                manager.send_to(connection, {"type": "ping"})
+                continue
+            except (WebSocketDisconnect, RuntimeError):
+                return
+            except (ValueError, KeyError):
+                manager.send_to(connection, {"type": "error", "detail": "Messages must be JSON."})
+                continue
+
+            last_seen = time.monotonic()
+            await WSController._handle(connection, user, message)
+
+    @staticmethod
+    async def _handle(connection: Connection, user: dict, message):
+        action = message.get("action") if isinstance(message, dict) else None
+
+        if action in ("subscribe", "unsubscribe"):
+            doc_ids = message.get("doc_ids")
+            if not isinstance(doc_ids, list) or not all(isinstance(i, int) for i in doc_ids):
+                manager.send_to(connection, {"type": "error", "detail": "'doc_ids' must be a list of integers."})
+                return
 
+            if action == "subscribe":
+                last_event_ids = message.get("last_event_ids")
+                await WSController._subscribe(
+                    connection, user, doc_ids, last_event_ids if isinstance(last_event_ids, dict) else {}
+                )
+            else:
+                for doc_id in doc_ids:
+                    manager.unsubscribe(connection, doc_channel(doc_id))
+                manager.send_to(connection, {"type": "unsubscribed", "doc_ids": doc_ids})
+
+        elif action == "chat":
+            WSController._start_chat(connection, user, message)
+        elif action == "cancel":
+            task = connection.streams.get(message.get("request_id"))
+            if task:
+                task.cancel()
+        elif action == "ping":
+            manager.send_to(connection, {"type": "pong"})
+        elif action == "pong":
+            pass
+        else:
+            manager.send_to(connection, {"type": "error", "detail": f"Unknown action '{action}'."})
+
+    # ------------------------------------------------------------
+    # 🔹 Subscriptions (validated against department access)
+    # ------------------------------------------------------------
+    @staticmethod
+    async def _subscribe(connection: Connection, user: dict, doc_ids: list[int], last_event_ids: dict):
+        doc_ids = list(dict.fromkeys(doc_ids))
+        # the user and department channels are not document subscriptions; re-subscribing (to replay) is free
+        subscribed = sum(1 for channel in connection.channels if channel.startswith("doc:"))
+        new_ids = [doc_id for doc_id in doc_ids if doc_channel(doc_id) not in connection.channels]
+        if subscribed + len(new_ids) > settings.WS_MAX_SUBSCRIPTIONS:
+            manager.send_to(connection, {
+                "type": "error",
+                "detail": f"At most {settings.WS_MAX_SUBSCRIPTIONS} document subscriptions per session.",
+            })
+            return
+
+        allowed = await DocsService.filter_viewable_document_ids(user, doc_ids)
+        allowed_set = set(allowed)
+        for doc_id in allowed:
+            manager.subscribe(connection, doc_channel(doc_id))
+        manager.send_to(connection, {
+            "type": "subscribed",
+            "doc_ids": allowed,
+            "denied": [doc_id for doc_id in doc_ids if doc_id not in allowed_set],
+        })
+
+        # Replay what the client missed (subscribed first, so nothing falls in between;
+        # an event may arrive twice, clients de-duplicate by event_id)
+        replays = await asyncio.gather(*(
+            read_document_events(doc_id, last_event_ids.get(str(doc_id))) for doc_id in allowed
+        ))
+        for doc_id, events in zip(allowed, replays):
+            for event_id, event in events:
+                status = event.get("status", "unknown")
+                manager.send_to(connection, status_payload(doc_id, status, status_message(doc_id, status), event_id))
+
+    # ------------------------------------------------------------
+    # 🔹 Streamed chat answers
+    # ------------------------------------------------------------
+    @staticmethod
+    def _start_chat(connection: Connection, user: dict, message: dict):
+        request_id, query = message.get("request_id"), message.get("query")
+        if not isinstance(request_id, str) or not isinstance(query, str) or not query.strip():
+            manager.send_to(connection, {"type": "error", "detail": "'chat' needs a 'request_id' and a 'query'."})
+            return
+        if request_id in connection.streams:
+            manager.send_to(connection, {"type": "error", "detail": f"Request '{request_id}' is already running."})
+            return
+        if len(connection.streams) >= settings.WS_MAX_CHAT_STREAMS:
+            manager.send_to(connection, {
+                "type": "error",
+                "detail": f"At most {settings.WS_MAX_CHAT_STREAMS} chat answers at a time per session.",
+            })
+            return
+        if user.get("role") != "admin" and not user.get("department_id"):
+            manager.send_to(connection, {"type": "error", "detail": "User does not belong to any department."})
+            return
+
+        task = asyncio.create_task(WSController._stream_chat(connection, user, request_id, query[:2000]))
+        connection.streams[request_id] = task
+        task.add_done_callback(lambda _: connection.streams.pop(request_id, None))
+
+    @staticmethod
+    async def _stream_chat(connection: Connection, user: dict, request_id: str, query: str):
         try:
-            while True:
-                await websocket.receive_text()   # Keep connection alive
+            async with aclosing(ChatService.stream_answer(user, query)) as events:
+                async for event in events:
+                    # Status updates may be dropped when a client lags, answer tokens may not
+                    await manager.wait_for_room(connection)
+                    manager.send_to(connection, {**event, "request_id": request_id})
+        except asyncio.CancelledError:
+            manager.send_to(connection, {"type": "cancelled", "request_id": request_id})
+            raise
         except Exception:
-            await manager.disconnect(doc_id)
+            logger.exception("Streaming answer failed", extra={"user_id": user["user_id"], "request_id": request_id})
+            manager.send_to(connection, {"type": "error", "request_id": request_id, "detail": "Chat failed."})
+
+    # ------------------------------------------------------------
+    # 🔹 Single-document socket (kept for existing clients)
+    # ------------------------------------------------------------
+    @staticmethod
+    async def document_connection(websocket: WebSocket, doc_id: int, token: str | None,
+                                  last_event_id: str | None = None):
+        """A session pre-subscribed to one document; new clients should use one /ws/session."""
+        last_event_ids = {str(doc_id): last_event_id} if last_event_id else {}
+        await WSController.session(websocket, token, [doc_id], last_event_ids)
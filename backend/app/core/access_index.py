@@ -0,0 +1,212 @@
+# app/core/access_index.py
+"""
+Department → document access index.
+
+Each department's accessible document ids are stored as a Redis bitmap
+(`access:bitmap:<department_id>`, bit N set = document N is accessible), so
+the whole index for 50k documents costs ~6 KB per department.
+Every process mirrors the bitmaps it has used in memory and checks a
+per-department generation counter (`access:generation` hash) before using
+its copy, so a permission check is one HGET plus a bit lookup and filtering
+thousands of candidate ids needs no database round trip.
+
+The index is maintained incrementally by DocsService (add / access change /
+delete). If Redis is unavailable during an update the index can drift;
+`python -m app.core.access_index rebuild` recomputes it from PostgreSQL.
+Until the index has been built, lookups fall back to the database.
+"""
+import asyncio
+import logging
+import sys
+from typing import Iterable, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BITMAP_KEY = "access:bitmap:{department_id}"
+GENERATION_KEY = "access:generation"
+BUILT_KEY = "access:built"
+
+
+def _is_set(bitmap: bytes, doc_id: int) -> bool:
+    """Redis bitmaps are big-endian per byte: offset 0 is the MSB of byte 0."""
+    byte_index = doc_id >> 3
+    if doc_id < 0 or byte_index >= len(bitmap):
+        return False
+    return bool(bitmap[byte_index] & (0x80 >> (doc_id & 7)))
+
+
+def _build_bitmap(doc_ids: Iterable[int]) -> bytes:
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return b""
+    bitmap = bytearray((max(doc_ids) >> 3) + 1)
+    for doc_id in doc_ids:
+        bitmap[doc_id >> 3] |= 0x80 >> (doc_id & 7)
+    return bytes(bitmap)
+
+
+class AccessIndex:
+    def __init__(self):
+        # Bitmaps are binary, so this client must not decode responses
+        self._client: Optional[aioredis.Redis] = None
+        # key = department ID, value = (generation, bitmap bytes)
+        self._mirror: dict[int, tuple[int, bytes]] = {}
+
+    def _redis(self) -> aioredis.Redis:
+        if self._client is None:
+            redis_url = settings.REDIS_URL or "redis://localhost:6379"
+            self._client = aioredis.from_url(redis_url, decode_responses=False)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    # ------------------------------------------------------------
+    # 🔹 Lookups
+    # ------------------------------------------------------------
+    async def _get_bitmap(self, department_id: int) -> Optional[bytes]:
+        """Return the department bitmap, or None if the index can't be used."""
+        client = self._redis()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hget(GENERATION_KEY, str(department_id))
+            pipe.exists(BUILT_KEY)
+            generation, built = await pipe.execute()
+        if not built:
+            return None
+
+        generation = int(generation or 0)
+        cached = self._mirror.get(department_id)
+        if cached and cached[0] == generation:
+            return cached[1]
+
+        # Read bitmap + generation together so the mirror is tagged consistently
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.get(BITMAP_KEY.format(department_id=department_id))
+            pipe.hget(GENERATION_KEY, str(department_id))
+            bitmap, generation = await pipe.execute()
+        bitmap = bitmap or b""
+        self._mirror[department_id] = (int(generation or 0), bitmap)
+        return bitmap
+
+    async def filter_allowed(self, department_id: int, doc_ids: Iterable[int]) -> list[int]:
+        """Keep only the document ids the department may access (input order preserved)."""
+        doc_ids = list(doc_ids)
+        try:
+            bitmap = await self._get_bitmap(department_id)
+        except Exception as e:
+            logger.warning("Redis unavailable, falling back to database: %s", e)
+            bitmap = None
+
+        if bitmap is None:
+            # Blocking session + query: keep it off the event loop
+            return await asyncio.to_thread(self._filter_from_db, department_id, doc_ids)
+
+        # Inlined _is_set: this loop runs for every retrieval candidate
+        size = len(bitmap)
+        return [
+            doc_id for doc_id in doc_ids
+            if 0 <= doc_id and (doc_id >> 3) < size and bitmap[doc_id >> 3] & (0x80 >> (doc_id & 7))
+        ]
+
+    async def is_allowed(self, department_id: int, doc_id: int) -> bool:
+        return bool(await self.filter_allowed(department_id, [doc_id]))
+
+    @staticmethod
+    def _filter_from_db(department_id: int, doc_ids: list[int]) -> list[int]:
+        from app.core.unit_of_work import UnitOfWork
+
+        # Primary on purpose: a lagging replica could still grant revoked access
+        with UnitOfWork() as uow:
+            allowed = uow.documents.filter_accessible_ids(department_id, doc_ids)
+        return [doc_id for doc_id in doc_ids if doc_id in allowed]
+
+    # ------------------------------------------------------------
+    # 🔹 Incremental maintenance
+    # ------------------------------------------------------------
+    async def apply_changes(self, granted: Iterable[tuple[int, int]] = (),
+                            revoked: Iterable[tuple[int, int]] = ()):
+        """
+        Apply (department_id, document_id) grants and revocations.
+        Call after the database transaction committed.
+        """
+        granted, revoked = list(granted), list(revoked)
+        if not granted and not revoked:
+            return
+
+        try:
+            async with self._redis().pipeline(transaction=True) as pipe:
+                for department_id, doc_id in granted:
+                    pipe.setbit(BITMAP_KEY.format(department_id=department_id), doc_id, 1)
+                for department_id, doc_id in revoked:
+                    pipe.setbit(BITMAP_KEY.format(department_id=department_id), doc_id, 0)
+                for department_id in {dep_id for dep_id, _ in granted + revoked}:
+                    pipe.hincrby(GENERATION_KEY, str(department_id), 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error("Failed to apply changes, run a rebuild: %s", e, extra={"granted": granted, "revoked": revoked})
+
+
+# ------------------------------------------------------------
+# 🔹 Consistency rebuild (sync, for the CLI / Celery)
+# ------------------------------------------------------------
+def rebuild_access_index() -> dict:
+    """
+    Recompute every department bitmap from department_documents_access and
+    swap them in atomically. Returns counts for reporting.
+    """
+    from app.core.unit_of_work import UnitOfWork
+
+    by_department: dict[int, list[int]] = {}
+    with UnitOfWork() as uow:
+        for department_id, doc_id in uow.documents.iter_access_pairs():
+            by_department.setdefault(department_id, []).append(doc_id)
+
+    redis_url = settings.REDIS_URL or "redis://localhost:6379"
+    client = redis.Redis.from_url(redis_url, decode_responses=False)
+    try:
+        stale_keys = {
+            key for key in client.scan_iter(match=BITMAP_KEY.format(department_id="*"))
+        }
+
+        pipe = client.pipeline(transaction=True)
+        for department_id, doc_ids in by_department.items():
+            key = BITMAP_KEY.format(department_id=department_id)
+            stale_keys.discard(key.encode())
+            pipe.set(key, _build_bitmap(doc_ids))
+            pipe.hincrby(GENERATION_KEY, str(department_id), 1)
+        for key in stale_keys:
+            department_id = key.decode().rsplit(":", 1)[1]
+            pipe.delete(key)
+            pipe.hincrby(GENERATION_KEY, department_id, 1)
+        pipe.set(BUILT_KEY, 1)
+        pipe.execute()
+    finally:
+        client.close()
+
+    return {
+        "departments": len(by_department),
+        "access_rows": sum(len(ids) for ids in by_department.values()),
+        "removed_departments": len(stale_keys),
+    }
+
+
+access_index = AccessIndex()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m app.core.access_index rebuild")
+        sys.exit(2)
+
+    counts = rebuild_access_index()
+    print(
+        f"✅ [AccessIndex] Rebuilt {counts['departments']} departments "
+        f"({counts['access_rows']} access rows, {counts['removed_departments']} stale removed)"
+    )
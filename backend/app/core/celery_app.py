@@ -1,5 +1,9 @@
 from celery import Celery
+from celery.signals import setup_logging
 from app.config import settings
+from app.core.logging_config import configure_logging
+
+MONITOR_QUEUE = "monitor"
 
 celery_app = Celery(
     "knowserve",
@@ -13,7 +17,23 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Answer validation gets its own queue so it never delays ingestion
+    # (workers: celery -A app.core.celery_app worker -Q celery,monitor)
+    task_routes={"app.tasks.monitor_task.*": {"queue": MONITOR_QUEUE}},
+    # Periodic jobs (celery -A app.core.celery_app beat)
+    beat_schedule={
+        "archive-chat-history": {
+            "task": "app.tasks.archive_task.archive_chat_history_task",
+            "schedule": settings.CHAT_ARCHIVE_INTERVAL_SECONDS,
+        },
+    },
 )
 
+# Workers log through the same queue handler as the API instead of Celery's own setup
+@setup_logging.connect
+def _configure_logging(**_kwargs):
+    configure_logging()
+
+
 # ✅ Autodiscover tasks from this package
 celery_app.autodiscover_tasks(["app.tasks"])
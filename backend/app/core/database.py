@@ -1,8 +1,17 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CONNECTIONS
+
+logger = logging.getLogger(__name__)
 
 # ---------------------------
 # Database configuration
@@ -14,12 +23,151 @@ DATABASE_URL = (
     f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 )
 
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.logging_name).observe(time.perf_counter() - start)
+
+
+def _create_engine(url: str, name: str):
+    """Engine with the configured pool and utilisation metrics."""
+    new_engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+    def record_utilisation(*_):
+        pool = new_engine.pool
+        DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+    event.listen(new_engine, "checkout", record_utilisation)
+    event.listen(new_engine, "checkin", record_utilisation)
+    return new_engine
+
+
 # Create SQLAlchemy engine (connection pool)
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = _create_engine(DATABASE_URL, "primary")
 
 # Session factory for database operations
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# ---------------------------
+# Read replicas
+# ---------------------------
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = _create_engine(url, name)
+        self.sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.healthy = True
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+    """
+    Round-robin over healthy replicas, falling back to the primary.
+    A replica is re-checked at most every DB_REPLICA_CHECK_INTERVAL seconds
+    (reachable and replaying within DB_REPLICA_MAX_LAG_SECONDS).
+    """
+
+    def __init__(self, urls: list[str]):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def _check(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as conn:
+                # Time since the last replayed transaction only counts while WAL is waiting
+                # to be replayed: with an idle primary it grows although nothing is missing
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar()
+            healthy = float(lag) <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            if not healthy:
+                logger.warning("Replica lagging, skipping it", extra={"replica": replica.name, "lag_seconds": float(lag)})
+        except Exception as e:
+            logger.warning("Replica health check failed: %s", e, extra={"replica": replica.name})
+            healthy = False
+
+        replica.healthy = healthy
+        return healthy
+
+    def mark_unhealthy(self, replica: Replica):
+        replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def pick(self) -> Replica | None:
+        """Next healthy replica, or None to use the primary."""
+        if not self._cycle:
+            return None
+
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = next(self._cycle)
+                now = time.monotonic()
+                due = now - replica.checked_at >= settings.DB_REPLICA_CHECK_INTERVAL
+                if due:
+                    replica.checked_at = now
+
+            if due:
+                self._check(replica)
+            if replica.healthy:
+                return replica
+        return None
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(settings.replica_urls)
+
+
+def ReadSessionLocal():
+    """
+    Session for read-only work, bound to a healthy replica (or the primary).
+    Replicas replay asynchronously: reads right after a write may not see it yet.
+    """
+    replica = replica_router.pick()
+    if replica is None:
+        return SessionLocal()
+    return replica.sessionmaker()
+
+
+def pool_status() -> dict:
+    """Pool utilisation of every engine, e.g. for the monitor router."""
+    engines = [("primary", engine, True)] + [
+        (r.name, r.engine, r.healthy) for r in replica_router.replicas
+    ]
+    return {
+        name: {
+            "healthy": healthy,
+            "size": eng.pool.size(),
+            "checked_out": eng.pool.checkedout(),
+            "idle": eng.pool.checkedin(),
+            "overflow": max(eng.pool.overflow(), 0),
+        }
+        for name, eng, healthy in engines
+    }
+
 # Declarative base for ORM models
 Base = declarative_base()
 
@@ -30,27 +178,28 @@ Base = declarative_base()
 
 async def init_db():
     """
-    Initialize the database connection and create all tables.
+    Initialize the database connection and apply pending migrations.
     Called once at application startup.
+    Schema changes live in backend/migrations (Alembic), not in create_all().
     """
-    print("🔄 Connecting to PostgreSQL...")
+    logger.info("Connecting to PostgreSQL")
 
     try:
-        # Lazy import ensures all model modules are loaded first
-        from app.models import Base  # imports __init__.py, which imports all models
+        # Lazy import: migrations load all model modules through env.py
+        from app.core.migrations import upgrade_database
 
-        # Create all tables (only if they don't exist)
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database connected and tables ready.")
+        upgrade_database()
+        logger.info("Database connected and migrations applied")
     except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
+        logger.error("Database initialization failed: %s", e)
         raise e
 
 
 async def close_db():
     """Dispose all SQLAlchemy connections on shutdown."""
     engine.dispose()
-    print("🛑 Database engine disposed.")
+    replica_router.dispose()
+    logger.info("Database engine disposed")
 
 
 def get_db():
@@ -1,53 +1,415 @@
-import asyncio, json
-from app.core.redis_client import get_async_redis, invalidate_caches
-from app.core.database import SessionLocal
-from app.models.document import Document
-from app.core.websocket_manager import manager
+import asyncio, json, logging, os, socket, time
+from datetime import datetime
+from app.config import settings
+from app.core.metrics import INGESTION_STAGE_SECONDS, observe_stream_lag
+from app.core.redis_client import get_async_redis, invalidate_caches, INGESTION_STREAM, MONITOR_STREAM
+from app.core.retrieval_cache import retrieval_cache
+from app.core.semantic_cache import semantic_cache
+from app.core.unit_of_work import UnitOfWork
+from app.core.websocket_manager import manager, user_channel
 
+logger = logging.getLogger(__name__)
+
+# Consumer group whose members split the status writes between them:
+# each event is persisted by exactly one API worker of the deployment.
+STATUS_WRITERS_GROUP = "ingestion-status-writers"
+# Same for answer validation results → MonitorLog rows
+MONITOR_LOG_WRITERS_GROUP = "monitor-log-writers"
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+# Entries delivered to a consumer that died are reclaimed after this idle time
+RECLAIM_IDLE_MS = 60_000
+RECLAIM_EVERY_SECONDS = 30
+
+# Entries that cannot be persisted (malformed, or still failing after
+# STREAM_MAX_DELIVERIES deliveries) are copied here with the error and acknowledged:
+#   ingestion:events:dead / monitor:results:dead → {"data", "event_id", "group", "error"}
+DEAD_LETTER_STREAM = "{stream}:dead"
+
+
+# ------------------------------------------------------------
+# 🔹 WebSocket notifications (every worker)
+# ------------------------------------------------------------
 async def listen_for_ingestion_events():
-    """Listen to Redis Pub/Sub events from Celery worker for ingestion results."""
+    """
+    Follow the Redis ingestion stream written by Celery workers.
+    Every API worker reads every event (plain XREAD, no consumer group) so it
+    can notify its own WebSocket clients; starts after the newest existing event.
+    Only fans out: persistence is done by persist_ingestion_statuses().
+    """
     client = await get_async_redis()
-    pubsub = client.pubsub()
-    await pubsub.subscribe("ingestion_complete", "ingestion_failed")
-    print("📡 Listening for ingestion events...")
+    last_id = await _latest_event_id(client, INGESTION_STREAM)
+    logger.info("Listening for ingestion events")
 
-    async for message in pubsub.listen():
-        if message["type"] != "message":
+    while True:
+        try:
+            response = await client.xread(
+                {INGESTION_STREAM: last_id}, block=5000, count=settings.INGESTION_STATUS_BATCH_SIZE
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Ingestion stream read failed, retrying: %s", e)
+            await asyncio.sleep(1)
             continue
 
-        data = json.loads(message["data"])
-        doc_id = data["doc_id"]
-        status = data.get("status", "unknown")
-        department_ids = data.get("departments", [])  # ✅ safely extract list
+        for _stream, entries in response or []:
+            # publish() only enqueues, so a whole batch is fanned out without awaiting clients
+            for event_id, fields in entries:
+                last_id = event_id
+                observe_stream_lag("ingestion_notifications", event_id)
+                # One malformed entry must not end this worker's notifications
+                try:
+                    data = json.loads(fields["data"])
+                    doc_id = data["doc_id"]
+                    status = data.get("status", "unknown")
+                    await manager.send_status(
+                        doc_id, status, status_message(doc_id, status), data.get("departments", []), event_id
+                    )
+                except Exception as e:
+                    logger.error(
+                        "Skipping malformed ingestion event: %r", e,
+                        extra={"stream": INGESTION_STREAM, "event_id": event_id},
+                    )
 
-        # ✅ Update PostgreSQL document status
-        db = SessionLocal()
+
+async def _latest_event_id(client, stream: str) -> str:
+    """
+    Id of the newest stream entry (or "0-0").
+    A concrete id instead of "$" means events added between two XREAD calls are not skipped.
+    """
+    while True:
         try:
-            doc = db.query(Document).filter(Document.id == doc_id).first()
-            if doc:
-                doc.status = status
-                db.commit()
-                print(f"📘 [DB] Document {doc_id} status updated → '{status}'")
+            latest = await client.xrevrange(stream, count=1)
+            return latest[0][0] if latest else "0-0"
+        except Exception as e:
+            logger.error("Stream unavailable, retrying: %s", e, extra={"stream": stream})
+            await asyncio.sleep(1)
+
+
+def status_message(doc_id: int, status: str) -> str:
+    return (
+        f"Ingestion {status} for document {doc_id}."
+        if status != "failed"
+        else f"Ingestion failed for document {doc_id}."
+    )
+
+
+# ------------------------------------------------------------
+# 🔹 Status persistence (one writer per event, batched)
+# ------------------------------------------------------------
+async def persist_ingestion_statuses():
+    """
+    Consume the ingestion stream through a consumer group and persist statuses
+    in batches: events are coalesced until INGESTION_STATUS_BATCH_SIZE entries
+    or INGESTION_STATUS_FLUSH_SECONDS have accumulated, written with one
+    UPDATE ... WHERE id IN (...) per status in a worker thread, then caches
+    are invalidated with a single DEL and the entries acknowledged.
+    """
+    await _consume_in_batches(
+        INGESTION_STREAM, STATUS_WRITERS_GROUP, _flush_statuses,
+        settings.INGESTION_STATUS_BATCH_SIZE, settings.INGESTION_STATUS_FLUSH_SECONDS, "Ingestion",
+        on_ack=_observe_stage_seconds,
+    )
+
+
+async def _consume_in_batches(stream: str, group: str, flush, batch_size: int,
+                              flush_seconds: float, label: str, on_ack=None):
+    """
+    Read `stream` as CONSUMER_NAME of `group` and hand the entries to
+    `flush(batch)` once `batch_size` have arrived or `flush_seconds` have passed
+    since the first one; the batch is acknowledged after `flush` returns.
+    One bad entry never holds back the others: see _flush_isolating_failures.
+    `on_ack(entries)` runs once per entry, after it is acknowledged (a flush may be retried).
+    """
+    client = await get_async_redis()
+    await _ensure_group(client, stream, group)
+    logger.info("%s: persisting stream", label, extra={"stream": stream, "group": group, "consumer": CONSUMER_NAME})
+
+    batch: list[tuple[str, dict]] = []
+    deadline = None
+    next_reclaim = 0.0
+
+    while True:
+        try:
+            now = time.monotonic()
+            if not batch and now >= next_reclaim:
+                batch = await _reclaim_stale(client, stream, group, batch_size)
+                next_reclaim = now + RECLAIM_EVERY_SECONDS
+
+            if batch and deadline is None:
+                deadline = now + flush_seconds
+
+            if batch and (len(batch) >= batch_size or now >= deadline):
+                pending, batch, deadline = batch, [], None
+                await _flush_isolating_failures(client, stream, group, flush, pending, label, on_ack)
+                continue
+
+            block_ms = int((deadline - now) * 1000) if deadline else 5000
+            response = await client.xreadgroup(
+                group, CONSUMER_NAME, {stream: ">"},
+                count=batch_size - len(batch), block=max(block_ms, 1),
+            )
+            for _stream, entries in response or []:
+                batch.extend(await _parse_entries(client, stream, group, entries))
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Unacknowledged entries stay pending and are reclaimed later
+            logger.error("%s: persistence failed, retrying: %s", label, e, extra={"stream": stream, "group": group})
+            batch, deadline = [], None
+            await asyncio.sleep(1)
+
+
+async def _ensure_group(client, stream: str, group: str):
+    while True:
+        try:
+            # Start at "$": events written before the group existed were handled by the old listener
+            await client.xgroup_create(stream, group, id="$", mkstream=True)
+            return
+        except Exception as e:
+            if "BUSYGROUP" in str(e):
+                return
+            logger.error("Cannot create consumer group, retrying: %s", e, extra={"stream": stream, "group": group})
+            await asyncio.sleep(1)
+
+
+async def _reclaim_stale(client, stream: str, group: str, count: int) -> list[tuple[str, dict]]:
+    """
+    Take over entries a dead consumer received but never acknowledged.
+    Entries already delivered STREAM_MAX_DELIVERIES times are dead-lettered instead.
+    """
+    stale = await client.xpending_range(stream, group, min="-", max="+", count=count, idle=RECLAIM_IDLE_MS)
+    exhausted = [entry for entry in stale if entry["times_delivered"] >= settings.STREAM_MAX_DELIVERIES]
+    if exhausted:
+        event_ids = [entry["message_id"] for entry in exhausted]
+        deliveries = {entry["message_id"]: entry["times_delivered"] for entry in exhausted}
+        # XCLAIM with the idle condition: a single consumer takes over each entry.
+        # Only what it returned is ours: an entry another consumer claimed is still being handled.
+        trimmed = []
+        for event_id, fields in await client.xclaim(stream, group, CONSUMER_NAME, RECLAIM_IDLE_MS, event_ids):
+            if fields:
+                await _dead_letter(
+                    client, stream, group, event_id, fields,
+                    f"not persisted after {deliveries[event_id]} deliveries",
+                )
             else:
-                print(f"⚠️ [DB] Document {doc_id} not found")
+                trimmed.append(event_id)
+        # Trimmed entries have nothing left to persist
+        if trimmed:
+            await client.xack(stream, group, *trimmed)
+
+    _next, entries, *_ = await client.xautoclaim(
+        stream, group, CONSUMER_NAME, min_idle_time=RECLAIM_IDLE_MS, start_id="0-0", count=count,
+    )
+    # Entries trimmed from the stream come back without fields
+    return await _parse_entries(client, stream, group, [entry for entry in entries if entry[1]])
+
+
+async def _parse_entries(client, stream: str, group: str, entries) -> list[tuple[str, dict]]:
+    """Decode each entry on its own; malformed ones are dead-lettered right away."""
+    parsed = []
+    for event_id, fields in entries:
+        try:
+            parsed.append((event_id, json.loads(fields["data"])))
+        except (KeyError, TypeError, ValueError) as e:
+            await _dead_letter(client, stream, group, event_id, fields, f"malformed entry: {e!r}")
+    return parsed
+
+
+async def _flush_isolating_failures(client, stream: str, group: str, flush,
+                                    batch: list[tuple[str, dict]], label: str, on_ack=None):
+    """
+    flush(batch) and acknowledge it. If the batch fails, retry its entries one
+    at a time: entries that fail while others succeed are dead-lettered. If
+    every entry fails the cause is likely not the data (database down), so the
+    error propagates and the entries stay pending, to be reclaimed until
+    STREAM_MAX_DELIVERIES.
+    """
+    try:
+        await flush(batch)
+    except Exception as e:
+        logger.warning(
+            "%s: batch failed, retrying entries one by one: %s", label, e,
+            extra={"stream": stream, "group": group, "entries": len(batch)},
+        )
+    else:
+        await _ack(client, stream, group, batch, on_ack)
+        return
+
+    persisted, failed = [], []
+    for entry in batch:
+        try:
+            await flush([entry])
         except Exception as e:
-            print(f"❌ [DB] Error updating document {doc_id}: {e}")
-        finally:
-            db.close()
-
-        # 🧹 Invalidate Redis caches
-        keys_to_invalidate = [f"docs:all", f"doc:{doc_id}"]
-        for dep_id in department_ids:
-            keys_to_invalidate.append(f"docs:department:{dep_id}")
-
-        await invalidate_caches(keys_to_invalidate)
-        print(f"🧹 [Ingestion] Cache invalidated for document {doc_id}")
-
-        # 📡 Notify WebSocket clients
-        message_text = (
-            f"Ingestion {status} for document {doc_id}."
-            if status != "failed"
-            else f"Ingestion failed for document {doc_id}."
+            failed.append((entry, e))
+        else:
+            persisted.append(entry)
+
+    if not persisted:
+        raise failed[-1][1]
+    await _ack(client, stream, group, persisted, on_ack)
+    for (event_id, data), error in failed:
+        await _dead_letter(client, stream, group, event_id, {"data": json.dumps(data)}, repr(error))
+
+
+async def _ack(client, stream: str, group: str, entries: list[tuple[str, dict]], on_ack=None):
+    await client.xack(stream, group, *[event_id for event_id, _ in entries])
+    for event_id, _ in entries:
+        observe_stream_lag(group, event_id)
+    if on_ack is not None:
+        on_ack(entries)
+
+
+async def _dead_letter(client, stream: str, group: str, event_id: str, fields: dict, error: str):
+    """Copy the entry to the dead-letter stream and acknowledge it, atomically."""
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.xadd(
+            DEAD_LETTER_STREAM.format(stream=stream),
+            {"data": fields.get("data", json.dumps(fields)), "event_id": event_id, "group": group, "error": error},
+            maxlen=settings.DEAD_LETTER_STREAM_MAXLEN, approximate=True,
         )
+        pipe.xack(stream, group, event_id)
+        await pipe.execute()
+    logger.error(
+        "Stream entry dead-lettered: %s", error,
+        extra={"stream": stream, "group": group, "event_id": event_id},
+    )
+
+
+async def _flush_statuses(batch: list[tuple[str, dict]]):
+    # Last event per document wins (stream order)
+    statuses: dict[int, str] = {}
+    keys = {"docs:all"}
+    department_ids = set()
+    for _event_id, data in batch:
+        statuses[data["doc_id"]] = data.get("status", "unknown")
+        keys.add(f"doc:{data['doc_id']}")
+        department_ids.update(data.get("departments", []))
+    keys.update(f"docs:access:{dep_id}" for dep_id in department_ids)
+
+    # ✅ Update PostgreSQL off the event loop
+    started = time.perf_counter()
+    updated = await asyncio.to_thread(_persist_statuses, statuses)
+    logger.info(
+        "%d document status(es) updated from %d event(s)", updated, len(batch),
+        extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+    )
+
+    # 🧹 Invalidate Redis caches (one round trip for the batch)
+    await invalidate_caches(sorted(keys))
+    # Re-ingested content makes answers citing these documents stale
+    await semantic_cache.invalidate_documents(statuses.keys())
+    # The chunks are already searchable: move retrieval for these departments to fresh keys
+    await retrieval_cache.bump_generations(department_ids)
+
+
+def _observe_stage_seconds(entries: list[tuple[str, dict]]):
+    # Celery workers time the stages; observed here, once per event across the deployment
+    for _event_id, data in entries:
+        for stage, seconds in data.get("stage_seconds", {}).items():
+            INGESTION_STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def _persist_statuses(statuses: dict[int, str]) -> int:
+    by_status: dict[str, list[int]] = {}
+    for doc_id, status in statuses.items():
+        by_status.setdefault(status, []).append(doc_id)
+
+    with UnitOfWork() as uow:
+        return sum(
+            uow.documents.set_status_bulk(status, doc_ids)
+            for status, doc_ids in by_status.items()
+        )
+
+
+# ------------------------------------------------------------
+# 🔹 Answer validation results (see app/services/monitor_service.py)
+# ------------------------------------------------------------
+async def listen_for_validation_results():
+    """
+    Follow the monitor stream on every API worker (plain XREAD, like
+    listen_for_ingestion_events) and tell the asker, on their user channel,
+    about answers that failed validation after they were returned.
+    """
+    client = await get_async_redis()
+    last_id = await _latest_event_id(client, MONITOR_STREAM)
+    logger.info("Listening for answer validation results")
+
+    while True:
+        try:
+            response = await client.xread(
+                {MONITOR_STREAM: last_id}, block=5000, count=settings.MONITOR_LOG_BATCH_SIZE
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Monitor stream read failed, retrying: %s", e)
+            await asyncio.sleep(1)
+            continue
+
+        for _stream, entries in response or []:
+            for event_id, fields in entries:
+                last_id = event_id
+                observe_stream_lag("validation_notifications", event_id)
+                # One malformed entry must not end flag / retract delivery for this worker
+                try:
+                    data = json.loads(fields["data"])
+                    if data.get("flagged"):
+                        manager.publish(user_channel(data["user_id"]), flagged_payload(data))
+                except Exception as e:
+                    logger.error(
+                        "Skipping malformed validation result: %r", e,
+                        extra={"stream": MONITOR_STREAM, "event_id": event_id},
+                    )
+
+
+def flagged_payload(data: dict) -> dict:
+    action = settings.MONITOR_FAILURE_ACTION
+    return {
+        "type": "answer_retracted" if action == "retract" else "answer_flagged",
+        "answer_id": data["answer_id"],
+        "reason": data["reason"],
+    }
+
+
+async def persist_monitor_logs():
+    """
+    Write validation results as MonitorLog rows, MONITOR_LOG_BATCH_SIZE per
+    INSERT (or whatever arrived within MONITOR_LOG_FLUSH_SECONDS), one writer
+    per result across the deployment.
+    """
+    await _consume_in_batches(
+        MONITOR_STREAM, MONITOR_LOG_WRITERS_GROUP, _flush_monitor_logs,
+        settings.MONITOR_LOG_BATCH_SIZE, settings.MONITOR_LOG_FLUSH_SECONDS, "Monitor",
+    )
+
+
+async def _flush_monitor_logs(batch: list[tuple[str, dict]]):
+    rows = [
+        {
+            "query_id": data["answer_id"],
+            "valid": data["valid"],
+            "reason": data["reason"],
+            "created_at": datetime.fromisoformat(data["created_at"]),
+            "stage_latencies": data.get("stage_latencies"),
+        }
+        for _event_id, data in batch
+    ]
+    started = time.perf_counter()
+    inserted = await asyncio.to_thread(_persist_monitor_logs, rows)
+    logger.info(
+        "%d monitor log(s) written", inserted,
+        extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+    )
+
+    # A flagged answer may have been stored in the semantic cache: drop answers citing its sources
+    flagged_doc_ids = {doc_id for _event_id, data in batch if data.get("flagged") for doc_id in data["doc_ids"]}
+    if flagged_doc_ids:
+        await semantic_cache.invalidate_documents(flagged_doc_ids)
+
 
-        await manager.send_status(doc_id, status, message_text)
+def _persist_monitor_logs(rows: list[dict]) -> int:
+    with UnitOfWork() as uow:
+        return uow.monitor_logs.save_bulk(rows)
@@ -0,0 +1,82 @@
+# app/core/history_writer.py
+"""
+Batched chat history inserts.
+
+Every answer saves one chat_history row. Instead of one transaction per
+answer, rows queue in the process and are written together, with one
+executemany INSERT ... RETURNING id, as soon as CHAT_HISTORY_BATCH_SIZE rows
+are waiting or CHAT_HISTORY_FLUSH_MS after the first one. The caller awaits
+its own row id (the answer id of the chat done event), so a save costs at
+most the flush delay more than a direct insert, and one commit per batch
+under load.
+
+A caller that goes away still has its row written; `close()` writes what is
+left at shutdown.
+"""
+import asyncio
+import logging
+
+from app.config import settings
+from app.core.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistoryWriter:
+    def __init__(self):
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # Flush tasks in progress (strong references until they finish)
+        self._flushes: set[asyncio.Task] = set()
+
+    async def save(self, row: dict) -> int:
+        """Queue a chat_history row (column dict) and return its id once written."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= settings.CHAT_HISTORY_BATCH_SIZE:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                settings.CHAT_HISTORY_FLUSH_MS / 1000, self._start_flush
+            )
+        # The row is written even if the caller is cancelled
+        return await asyncio.shield(future)
+
+    async def close(self):
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[dict, asyncio.Future]]):
+        try:
+            ids = await asyncio.to_thread(_insert, [row for row, _ in batch])
+        except Exception as e:
+            logger.error("Failed to write %d chat history row(s): %s", len(batch), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug("%d chat history row(s) written", len(ids))
+        for (_, future), row_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(row_id)
+
+
+def _insert(rows: list[dict]) -> list[int]:
+    with UnitOfWork() as uow:
+        return uow.chat_history.save_bulk(rows)
+
+
+chat_history_writer = ChatHistoryWriter()
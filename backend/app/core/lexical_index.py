@@ -0,0 +1,152 @@
+# app/core/lexical_index.py
+"""
+Persistent BM25 inverted index over the ingested chunks.
+
+Vector similarity misses exact tokens such as policy codes ("HR-2024-07"),
+SKUs and names, so every chunk is also indexed lexically. The index is an
+SQLite FTS5 table on disk next to the Chroma data (BM25 ranking is built
+in, inserts are incremental, WAL mode lets API workers read while a Celery
+worker writes). `-` and `_` are kept inside tokens so codes match as a whole.
+
+    chunks       FTS5(text, doc_id UNINDEXED)
+    chunk_docs   rowid → doc_id, indexed on doc_id so a document's chunks
+                 can be replaced or removed without scanning the index
+    chunks_vocab per-term document counts (fts5vocab), used to search only
+                 the rarest query terms: common ones barely change BM25
+                 ranks but dominate query time
+
+Access control is applied by the caller (RetrievalService), as for vectors.
+"""
+import os
+import re
+import sqlite3
+import threading
+
+from app.config import settings
+
+# Same token definition as the FTS5 tokenizer below (unicode61 + tokenchars "-_")
+TOKEN_RE = re.compile(r"[\w\-]+", re.UNICODE)
+MAX_QUERY_TOKENS = 32
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    text, doc_id UNINDEXED, tokenize = "unicode61 tokenchars '-_'"
+);
+CREATE TABLE IF NOT EXISTS chunk_docs (rowid INTEGER PRIMARY KEY, doc_id INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_chunk_docs_doc_id ON chunk_docs (doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks, 'row');
+"""
+
+
+def index_path() -> str:
+    """Absolute path of the index file (relative paths are resolved like CHROMA_PATH)."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, settings.LEXICAL_INDEX_PATH)
+
+
+def query_tokens(query: str) -> list[str]:
+    return list(dict.fromkeys(t.lower() for t in TOKEN_RE.findall(query) if t.strip("-_")))[:MAX_QUERY_TOKENS]
+
+
+def build_match_query(tokens: list[str]) -> str:
+    """FTS5 MATCH expression: any of the tokens, each quoted (no FTS5 syntax from users)."""
+    return " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+
+
+class LexicalIndex:
+    def __init__(self, path: str | None = None):
+        self._path = path
+        # sqlite3 connections are per thread (queries run in asyncio.to_thread workers)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            path = self._path or index_path()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            connection = sqlite3.connect(path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    # ------------------------------------------------------------
+    # 🔹 Writes (ingestion / deletion)
+    # ------------------------------------------------------------
+    def replace_document(self, doc_id: int, texts: list[str]):
+        """Index a document's chunks, replacing whatever was indexed for it before."""
+        connection = self._connect()
+        with connection:
+            if connection.execute("SELECT 1 FROM chunk_docs WHERE doc_id = ? LIMIT 1", (doc_id,)).fetchone():
+                self._delete(connection, doc_id)
+            connection.executemany("INSERT INTO chunk_docs (doc_id) VALUES (?)", [(doc_id,)] * len(texts))
+            rowids = [row[0] for row in connection.execute(
+                "SELECT rowid FROM chunk_docs WHERE doc_id = ? ORDER BY rowid", (doc_id,)
+            )]
+            connection.executemany(
+                "INSERT INTO chunks (rowid, text, doc_id) VALUES (?, ?, ?)",
+                [(rowid, text, doc_id) for rowid, text in zip(rowids, texts)],
+            )
+
+    def delete_document(self, doc_id: int):
+        connection = self._connect()
+        with connection:
+            self._delete(connection, doc_id)
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, doc_id: int):
+        connection.execute(
+            "DELETE FROM chunks WHERE rowid IN (SELECT rowid FROM chunk_docs WHERE doc_id = ?)", (doc_id,)
+        )
+        connection.execute("DELETE FROM chunk_docs WHERE doc_id = ?", (doc_id,))
+
+    # ------------------------------------------------------------
+    # 🔹 Search
+    # ------------------------------------------------------------
+    def search(self, query: str, n: int) -> list[dict]:
+        """Top-n chunks by BM25, best first: [{"doc_id", "text", "score"}] (lower score = better)."""
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        connection = self._connect()
+        if len(tokens) > 1:
+            tokens = self._drop_common_terms(connection, tokens)
+            if not tokens:
+                return []
+
+        rows = connection.execute(
+            "SELECT doc_id, text, rank FROM chunks WHERE chunks MATCH ? ORDER BY rank LIMIT ?",
+            (build_match_query(tokens), n),
+        ).fetchall()
+        return [{"doc_id": doc_id, "text": text, "score": score} for doc_id, text, score in rows]
+
+    @staticmethod
+    def _drop_common_terms(connection: sqlite3.Connection, tokens: list[str]) -> list[str]:
+        """
+        Keep the LEXICAL_MAX_QUERY_TERMS rarest indexed terms that occur in at
+        most LEXICAL_MAX_TERM_RATIO of the chunks (all indexed terms if none
+        qualify).
+        Rare terms carry most of the BM25 weight; query time grows with the
+        posting lists of the terms kept.
+        """
+        # max(rowid) is an O(log n) stand-in for the chunk count
+        total = connection.execute("SELECT max(rowid) FROM chunk_docs").fetchone()[0] or 0
+        placeholders = ",".join("?" * len(tokens))
+        doc_counts = dict(connection.execute(
+            f"SELECT term, doc FROM chunks_vocab WHERE term IN ({placeholders})", tokens
+        ).fetchall())
+        # Terms missing from the index match nothing: never let them crowd out real ones
+        present = [token for token in tokens if doc_counts.get(token)]
+        limit = total * settings.LEXICAL_MAX_TERM_RATIO
+        selective = sorted((token for token in present if doc_counts[token] <= limit), key=doc_counts.get)
+        return selective[:settings.LEXICAL_MAX_QUERY_TERMS] or present
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+lexical_index = LexicalIndex()
@@ -0,0 +1,155 @@
+# app/core/llm.py
+"""
+LLM providers used by the chat pipeline.
+
+Every provider streams the completion as an async iterator of text pieces;
+closing the iterator (client disconnect → task cancelled) stops generation.
+Calls go through the LLM scheduler first (app/core/llm_scheduler.py):
+concurrency limits, token budget and interactive-before-background priority.
+LLM_PROVIDER selects the implementation:
+    "stub"  local, no network; emits tokens at LLM_STUB_TOKENS_PER_SECOND
+            after LLM_STUB_FIRST_TOKEN_SECONDS, for latency testing.
+    "http"  OpenAI-compatible /chat/completions endpoint at LLM_BASE_URL,
+            over a pool of keep-alive connections (LLM_MAX_CONNECTIONS).
+            A rate-limited request (429) pauses the scheduler for the
+            Retry-After delay and is retried (LLM_MAX_RETRIES).
+            `python -m benchmarks.llm_stub_server` serves a local stand-in
+            with simulated latency and rate limits.
+"""
+import asyncio
+import json
+import logging
+import re
+from typing import AsyncIterator
+
+import httpx
+
+from app.config import settings
+from app.core.llm_scheduler import Priority, estimate_tokens, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider:
+    async def stream(self, prompt: str, max_tokens: int, priority: Priority = Priority.INTERACTIVE,
+                     department: str | None = None) -> AsyncIterator[str]:
+        """
+        Stream a completion once the scheduler admits the call. Waiting for
+        admission counts as waiting for the first token (callers' deadlines apply).
+        """
+        async with llm_scheduler.slot(estimate_tokens(prompt) + max_tokens, priority, department) as lease:
+            produced = 0
+            try:
+                async for piece in self._stream(prompt, max_tokens):
+                    produced += 1
+                    yield piece
+            finally:
+                # Pieces approximate tokens; the prompt estimate stays spent
+                lease.refund(max_tokens - produced)
+
+    async def complete(self, prompt: str, max_tokens: int, priority: Priority = Priority.INTERACTIVE,
+                       department: str | None = None) -> str:
+        return "".join([piece async for piece in self.stream(prompt, max_tokens, priority, department)])
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover  (makes this an async generator)
+
+    async def close(self):
+        pass
+
+
+class StubLLMProvider(LLMProvider):
+    """
+    Deterministic stand-in for a real model: answers with the start of the
+    context section of the prompt, one word per token, at a fixed rate.
+    """
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        context = re.split(r"Conversation so far:|Question:", prompt.split("Context:", 1)[-1], maxsplit=1)[0]
+        words = re.findall(r"\S+", context) or ["I", "could", "not", "find", "an", "answer."]
+        words = ["Based", "on", "the", "documents:"] + words
+
+        await asyncio.sleep(settings.LLM_STUB_FIRST_TOKEN_SECONDS)
+        interval = 1.0 / settings.LLM_STUB_TOKENS_PER_SECOND
+        for i, word in enumerate(words[:max_tokens]):
+            if i:
+                await asyncio.sleep(interval)
+            yield word if i == 0 else " " + word
+
+
+class HTTPLLMProvider(LLMProvider):
+    """OpenAI-compatible streaming chat completions over pooled keep-alive connections."""
+
+    def __init__(self):
+        self._client = httpx.AsyncClient(
+            base_url=settings.LLM_BASE_URL,
+            headers={"Authorization": f"Bearer {settings.LLM_API_KEY}"} if settings.LLM_API_KEY else {},
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=5.0),
+        )
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        body = {
+            "model": settings.LLM_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            async with self._client.stream("POST", "/chat/completions", json=body) as response:
+                if response.status_code == 429 and attempt < settings.LLM_MAX_RETRIES:
+                    delay = _retry_after(response, attempt)
+                    logger.warning("Rate limited, pausing new calls", extra={"delay_seconds": round(delay, 1)})
+                    llm_scheduler.pause(delay)
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or [{}]
+                    piece = (choices[0].get("delta") or {}).get("content")
+                    if piece:
+                        yield piece
+                return
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def _retry_after(response: httpx.Response, attempt: int) -> float:
+    try:
+        return max(float(response.headers["Retry-After"]), 0.1)
+    except (KeyError, ValueError):
+        return min(0.5 * 2 ** attempt, 10.0)
+
+
+_provider: LLMProvider | None = None
+
+
+def get_llm_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        if settings.LLM_PROVIDER == "stub":
+            _provider = StubLLMProvider()
+        elif settings.LLM_PROVIDER == "http":
+            _provider = HTTPLLMProvider()
+        else:
+            raise ValueError(f"Unknown LLM_PROVIDER '{settings.LLM_PROVIDER}'.")
+    return _provider
+
+
+async def close_llm_provider():
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
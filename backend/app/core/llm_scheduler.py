@@ -0,0 +1,183 @@
+# app/core/llm_scheduler.py
+"""
+Admission control for LLM calls (per process).
+
+A call needs a free slot and enough token budget before it starts:
+  * at most LLM_MAX_CONCURRENCY calls run at once, and at most
+    LLM_MAX_CONCURRENCY_PER_DEPARTMENT per department key, so one busy
+    department cannot take every slot
+  * a token bucket refilled at LLM_TOKENS_PER_MINUTE; a call reserves its
+    estimated prompt + max_tokens and gets the unused part back when it ends
+  * calls that cannot start wait in line instead of failing: interactive
+    calls (chat answers) before background ones (validation, summaries),
+    first come first served within a priority. A waiter held back only by
+    its department's limit does not block the others.
+The provider's rate limit (HTTP 429) pauses all admissions (`pause()`).
+
+Limits apply to one worker process: divide the provider quota by the number
+of API and Celery processes calling it.
+"""
+import asyncio
+import bisect
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+from app.config import settings
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+class _Waiter:
+    __slots__ = ("order", "tokens", "department", "future")
+
+    def __init__(self, order: tuple, tokens: int, department: str | None):
+        self.order = order
+        self.tokens = tokens
+        self.department = department
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.order < other.order
+
+
+class Lease:
+    """A granted call; `refund()` returns reserved tokens the call did not use."""
+
+    def __init__(self, scheduler: "LLMScheduler", tokens: int):
+        self._scheduler = scheduler
+        self.tokens = tokens
+
+    def refund(self, tokens: int):
+        tokens = max(0, min(tokens, self.tokens))
+        self.tokens -= tokens
+        self._scheduler._add_tokens(tokens)
+
+
+class LLMScheduler:
+    def __init__(self):
+        self._waiting: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._active_by_department: Counter = Counter()
+        self._tokens = float(settings.LLM_TOKENS_PER_MINUTE)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    # ------------------------------------------------------------
+    # 🔹 Public API
+    # ------------------------------------------------------------
+    @asynccontextmanager
+    async def slot(self, tokens: int, priority: Priority = Priority.INTERACTIVE,
+                   department: str | None = None) -> AsyncIterator[Lease]:
+        """Wait for a slot and `tokens` of budget (never more than one minute's worth)."""
+        tokens = min(tokens, settings.LLM_TOKENS_PER_MINUTE)
+        waiter = _Waiter((int(priority), next(self._sequence)), tokens, department)
+        bisect.insort(self._waiting, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just before the cancellation: give it back
+                self._release(waiter.department)
+                self._add_tokens(tokens)
+            else:
+                self._waiting.remove(waiter)
+                self._dispatch()
+            raise
+
+        try:
+            yield Lease(self, tokens)
+        finally:
+            self._release(department)
+
+    def pause(self, seconds: float):
+        """Start nothing for `seconds` (the provider is rate limiting)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._schedule_wakeup(self._paused_until - now)
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiting),
+            "waiting_background": sum(1 for w in self._waiting if w.order[0] == Priority.BACKGROUND),
+            "tokens_available": int(self._refill()),
+        }
+
+    # ------------------------------------------------------------
+    # 🔹 Admission
+    # ------------------------------------------------------------
+    def _dispatch(self):
+        now = time.monotonic()
+        if now < self._paused_until:
+            # Whatever called us may have replaced the pending wakeup: keep one for the pause's end
+            if self._waiting:
+                self._schedule_wakeup(self._paused_until - now)
+            return
+        available = self._refill()
+        for waiter in list(self._waiting):
+            if self._active >= settings.LLM_MAX_CONCURRENCY:
+                return
+            if waiter.future.done():
+                continue
+            if (waiter.department is not None and
+                    self._active_by_department[waiter.department] >= settings.LLM_MAX_CONCURRENCY_PER_DEPARTMENT):
+                continue
+            if waiter.tokens > available:
+                # The first admissible waiter keeps its turn: wait for the bucket, don't let later ones overtake
+                self._schedule_wakeup((waiter.tokens - available) * 60 / settings.LLM_TOKENS_PER_MINUTE)
+                return
+            available -= waiter.tokens
+            self._tokens -= waiter.tokens
+            self._active += 1
+            if waiter.department is not None:
+                self._active_by_department[waiter.department] += 1
+            self._waiting.remove(waiter)
+            waiter.future.set_result(None)
+
+    def _release(self, department: str | None):
+        self._active -= 1
+        if department is not None:
+            self._active_by_department[department] -= 1
+            if not self._active_by_department[department]:
+                del self._active_by_department[department]
+        self._dispatch()
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        rate = settings.LLM_TOKENS_PER_MINUTE / 60
+        self._tokens = min(settings.LLM_TOKENS_PER_MINUTE, self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        return self._tokens
+
+    def _add_tokens(self, tokens: int):
+        if tokens:
+            self._refill()
+            self._tokens = min(settings.LLM_TOKENS_PER_MINUTE, self._tokens + tokens)
+            self._dispatch()
+
+    def _schedule_wakeup(self, delay: float):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(max(delay, 0.001), self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+
+llm_scheduler = LLMScheduler()
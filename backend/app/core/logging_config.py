@@ -0,0 +1,156 @@
+# app/core/logging_config.py
+"""
+Logging for the API and the Celery workers.
+
+Modules log through `logging.getLogger(__name__)` and never write to stdout
+themselves: the root logger's only handler puts the record on an in-memory
+queue (no I/O on the event loop) and a background thread (QueueListener)
+formats and writes it. If the writer falls LOG_QUEUE_SIZE records behind,
+new records are dropped and counted (knowserve_log_records_dropped_total)
+instead of blocking the caller.
+
+LOG_FORMAT "json" writes one object per line:
+    {"ts": "...", "level": "INFO", "logger": "app.core.event_listener", "message": "...", "doc_id": 42, ...}
+Fields passed with extra={...} (doc_id, department_id, duration_ms, ...)
+become top-level keys. LOG_LEVEL applies to every logger, LOG_LEVELS
+overrides it per logger. High-frequency debug lines are guarded with
+`if sampled(logger):`, which keeps LOG_DEBUG_SAMPLE_RATE of them and costs
+one level check when debug is off.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+# LogRecord attributes that are not extra fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_EXCEPTION_FORMATTER = logging.Formatter()
+SHUTDOWN_TIMEOUT_SECONDS = 5
+
+_handler: "NonBlockingQueueHandler | None" = None
+_listener: "_Writer | None" = None
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development; extra fields as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = " ".join(f"{key}={value}" for key, value in _extra_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of waiting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The record crosses threads: merge the arguments and render the traceback now,
+        # but leave the formatting (JSON, timestamps) to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class _Writer(logging.handlers.QueueListener):
+    def stop(self):
+        # The queue may be full: give the writer a bounded time to make room and drain,
+        # rather than hanging the process exit behind a stuck stdout
+        try:
+            self.queue.put(self._sentinel, timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        except queue.Full:
+            return
+        self._thread.join(SHUTDOWN_TIMEOUT_SECONDS)
+        self._thread = None
+
+
+def configure_logging():
+    """
+    Route every logger (uvicorn's included) through the queue.
+    Idempotent; called when the API app is imported and when a Celery worker starts.
+    """
+    global _handler
+    if _handler is not None:
+        return
+
+    _handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    # uvicorn installs its own stdout handlers (access log on every request)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = True
+    for name, level in settings.log_levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _start_listener()
+    # Forked children (Celery prefork pool) do not inherit the writer thread
+    os.register_at_fork(after_in_child=_start_listener)
+    atexit.register(shutdown_logging)
+
+
+def _start_listener():
+    global _listener
+    # A fresh queue: one inherited through fork() may hold a lock of a thread that no longer exists
+    _handler.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    _listener = _Writer(_handler.queue, stream)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Write out the records still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def sampled(logger: logging.Logger) -> bool:
+    """Whether to emit this occurrence of a high-frequency debug line."""
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < settings.LOG_DEBUG_SAMPLE_RATE
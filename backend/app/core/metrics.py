@@ -0,0 +1,237 @@
+# app/core/metrics.py
+"""
+Prometheus metrics shared by the application.
+Define every metric here so names and labels stay consistent.
+
+Exposed at GET /monitor/metrics (render_metrics()), authenticated with the
+static METRICS_SCRAPE_TOKEN rather than a user login. With several uvicorn
+workers, start the server with PROMETHEUS_MULTIPROC_DIR pointing at an
+empty directory (wiped before each start): every worker then records into
+its own memory-mapped file and the scrape aggregates all of them, whichever
+worker answers it. Without the variable each worker reports only itself.
+
+Recording is an in-process counter update (no I/O, no Redis). Values that
+live elsewhere (queue depths, consumer group backlogs) are read from Redis
+only when the endpoint is scraped.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# HTTP requests
+# ---------------------------
+HTTP_REQUEST_SECONDS = Histogram(
+    "knowserve_http_request_seconds",
+    "Time from request to end of response (streamed answers included), per route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# ---------------------------
+# Redis caches
+# ---------------------------
+CACHE_REQUESTS = Counter(
+    "knowserve_cache_requests",
+    "Cache lookups by key family (e.g. docs:all, docs:access) and result (hit / miss)",
+    ["family", "result"],
+)
+
+# ---------------------------
+# Database pool
+# ---------------------------
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "knowserve_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "knowserve_db_pool_connections",
+    "Pooled database connections by state (checked_out / idle / overflow)",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+# ---------------------------
+# Ingestion
+# ---------------------------
+INGESTION_STAGE_SECONDS = Histogram(
+    "knowserve_ingestion_stage_seconds",
+    "Duration of each ingestion stage (download / load / split / embed / index)",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+# ---------------------------
+# WebSockets & event listeners
+# ---------------------------
+WS_CONNECTIONS = Gauge(
+    "knowserve_ws_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum",
+)
+
+EVENT_LISTENER_LAG_SECONDS = Histogram(
+    "knowserve_event_listener_lag_seconds",
+    "Time from a stream entry being written to a listener handling it",
+    ["listener"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# ---------------------------
+# Logging
+# ---------------------------
+LOG_RECORDS_DROPPED = Counter(
+    "knowserve_log_records_dropped",
+    "Log records dropped because the log writer thread fell behind (LOG_QUEUE_SIZE)",
+)
+
+
+def cache_family(key: str) -> str:
+    """Key without its id parts: "docs:access:7" → "docs:access" (bounded label values)."""
+    return ":".join(part for part in key.split(":") if not part.isdigit())
+
+
+def observe_stream_lag(listener: str, event_id: str):
+    """Stream entry ids start with the Redis server time of the write, in ms."""
+    written = int(event_id.split("-", 1)[0]) / 1000
+    EVENT_LISTENER_LAG_SECONDS.labels(listener).observe(max(time.time() - written, 0.0))
+
+
+# ---------------------------
+# HTTP middleware
+# ---------------------------
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI middleware (no per-request task or body buffering) observing
+    HTTP_REQUEST_SECONDS. Labelled with the matched route template, never the
+    raw path, so ids in URLs do not create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route_template(scope), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def route_template(scope) -> str:
+    """
+    "/documents/{doc_id}" for "/documents/42". Depending on the FastAPI
+    version the matched route's path may lack the include_router() prefix;
+    prefixes here are static, so it is the request path's leading segments.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    segments = [part for part in scope["path"].split("/") if part]
+    prefix_length = len(segments) - len([part for part in path.split("/") if part])
+    if prefix_length <= 0:
+        return path
+    return "/" + "/".join(segments[:prefix_length]) + path
+
+
+# ---------------------------
+# Exposition
+# ---------------------------
+class _Snapshot:
+    """Collector returning metric families gathered just before the scrape."""
+
+    def __init__(self, families):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+async def _queue_depths() -> list:
+    # Lazy imports: the modules below import this one
+    from app.core.celery_app import MONITOR_QUEUE
+    from app.core.event_listener import MONITOR_LOG_WRITERS_GROUP, STATUS_WRITERS_GROUP
+    from app.core.redis_client import INGESTION_STREAM, MONITOR_STREAM, get_async_redis
+
+    queues = GaugeMetricFamily(
+        "knowserve_queue_depth", "Tasks waiting in a Celery queue", labels=["queue"]
+    )
+    backlog = GaugeMetricFamily(
+        "knowserve_stream_backlog",
+        "Stream entries a consumer group has not handled yet, by state (pending / unread)",
+        labels=["stream", "group", "state"],
+    )
+    try:
+        client = await get_async_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            for queue in ("celery", MONITOR_QUEUE):
+                pipe.llen(queue)
+            depths = await pipe.execute()
+        for queue, depth in zip(("celery", MONITOR_QUEUE), depths):
+            queues.add_metric([queue], depth)
+
+        for stream, group in ((INGESTION_STREAM, STATUS_WRITERS_GROUP), (MONITOR_STREAM, MONITOR_LOG_WRITERS_GROUP)):
+            # The writers create their stream on startup; until then there is no backlog
+            if not await client.exists(stream):
+                continue
+            for info in await client.xinfo_groups(stream):
+                if info["name"] != group:
+                    continue
+                backlog.add_metric([stream, group, "pending"], info["pending"])
+                # "lag" exists from Redis 7 on
+                if info.get("lag") is not None:
+                    backlog.add_metric([stream, group, "unread"], info["lag"])
+    except Exception as e:
+        logger.warning("Queue depths unavailable: %s", e)
+    return [queues, backlog]
+
+
+def _generate(families: list) -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    snapshot = CollectorRegistry()
+    snapshot.register(_Snapshot(families))
+    return generate_latest(registry) + generate_latest(snapshot)
+
+
+async def render_metrics() -> tuple[bytes, str]:
+    """Prometheus text exposition of all workers' metrics plus current queue depths."""
+    families = await _queue_depths()
+    # Multiprocess aggregation reads every worker's file: keep it off the event loop
+    return await asyncio.to_thread(_generate, families), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges (WebSocket connections, pool state) from the aggregate."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
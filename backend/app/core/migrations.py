@@ -0,0 +1,29 @@
+# app/core/migrations.py
+"""
+Programmatic access to the Alembic migrations in backend/migrations.
+Equivalent to running `alembic upgrade head` from backend/.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+
+# backend/ (where alembic.ini lives)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_alembic_config(database_url: str | None = None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    # Keep the application's logging configuration untouched
+    config.attributes["configure_logger"] = False
+
+    if database_url:
+        # ConfigParser treats '%' as interpolation
+        config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    return config
+
+
+def upgrade_database(database_url: str | None = None, revision: str = "head"):
+    """Apply all pending migrations (safe to call from several workers at once)."""
+    command.upgrade(get_alembic_config(database_url), revision)
@@ -0,0 +1,66 @@
+# app/core/rate_limiter.py
+"""
+Sliding-window rate limiter backed by Redis sorted sets.
+
+Each attempt is a member scored with its timestamp; attempts older than the
+window are trimmed before counting, so the limit holds over any window-long
+interval (no burst at fixed-window boundaries). Shared by every API worker.
+"""
+import math
+import logging
+import time
+import uuid
+
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = "ratelimit:{scope}:{identifier}"
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many attempts, retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+async def hit(scope: str, identifier: str, limit: int, window_seconds: int):
+    """
+    Record one attempt for (scope, identifier) and raise RateLimitExceeded if
+    more than `limit` attempts happened in the last `window_seconds`.
+    Rejected attempts are not recorded, so the window frees up on schedule.
+    Fails open when Redis is unavailable.
+    """
+    key = RATE_KEY.format(scope=scope, identifier=identifier)
+    now = time.time()
+    member = f"{now}:{uuid.uuid4().hex[:8]}"
+
+    try:
+        client = await get_async_redis()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - window_seconds)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.zrange(key, 0, 0, withscores=True)
+            pipe.expire(key, window_seconds)
+            _, _, count, oldest, _ = await pipe.execute()
+
+        if count <= limit:
+            return
+
+        await client.zrem(key, member)
+    except Exception as e:
+        logger.warning("Redis unavailable, allowing attempt: %s", e)
+        return
+
+    oldest_at = oldest[0][1] if oldest else now
+    raise RateLimitExceeded(max(1, math.ceil(oldest_at + window_seconds - now)))
+
+
+async def reset(scope: str, identifier: str):
+    """Forget the attempts of one identifier (e.g. after a successful login)."""
+    try:
+        client = await get_async_redis()
+        await client.delete(RATE_KEY.format(scope=scope, identifier=identifier))
+    except Exception as e:
+        logger.warning("Failed to reset attempts: %s", e, extra={"scope": scope, "identifier": identifier})
@@ -1,10 +1,14 @@
 # app/core/redis_client.py
 import redis.asyncio as aioredis
 import redis
+import logging
 from app.config import settings
+from app.core.metrics import CACHE_REQUESTS, cache_family
 import json
 from typing import Any, Optional
 
+logger = logging.getLogger(__name__)
+
 # Global Redis connection instance
 redis_client: aioredis.Redis | None = None
 
@@ -22,9 +26,9 @@ async def init_redis():
         )
         # Test the connection
         await redis_client.ping()
-        print(f"✅ Connected to Redis at {redis_url}")
+        logger.info("Connected to Redis", extra={"redis_url": redis_url})
     except Exception as e:
-        print(f"❌ Failed to connect to Redis: {e}")
+        logger.error("Failed to connect to Redis: %s", e, extra={"redis_url": redis_url})
         redis_client = None
 
 
@@ -33,7 +37,7 @@ async def close_redis():
     global redis_client
     if redis_client:
         await redis_client.close()
-        print("🛑 Redis connection closed.")
+        logger.info("Redis connection closed")
 
 
 # ------------------------------------------------------------
@@ -49,7 +53,7 @@ async def set_cache(key: str, value: Any, expire_seconds: int = 1800) -> bool:
     """
     global redis_client
     if not redis_client:
-        print("⚠️ Redis client not initialized. Skipping cache set.")
+        logger.warning("Redis client not initialized, skipping cache set", extra={"cache_key": key})
         return False
 
     try:
@@ -57,7 +61,7 @@ async def set_cache(key: str, value: Any, expire_seconds: int = 1800) -> bool:
         await redis_client.set(key, data, ex=expire_seconds)
         return True
     except Exception as e:
-        print(f"❌ Failed to set cache for key '{key}': {e}")
+        logger.error("Failed to set cache: %s", e, extra={"cache_key": key})
         return False
 
 
@@ -74,16 +78,68 @@ async def get_cache(key: str) -> Optional[Any]:
     """
     global redis_client
     if not redis_client:
-        print("⚠️ Redis client not initialized. Skipping cache get.")
+        logger.warning("Redis client not initialized, skipping cache get", extra={"cache_key": key})
         return None
 
     try:
         data = await redis_client.get(key)
+        CACHE_REQUESTS.labels(cache_family(key), "miss" if data is None else "hit").inc()
+        if data is None:
+            return None
+        return json.loads(data)
+    except Exception as e:
+        logger.error("Failed to get cache: %s", e, extra={"cache_key": key})
+        return None
+
+# ------------------------------------------------------------
+# 🔹 Set / get one page inside a cached family (Redis hash)
+# ------------------------------------------------------------
+async def set_cache_field(key: str, field: str, value: Any, expire_seconds: int = 1800) -> bool:
+    """
+    Store a Python object as one field of a Redis hash.
+    All fields share the key, so delete_cache(key) drops every page at once.
+    Args:
+        key: Redis key name of the family (e.g. "docs:access:2")
+        field: Field inside the hash (e.g. a page signature)
+        value: Any JSON-serializable Python object
+        expire_seconds: Expiration time of the whole family in seconds
+    """
+    global redis_client
+    if not redis_client:
+        logger.warning("Redis client not initialized, skipping cache set", extra={"cache_key": key})
+        return False
+
+    try:
+        data = json.dumps(value)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, data)
+            pipe.expire(key, expire_seconds)
+            await pipe.execute()
+        return True
+    except Exception as e:
+        logger.error("Failed to set cache: %s", e, extra={"cache_key": key, "cache_field": field})
+        return False
+
+
+async def get_cache_field(key: str, field: str) -> Optional[Any]:
+    """
+    Retrieve and decode one field of a cached Redis hash.
+    Returns:
+        The decoded Python object, or None if not found / error.
+    """
+    global redis_client
+    if not redis_client:
+        logger.warning("Redis client not initialized, skipping cache get", extra={"cache_key": key})
+        return None
+
+    try:
+        data = await redis_client.hget(key, field)
+        CACHE_REQUESTS.labels(cache_family(key), "miss" if data is None else "hit").inc()
         if data is None:
             return None
         return json.loads(data)
     except Exception as e:
-        print(f"❌ Failed to get cache for key '{key}': {e}")
+        logger.error("Failed to get cache: %s", e, extra={"cache_key": key, "cache_field": field})
         return None
 
 # ------------------------------------------------------------
@@ -99,19 +155,15 @@ async def delete_cache(key: str) -> bool:
     """
     global redis_client
     if not redis_client:
-        print("⚠️ Redis client not initialized. Skipping cache delete.")
+        logger.warning("Redis client not initialized, skipping cache delete", extra={"cache_key": key})
         return False
 
     try:
         result = await redis_client.delete(key)
-        if result == 1:
-            print(f"🗑️ Deleted cache key '{key}'")
-            return True
-        else:
-            print(f"⚠️ Cache key '{key}' not found.")
-            return False
+        logger.debug("Cache key deleted" if result == 1 else "Cache key not found", extra={"cache_key": key})
+        return result == 1
     except Exception as e:
-        print(f"❌ Failed to delete cache for key '{key}': {e}")
+        logger.error("Failed to delete cache: %s", e, extra={"cache_key": key})
         return False
 
 # ------------------------------------------------------------
@@ -119,21 +171,26 @@ async def delete_cache(key: str) -> bool:
 # ------------------------------------------------------------
 async def invalidate_caches(keys: list[str]):
     """
-    Delete multiple cache keys using delete_cache().
+    Delete multiple cache keys in a single DEL round trip.
     Args:
         keys: List of Redis keys to delete.
     """
     if not keys:
-        print("⚠️ No cache keys provided to invalidate.")
+        logger.debug("No cache keys to invalidate")
+        return
+
+    global redis_client
+    if not redis_client:
+        logger.warning("Redis client not initialized, skipping cache invalidation", extra={"cache_keys": keys})
         return
 
-    deleted_count = 0
-    for key in keys:
-        success = await delete_cache(key)
-        if success:
-            deleted_count += 1
+    try:
+        deleted_count = await redis_client.delete(*keys)
+    except Exception as e:
+        logger.error("Failed to invalidate cache keys: %s", e, extra={"cache_keys": keys})
+        return
 
-    print(f"🧹 [Redis] Invalidated {deleted_count}/{len(keys)} cache keys.")
+    logger.debug("Invalidated %d/%d cache keys", deleted_count, len(keys), extra={"cache_keys": keys})
 
 def get_sync_redis():
     """
@@ -159,17 +216,90 @@ async def get_async_redis() -> aioredis.Redis:
         )
         try:
             await redis_client.ping()
-            print(f"🔄 [Redis] Auto-initialized async client at {redis_url}")
+            logger.info("Auto-initialized async Redis client", extra={"redis_url": redis_url})
         except Exception as e:
-            print(f"❌ [Redis] Failed to auto-initialize: {e}")
+            logger.error("Failed to auto-initialize Redis: %s", e, extra={"redis_url": redis_url})
     return redis_client
 
-def publish_sync(channel: str, event: dict):
+# ------------------------------------------------------------
+# 🔹 Ingestion event stream (Redis Streams)
+# ------------------------------------------------------------
+# Global stream read by every API worker's listener, capped at INGESTION_STREAM_MAXLEN
+INGESTION_STREAM = "ingestion:events"
+# Short per-document stream used to replay events to (re)connecting WebSocket clients
+DOC_STREAM = "ingestion:events:doc:{doc_id}"
+DOC_STREAM_MAXLEN = 20
+
+
+def append_event_sync(event_type: str, event: dict) -> str:
+    """
+    Durably append an ingestion event (sync, for Celery).
+    Written to the capped global stream, then to the document's own stream
+    under the same entry id, so one id identifies the event in both.
+    Returns that entry id.
+    """
+    client = get_sync_redis()
+    data = json.dumps({"type": event_type, **event})
+    try:
+        event_id = client.xadd(
+            INGESTION_STREAM, {"data": data},
+            maxlen=settings.INGESTION_STREAM_MAXLEN, approximate=True,
+        )
+
+        doc_stream = DOC_STREAM.format(doc_id=event["doc_id"])
+        pipe = client.pipeline(transaction=True)
+        pipe.xadd(doc_stream, {"data": data}, id=event_id, maxlen=DOC_STREAM_MAXLEN, approximate=True)
+        pipe.expire(doc_stream, settings.INGESTION_DOC_STREAM_TTL)
+        pipe.execute()
+        return event_id
+    finally:
+        client.close()
+
+
+async def read_document_events(doc_id: int, after_id: str | None = None) -> list[tuple[str, dict]]:
     """
-    Publish an event to a Redis channel using a sync connection.
-    Intended for Celery or any non-async context.
+    Events recorded for one document after `after_id` (exclusive), oldest first.
+    Returns (event_id, event) pairs.
     """
+    client = await get_async_redis()
+    start = f"({after_id}" if after_id else "-"
+    try:
+        entries = await client.xrange(DOC_STREAM.format(doc_id=doc_id), min=start, max="+")
+    except Exception as e:
+        logger.error("Failed to read document events: %s", e, extra={"doc_id": doc_id})
+        return []
+    return [(entry_id, json.loads(fields["data"])) for entry_id, fields in entries]
+
+
+# ------------------------------------------------------------
+# 🔹 Answer validation results (Redis Streams)
+# ------------------------------------------------------------
+# {"answer_id", "user_id", "valid", "reason", "flagged", "doc_ids", "stage_latencies", "created_at"}
+# per answer, written by the API (unvalidated / sync mode) and the Celery validator;
+# read by every API worker (WebSocket flags) and persisted as MonitorLog rows in batches
+MONITOR_STREAM = "monitor:results"
+
+
+def append_monitor_result_sync(result: dict) -> str:
+    """Append a validation result (sync, for Celery). Returns the entry id."""
     client = get_sync_redis()
-    import json
-    client.publish(channel, json.dumps(event))
-    client.close()
\ No newline at end of file
+    try:
+        return client.xadd(
+            MONITOR_STREAM, {"data": json.dumps(result)},
+            maxlen=settings.MONITOR_STREAM_MAXLEN, approximate=True,
+        )
+    finally:
+        client.close()
+
+
+async def append_monitor_result(result: dict) -> str | None:
+    """Append a validation result from the API; returns the entry id, or None if Redis failed."""
+    client = await get_async_redis()
+    try:
+        return await client.xadd(
+            MONITOR_STREAM, {"data": json.dumps(result)},
+            maxlen=settings.MONITOR_STREAM_MAXLEN, approximate=True,
+        )
+    except Exception as e:
+        logger.error("Failed to append monitor result: %s", e, extra={"answer_id": result.get("answer_id")})
+        return None
@@ -0,0 +1,99 @@
+# app/core/reranker.py
+"""
+Cross-encoder reranking for retrieval candidates.
+
+A cross-encoder reads the query and a chunk together, which ranks far
+better than vector or BM25 order, so fewer chunks (RERANK_TOP_K instead of
+CHAT_RETRIEVAL_K) are enough for generation. It is also much slower, so:
+  * at most RERANK_MAX_CANDIDATES chunks are scored, in one batched forward pass
+  * inputs are truncated to RERANK_MAX_LENGTH tokens
+  * scoring runs on a single dedicated thread (torch parallelizes each batch
+    itself); requests queue behind it
+  * if scores are not back within RERANK_TIMEOUT_MS (queueing included), the
+    caller keeps the fused order; a request still queued is cancelled, so
+    under overload reranking degrades instead of piling up
+
+The model (sentence-transformers CrossEncoder, RERANK_MODEL) is loaded on
+first use; `warm_up()` loads it ahead of the first query.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        return self._pool
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(
+                    settings.RERANK_MODEL, max_length=settings.RERANK_MAX_LENGTH, device="cpu"
+                )
+                logger.info("Loaded cross-encoder", extra={"model": settings.RERANK_MODEL})
+        return self._model
+
+    def _score(self, query: str, texts: list[str]) -> list[float]:
+        scores = self._get_model().predict(
+            [(query, text) for text in texts], batch_size=len(texts), show_progress_bar=False
+        )
+        return [float(score) for score in scores]
+
+    # ------------------------------------------------------------
+    # 🔹 Public API
+    # ------------------------------------------------------------
+    async def rerank(self, query: str, chunks: list[dict]) -> Optional[list[dict]]:
+        """
+        The first RERANK_MAX_CANDIDATES chunks sorted by cross-encoder score
+        (best first, "rerank_score" added), or None if scoring failed or
+        exceeded RERANK_TIMEOUT_MS.
+        """
+        candidates = chunks[:settings.RERANK_MAX_CANDIDATES]
+        if not candidates:
+            return []
+
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor(), self._score, query, [chunk["text"] for chunk in candidates]
+        )
+        try:
+            scores = await asyncio.wait_for(future, settings.RERANK_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            logger.warning("No scores within the deadline, keeping fused order", extra={"timeout_ms": settings.RERANK_TIMEOUT_MS})
+            return None
+        except Exception as e:
+            logger.warning("Scoring failed, keeping fused order: %s", e)
+            return None
+
+        reranked = [{**chunk, "rerank_score": score} for chunk, score in zip(candidates, scores)]
+        reranked.sort(key=lambda chunk: chunk["rerank_score"], reverse=True)
+        return reranked
+
+    async def warm_up(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor(), self._get_model)
+        except Exception as e:
+            logger.warning("Failed to load cross-encoder: %s", e, extra={"model": settings.RERANK_MODEL})
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+reranker = CrossEncoderReranker()
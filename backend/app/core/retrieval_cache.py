@@ -0,0 +1,135 @@
+# app/core/retrieval_cache.py
+"""
+Versioned cache for the retrieval step of the chat pipeline.
+
+Results are keyed by (normalized query, department scope, corpus generation):
+    retrieval:generation             hash department id → generation, plus "all" (admins)
+    retrieval:result:<digest>        JSON list of retrieved chunks, expires after RETRIEVAL_CACHE_TTL_SECONDS
+    retrieval:embedding:<digest>     base64 float32 query embedding, expires after RETRIEVAL_EMBEDDING_TTL_SECONDS
+
+Ingestion, deletion and access changes bump the generation of the affected
+departments (and "all"), which moves their lookups to new keys: stale
+entries are never enumerated or deleted, they just expire. The generation is
+read before searching, so a result computed while the corpus changed is
+stored under the old generation and never served.
+
+Embeddings depend only on the query text and the model, not on the corpus,
+so they are memoized separately and survive generation bumps.
+"""
+import array
+import base64
+import hashlib
+import json
+import logging
+from typing import Iterable, Optional
+
+from app.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "retrieval:generation"
+RESULT_KEY = "retrieval:result:{digest}"
+EMBEDDING_KEY = "retrieval:embedding:{digest}"
+ALL_SCOPE = "all"
+
+# Part of the embedding key: a model change must not reuse old vectors
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form (the embedding model and BM25 are both uncased)."""
+    return " ".join(query.lower().split())
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _scope_fields(user: dict) -> list[str]:
+    """Generation fields a user's results depend on (sorted department set, or everything)."""
+    if user.get("role") == "admin":
+        return [ALL_SCOPE]
+    return [str(user.get("department_id"))]
+
+
+class RetrievalCache:
+    # ------------------------------------------------------------
+    # 🔹 Query embeddings
+    # ------------------------------------------------------------
+    async def get_embedding(self, query: str) -> Optional[list[float]]:
+        try:
+            client = await get_async_redis()
+            data = await client.get(EMBEDDING_KEY.format(digest=_digest(EMBEDDING_MODEL, query)))
+        except Exception as e:
+            logger.warning("Embedding lookup failed, treating as miss: %s", e)
+            return None
+        if data is None:
+            return None
+        return array.array("f", base64.b64decode(data)).tolist()
+
+    async def store_embedding(self, query: str, embedding: list[float]):
+        encoded = base64.b64encode(array.array("f", embedding).tobytes()).decode()
+        try:
+            client = await get_async_redis()
+            await client.set(
+                EMBEDDING_KEY.format(digest=_digest(EMBEDDING_MODEL, query)),
+                encoded,
+                ex=settings.RETRIEVAL_EMBEDDING_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.warning("Failed to store embedding: %s", e)
+
+    # ------------------------------------------------------------
+    # 🔹 Retrieval results
+    # ------------------------------------------------------------
+    async def result_key(self, user: dict, query: str, k: int) -> Optional[str]:
+        """Cache key for the user's current corpus generation, or None if Redis is unavailable."""
+        fields = _scope_fields(user)
+        try:
+            client = await get_async_redis()
+            generations = await client.hmget(GENERATION_KEY, fields)
+        except Exception as e:
+            logger.warning("Generation lookup failed, bypassing cache: %s", e)
+            return None
+        scope = ",".join(f"{field}@{generation or 0}" for field, generation in zip(fields, generations))
+        digest = _digest(query, scope, k, settings.RETRIEVAL_HYBRID, settings.RERANK_ENABLED)
+        return RESULT_KEY.format(digest=digest)
+
+    async def get_results(self, key: str) -> Optional[list[dict]]:
+        try:
+            client = await get_async_redis()
+            data = await client.get(key)
+        except Exception as e:
+            logger.warning("Result lookup failed, treating as miss: %s", e)
+            return None
+        return None if data is None else json.loads(data)
+
+    async def store_results(self, key: str, chunks: list[dict]):
+        try:
+            client = await get_async_redis()
+            await client.set(key, json.dumps(chunks), ex=settings.RETRIEVAL_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Failed to store results: %s", e)
+
+    # ------------------------------------------------------------
+    # 🔹 Invalidation
+    # ------------------------------------------------------------
+    async def bump_generations(self, department_ids: Iterable[int]):
+        """
+        Mark the corpus seen by these departments (and by admins) as changed.
+        Call after the change is visible to searches (committed / indexed).
+        """
+        fields = sorted({str(dep_id) for dep_id in department_ids}) + [ALL_SCOPE]
+        try:
+            client = await get_async_redis()
+            async with client.pipeline(transaction=True) as pipe:
+                for field in fields:
+                    pipe.hincrby(GENERATION_KEY, field, 1)
+                await pipe.execute()
+        except Exception as e:
+            # Entries then live until RETRIEVAL_CACHE_TTL_SECONDS at most
+            logger.error("Failed to bump generations: %s", e, extra={"department_ids": fields[:-1]})
+
+
+retrieval_cache = RetrievalCache()
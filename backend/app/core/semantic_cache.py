@@ -0,0 +1,205 @@
+# app/core/semantic_cache.py
+"""
+Semantic answer cache for the chat pipeline.
+
+Query embeddings live in their own Chroma collection (`semantic_cache`,
+HNSW / cosine), tagged with a scope: the set of departments whose documents
+the answer may draw on. A lookup only searches entries of the caller's
+scope, so an answer is never served to someone who could not see its sources.
+
+The answers themselves live in Redis:
+    semcache:entry:<id>      JSON {query, answer, doc_ids, scope}, expires after SEMANTIC_CACHE_TTL_SECONDS
+    semcache:lru:<scope>     sorted set id → last hit time, capped at SEMANTIC_CACHE_MAX_ENTRIES
+    semcache:doc:<doc_id>    set of entry ids whose answer cites the document
+
+Deleting the Redis entry is what invalidates an answer; the vector is
+removed in the same call, or lazily the next time a search lands on it.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Iterable, Optional
+
+from app.config import settings
+from app.core.logging_config import sampled
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "semantic_cache"
+ENTRY_KEY = "semcache:entry:{entry_id}"
+LRU_KEY = "semcache:lru:{scope}"
+DOC_KEY = "semcache:doc:{doc_id}"
+
+# Candidates fetched per search; a few may have expired since they were indexed
+SEARCH_CANDIDATES = 3
+
+
+def cache_scope(user: dict) -> str:
+    """Scope of the answers a user may receive: everything for admins, else their department set."""
+    if user.get("role") == "admin":
+        return "all"
+    return f"deps:{user.get('department_id')}"
+
+
+class SemanticCacheManager:
+    def __init__(self):
+        self._collection = None
+
+    def _get_collection(self):
+        if self._collection is None:
+            from app.core.chroma_client import get_chroma_client
+
+            self._collection = get_chroma_client().get_or_create_collection(
+                COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+            )
+        return self._collection
+
+    # ------------------------------------------------------------
+    # 🔹 Lookup
+    # ------------------------------------------------------------
+    async def search_similar(self, embedding: list[float], scope: str,
+                             threshold: Optional[float] = None) -> Optional[dict]:
+        """
+        Closest cached answer in `scope` with cosine similarity >= threshold
+        (default SEMANTIC_CACHE_THRESHOLD), or None.
+        Returns {"entry_id", "query", "answer", "doc_ids", "similarity"}.
+        """
+        threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        try:
+            result = await asyncio.to_thread(
+                self._get_collection().query,
+                query_embeddings=[embedding],
+                n_results=SEARCH_CANDIDATES,
+                where={"scope": scope},
+                include=["distances"],
+            )
+        except Exception as e:
+            logger.warning("Search failed, treating as miss: %s", e)
+            return None
+
+        candidates = [
+            (entry_id, 1.0 - distance)
+            for entry_id, distance in zip(result["ids"][0], result["distances"][0])
+            if 1.0 - distance >= threshold
+        ]
+        if not candidates:
+            return None
+
+        client = await get_async_redis()
+        stale = []
+        for entry_id, similarity in candidates:
+            data = await client.get(ENTRY_KEY.format(entry_id=entry_id))
+            if data is None:
+                stale.append(entry_id)
+                continue
+
+            await client.zadd(LRU_KEY.format(scope=scope), {entry_id: time.time()})
+            if stale:
+                await self._delete_vectors(stale)
+            if sampled(logger):
+                logger.debug("Cache hit", extra={"scope": scope, "similarity": round(similarity, 3)})
+            return {"entry_id": entry_id, "similarity": similarity, **json.loads(data)}
+
+        # Expired or invalidated: drop the orphaned vectors
+        await self._delete_vectors(stale)
+        return None
+
+    # ------------------------------------------------------------
+    # 🔹 Store
+    # ------------------------------------------------------------
+    async def store(self, embedding: list[float], query: str, answer: str,
+                    doc_ids: Iterable[int], scope: str) -> Optional[str]:
+        """Cache an answer for a query embedding; returns the entry id."""
+        doc_ids = sorted(set(doc_ids))
+        entry_id = uuid.uuid4().hex
+        ttl = settings.SEMANTIC_CACHE_TTL_SECONDS
+        now = time.time()
+
+        try:
+            await asyncio.to_thread(
+                self._get_collection().add,
+                ids=[entry_id],
+                embeddings=[embedding],
+                metadatas=[{"scope": scope, "created_at": now}],
+            )
+
+            client = await get_async_redis()
+            lru_key = LRU_KEY.format(scope=scope)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(
+                    ENTRY_KEY.format(entry_id=entry_id),
+                    json.dumps({"query": query, "answer": answer, "doc_ids": doc_ids, "scope": scope}),
+                    ex=ttl,
+                )
+                pipe.zadd(lru_key, {entry_id: now})
+                pipe.expire(lru_key, ttl)
+                for doc_id in doc_ids:
+                    pipe.sadd(DOC_KEY.format(doc_id=doc_id), entry_id)
+                    pipe.expire(DOC_KEY.format(doc_id=doc_id), ttl)
+                await pipe.execute()
+
+            await self._evict(client, scope, now)
+        except Exception as e:
+            logger.warning("Failed to store answer: %s", e)
+            return None
+
+        return entry_id
+
+    async def _evict(self, client, scope: str, now: float):
+        """Drop entries idle for longer than the TTL, then the least recently used beyond the cap."""
+        lru_key = LRU_KEY.format(scope=scope)
+        expired = await client.zrangebyscore(lru_key, "-inf", now - settings.SEMANTIC_CACHE_TTL_SECONDS)
+        overflow = await client.zcard(lru_key) - len(expired) - settings.SEMANTIC_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            expired += await client.zrange(lru_key, len(expired), len(expired) + overflow - 1)
+        if expired:
+            await self._delete_entries(client, expired, scopes={scope})
+
+    # ------------------------------------------------------------
+    # 🔹 Invalidation
+    # ------------------------------------------------------------
+    async def invalidate_documents(self, doc_ids: Iterable[int]) -> int:
+        """
+        Drop every cached answer citing one of these documents (re-ingested,
+        deleted or access changed). Returns the number of entries removed.
+        """
+        doc_keys = [DOC_KEY.format(doc_id=doc_id) for doc_id in set(doc_ids)]
+        if not doc_keys:
+            return 0
+
+        try:
+            client = await get_async_redis()
+            entry_ids = list(await client.sunion(doc_keys))
+            if entry_ids:
+                entries = await client.mget([ENTRY_KEY.format(entry_id=entry_id) for entry_id in entry_ids])
+                scopes = {json.loads(entry)["scope"] for entry in entries if entry}
+                await self._delete_entries(client, entry_ids, scopes)
+            await client.delete(*doc_keys)
+        except Exception as e:
+            logger.error("Failed to invalidate answers: %s", e, extra={"doc_ids": sorted(set(doc_ids))})
+            return 0
+
+        if entry_ids:
+            logger.info("Invalidated %d cached answer(s)", len(entry_ids), extra={"doc_ids": sorted(set(doc_ids))})
+        return len(entry_ids)
+
+    async def _delete_entries(self, client, entry_ids: list[str], scopes: Iterable[str]):
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(*[ENTRY_KEY.format(entry_id=entry_id) for entry_id in entry_ids])
+            for scope in scopes:
+                pipe.zrem(LRU_KEY.format(scope=scope), *entry_ids)
+            await pipe.execute()
+        await self._delete_vectors(entry_ids)
+
+    async def _delete_vectors(self, entry_ids: list[str]):
+        try:
+            await asyncio.to_thread(self._get_collection().delete, ids=entry_ids)
+        except Exception as e:
+            # Orphaned vectors are harmless: a search landing on them finds no entry
+            logger.warning("Failed to delete vectors: %s", e)
+
+
+semantic_cache = SemanticCacheManager()
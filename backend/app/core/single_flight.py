@@ -0,0 +1,246 @@
+# app/core/single_flight.py
+"""
+Cross-worker single-flight for streamed results.
+
+Concurrent callers with the same key share one execution: the first one to
+take the Redis lock becomes the leader and runs the producer in a detached
+task, which appends every event to a Redis stream; everyone (the leader
+included) reads the events from that stream, so followers on any worker
+receive the same stream, replayed from the start if they join late.
+
+    chat:flight:lock:<digest>         flight id of the running execution (SET NX, expires)
+    chat:flight:<flight_id>           stream of {"data": json event}, ends with an _end / _abort marker
+    chat:flight:<flight_id>:listeners number of callers still reading
+
+Inside a worker one reader task per flight does the XREAD and fans events
+out to local callers, so a spike costs one blocked Redis connection per
+flight and worker, not one per caller. The producer stops once nobody is
+listening any more; it otherwise outlives the leader's own client.
+
+If Redis is unavailable, or a flight stalls or aborts before its first
+token (its worker died), the caller runs the producer itself; after part of
+the answer was streamed it raises FlightInterrupted instead.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, Callable
+
+from app.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "chat:flight:lock:{digest}"
+STREAM_KEY = "chat:flight:{flight_id}"
+LISTENERS_KEY = "chat:flight:{flight_id}:listeners"
+
+END = "_end"
+ABORT = "_abort"
+STALLED = "_stalled"
+READ_BATCH = 100
+# Followers wait this much longer than the producer's own deadlines, which
+# publish a fallback token when they fire: silence beyond it means the producer died
+STALL_GRACE_MS = 1000
+
+
+class FlightInterrupted(Exception):
+    """The shared execution stopped after part of its answer had been streamed."""
+
+
+class _LocalFlight:
+    """Events of one flight seen by this worker, and the local callers reading them."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+        self.queues: set[asyncio.Queue] = set()
+        self.reader: asyncio.Task | None = None
+
+    def publish(self, event: dict):
+        self.events.append(event)
+        for queue in self.queues:
+            queue.put_nowait(event)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._local: dict[str, _LocalFlight] = {}
+        # Detached producer tasks (strong references until they finish)
+        self._producers: set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------
+    # 🔹 Public API
+    # ------------------------------------------------------------
+    async def run(self, key: str, produce: Callable[[], AsyncIterator[dict]],
+                  on_join: Callable[[], object] | None = None) -> AsyncIterator[dict]:
+        """
+        Events of the in-flight execution for `key`, or of a new one started
+        with `produce()`. Events are JSON-serializable dicts. `on_join` is
+        called when an existing execution is joined (e.g. to drop work done
+        speculatively for a producer that won't run).
+        """
+        lock_key = LOCK_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+        try:
+            client = await get_async_redis()
+            flight_id = uuid.uuid4().hex
+            leader = await client.set(lock_key, flight_id, nx=True, ex=settings.CHAT_COALESCE_LOCK_SECONDS)
+            if not leader:
+                flight_id = await client.get(lock_key)
+            # Register before the producer starts, so it never sees zero listeners
+            if flight_id:
+                await self._count_listener(client, flight_id, 1)
+        except Exception as e:
+            logger.warning("Redis unavailable, running alone: %s", e)
+            flight_id = None
+
+        if not flight_id:
+            # Redis down, or the flight finished between SET NX and GET
+            async with aclosing(produce()) as events:
+                async for event in events:
+                    yield event
+            return
+
+        if leader:
+            task = asyncio.create_task(self._publish(client, lock_key, flight_id, produce()))
+            self._producers.add(task)
+            task.add_done_callback(self._producers.discard)
+        else:
+            logger.debug("Joined in-flight execution", extra={"flight_id": flight_id})
+            if on_join is not None:
+                on_join()
+
+        tokens_received = False
+        try:
+            async with aclosing(self._consume(client, flight_id)) as flight_events:
+                async for event in flight_events:
+                    if event["type"] == END:
+                        return
+                    if event["type"] in (ABORT, STALLED):
+                        if tokens_received:
+                            raise FlightInterrupted(f"flight {event['type'][1:]} mid-answer")
+                        # Nothing of the answer streamed yet: a fresh sources event replaces the flight's
+                        logger.warning("Flight %s, running alone", event["type"][1:], extra={"flight_id": flight_id})
+                        async with aclosing(produce()) as events:
+                            async for own_event in events:
+                                yield own_event
+                        return
+                    tokens_received = tokens_received or event["type"] == "token"
+                    yield event
+        finally:
+            try:
+                await self._count_listener(client, flight_id, -1)
+            except Exception as e:
+                logger.warning("Failed to unregister from flight: %s", e, extra={"flight_id": flight_id})
+
+    @staticmethod
+    async def _count_listener(client, flight_id: str, delta: int):
+        """
+        INCRBY with its expiry in one MULTI: the counter may be created here (first
+        listener, or a late DECR after it expired) and must never outlive the flight.
+        """
+        listeners_key = LISTENERS_KEY.format(flight_id=flight_id)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.incrby(listeners_key, delta)
+            pipe.expire(listeners_key, settings.CHAT_COALESCE_LOCK_SECONDS + settings.CHAT_COALESCE_STREAM_TTL_SECONDS)
+            await pipe.execute()
+
+    # ------------------------------------------------------------
+    # 🔹 Leader: run the producer, append its events to the stream
+    # ------------------------------------------------------------
+    async def _publish(self, client, lock_key: str, flight_id: str, events: AsyncIterator[dict]):
+        stream_key = STREAM_KEY.format(flight_id=flight_id)
+        listeners_key = LISTENERS_KEY.format(flight_id=flight_id)
+        ttl = settings.CHAT_COALESCE_STREAM_TTL_SECONDS
+        # END only once the producer finished: a cancelled one (worker shutdown) aborts
+        marker = ABORT
+        try:
+            async with aclosing(events) as events:
+                async for event in events:
+                    async with client.pipeline(transaction=False) as pipe:
+                        pipe.xadd(stream_key, {"data": json.dumps(event)})
+                        pipe.expire(stream_key, ttl)
+                        pipe.get(listeners_key)
+                        *_, listeners = await pipe.execute()
+                    if int(listeners or 0) <= 0:
+                        logger.debug("Nobody listening to flight, stopping it", extra={"flight_id": flight_id})
+                        break
+                else:
+                    marker = END
+        except Exception as e:
+            logger.error("Flight failed: %s", e, extra={"flight_id": flight_id})
+        finally:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.xadd(stream_key, {"data": json.dumps({"type": marker})})
+                    pipe.expire(stream_key, ttl)
+                    pipe.expire(listeners_key, ttl)
+                    await pipe.execute()
+                # Let the next identical question start a new flight (not atomic: the
+                # lock can only have changed hands if it expired mid-flight)
+                if await client.get(lock_key) == flight_id:
+                    await client.delete(lock_key)
+            except Exception as e:
+                logger.warning("Failed to close flight: %s", e, extra={"flight_id": flight_id})
+
+    # ------------------------------------------------------------
+    # 🔹 Followers (and the leader): read the stream through the local fan-out
+    # ------------------------------------------------------------
+    async def _consume(self, client, flight_id: str) -> AsyncIterator[dict]:
+        flight = self._local.get(flight_id)
+        if flight is None:
+            flight = self._local[flight_id] = _LocalFlight()
+            flight.reader = asyncio.create_task(self._read(client, flight_id, flight))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in flight.events:
+            queue.put_nowait(event)
+        flight.queues.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in (END, ABORT, STALLED):
+                    return
+        finally:
+            flight.queues.discard(queue)
+            if not flight.queues:
+                flight.reader.cancel()
+                self._local.pop(flight_id, None)
+
+    async def _read(self, client, flight_id: str, flight: _LocalFlight):
+        stream_key = STREAM_KEY.format(flight_id=flight_id)
+        last_id = "0-0"
+        has_token = False
+        try:
+            while True:
+                # The producer's deadlines for the same stage (its first-token deadline
+                # includes waiting in the LLM scheduler, e.g. for the department's limit)
+                if has_token:
+                    timeout_ms = settings.CHAT_TOKEN_TIMEOUT_MS
+                elif flight.events:
+                    timeout_ms = settings.CHAT_FIRST_TOKEN_TIMEOUT_MS
+                else:
+                    timeout_ms = settings.CHAT_RETRIEVAL_TIMEOUT_MS + settings.CHAT_FIRST_TOKEN_TIMEOUT_MS
+                timeout_ms += STALL_GRACE_MS
+                response = await client.xread({stream_key: last_id}, count=READ_BATCH, block=timeout_ms)
+                if not response:
+                    flight.publish({"type": STALLED})
+                    return
+                for event_id, fields in response[0][1]:
+                    last_id = event_id
+                    event = json.loads(fields["data"])
+                    has_token = has_token or event["type"] == "token"
+                    flight.publish(event)
+                    if event["type"] in (END, ABORT):
+                        return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Reading flight failed: %s", e, extra={"flight_id": flight_id})
+            flight.publish({"type": STALLED})
+
+
+single_flight = SingleFlight()
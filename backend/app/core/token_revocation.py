@@ -0,0 +1,61 @@
+# app/core/token_revocation.py
+"""
+Revoked access tokens, shared through Redis.
+
+Revoked token ids (the `jti` claim) live in one sorted set scored by the
+token's expiry, so entries are trimmed as soon as the token would have
+expired anyway and the set only ever holds live revocations.
+Every process keeps an in-memory copy refreshed at most every
+AUTH_REVOCATION_REFRESH_SECONDS: a revocation is immediate in the process
+that made it and reaches the other workers within that interval, while a
+regular request pays no Redis round trip.
+"""
+import logging
+import time
+
+from app.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "auth:revoked"
+
+
+class RevocationList:
+    def __init__(self):
+        self._revoked: set[str] = set()
+        self._refreshed_at = 0.0
+        self._refreshing = False
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if time.monotonic() - self._refreshed_at >= settings.AUTH_REVOCATION_REFRESH_SECONDS:
+            await self.refresh()
+        return jti in self._revoked
+
+    async def refresh(self):
+        # One refresh at a time; concurrent requests use the current copy
+        if self._refreshing:
+            return
+        self._refreshing = True
+        try:
+            client = await get_async_redis()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+                pipe.zrange(REVOKED_KEY, 0, -1)
+                _, members = await pipe.execute()
+            self._revoked = set(members)
+        except Exception as e:
+            # Keep the last known list rather than rejecting every request
+            logger.warning("Failed to refresh revoked tokens, using cached list: %s", e)
+        finally:
+            self._refreshed_at = time.monotonic()
+            self._refreshing = False
+
+    async def revoke(self, jti: str, expires_at: float):
+        """Revoke a token until its expiry."""
+        self._revoked.add(jti)
+        client = await get_async_redis()
+        await client.zadd(REVOKED_KEY, {jti: expires_at})
+
+
+revocation_list = RevocationList()
@@ -1,28 +1,42 @@
 # app/core/unit_of_work.py
 from contextlib import AbstractContextManager
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, ReadSessionLocal
 from app.repositories.document_repository import DocumentRepository
 from app.repositories.department_repository import DepartmentRepository
 from app.repositories.user_repository import UserRepository
+from app.repositories.chat_history_repository import ChatHistoryRepository
+from app.repositories.chat_history_archive_repository import ChatHistoryArchiveRepository
+from app.repositories.monitor_log_repository import MonitorLogRepository
 
 class UnitOfWork(AbstractContextManager):
-    def __init__(self):
+    def __init__(self, read_only: bool = False, use_replica: bool = True):
+        """
+        read_only=True routes the session to a read replica (when configured)
+        and never commits; use it for listing/lookup paths only.
+        use_replica=False keeps a read-only session on the primary, for reads
+        whose result is cached (a lagging replica would re-cache stale rows).
+        """
+        self.read_only = read_only
+        self.use_replica = use_replica
         self.session = None
         self.documents = None
         self.departments = None
 
     def __enter__(self):
-        self.session = SessionLocal()
+        self.session = ReadSessionLocal() if self.read_only and self.use_replica else SessionLocal()
 
         # Attach repositories
         self.documents = DocumentRepository(self.session)
         self.departments = DepartmentRepository(self.session)
         self.users = UserRepository(self.session)
+        self.chat_history = ChatHistoryRepository(self.session)
+        self.chat_history_archive = ChatHistoryArchiveRepository(self.session)
+        self.monitor_logs = MonitorLogRepository(self.session)
 
         return self
     
     def __exit__(self, exc_type, exc_value, traceback):
-        if exc_type is None:
+        if exc_type is None and not self.read_only:
             self.session.commit()
         else:
             self.session.rollback()
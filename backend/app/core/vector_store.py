@@ -25,3 +25,16 @@ def get_vector_store(collection_name: str = "documents"):
         collection_name=collection_name,
         embedding_function=embeddings,
     )
+
+
+def delete_document_vectors(doc_id: int, collection_name: str = "documents"):
+    """
+    Remove every chunk of a document (blocking: call via a thread).
+    Through the Chroma collection: the LangChain wrapper's delete() only takes ids.
+    """
+    get_chroma_client().get_or_create_collection(collection_name).delete(where={"doc_id": doc_id})
+
+
+def embed_query(text: str) -> list[float]:
+    """Embed a query with the same model as the stored chunks (CPU-bound: call via a thread)."""
+    return embeddings.embed_query(text)
@@ -1,55 +1,210 @@
 # app/core/websocket_manager.py
+import asyncio
+import json
+import logging
+from collections import deque
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Dict, Iterable, Set
+
+from app.config import settings
+from app.core.logging_config import sampled
+from app.core.metrics import WS_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Senders that must not drop messages wait for the send queue to drain to this (wait_for_room)
+LOW_WATER = settings.WS_SEND_QUEUE_SIZE // 2
+
+
+def doc_channel(doc_id: int) -> str:
+    return f"doc:{doc_id}"
+
+
+def department_channel(department_id: int) -> str:
+    return f"dept:{department_id}"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class Connection:
+    """
+    One client socket with a bounded outgoing queue.
+    Idle connections hold only the (empty) deque: the sender task exists
+    only while there is something to send, so ~20k idle sockets stay cheap.
+    """
+    __slots__ = ("websocket", "channels", "queue", "sender", "closed", "streams", "has_room")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.channels: Set[str] = set()
+        self.queue: deque = deque()
+        self.sender: asyncio.Task | None = None
+        self.closed = False
+        # request id → task streaming a chat answer to this socket
+        self.streams: Dict[str, asyncio.Task] = {}
+        # set by the sender when the queue falls below LOW_WATER (created by the first waiter)
+        self.has_room: asyncio.Event | None = None
+
 
 class WebSocketManager:
     def __init__(self):
-        # key = document ID, value = WebSocket connection
-        self.active_connections: Dict[int, WebSocket] = {}
-        # store pending messages for documents whose clients haven’t connected yet
-        self.pending_messages: Dict[int, List[dict]] = {}
+        # key = channel ("doc:<id>", "dept:<id>", "user:<id>"), value = subscribed connections
+        self.subscriptions: Dict[str, Set[Connection]] = {}
+        self.active_count = 0
+        # strong references to fire-and-forget close tasks
+        self._background: Set[asyncio.Task] = set()
 
-    async def connect(self, doc_id: int, websocket: WebSocket):
-        """
-        Accept a new websocket connection for a document.
-        If there are any pending messages for this document, send them immediately.
-        """
+    # ------------------------------------------------------------
+    # 🔹 Connection lifecycle
+    # ------------------------------------------------------------
+    async def connect(self, websocket: WebSocket, channels: Iterable[str] = ()) -> Connection:
+        """Accept a new websocket connection and subscribe it to `channels`."""
         await websocket.accept()
-        self.active_connections[doc_id] = websocket
-        print(f"🔌 [WebSocket] Client connected for document {doc_id}")
+        connection = Connection(websocket)
+        self.active_count += 1
+        WS_CONNECTIONS.inc()
+        for channel in channels:
+            self.subscribe(connection, channel)
+        logger.debug("Client connected", extra={"channels": sorted(connection.channels)})
+        return connection
+
+    def subscribe(self, connection: Connection, channel: str):
+        """Add a channel to a connection."""
+        self.subscriptions.setdefault(channel, set()).add(connection)
+        connection.channels.add(channel)
 
-        # flush pending messages (if ingestion finished before client connected)
-        if doc_id in self.pending_messages:
-            for msg in self.pending_messages[doc_id]:
-                await websocket.send_json(msg)
-                print(f"📤 [WebSocket] Flushed buffered message for doc {doc_id}: {msg}")
-            self.pending_messages.pop(doc_id, None)
+    def send_to(self, connection: Connection, payload: dict):
+        """Queue a message for a single connection (e.g. replayed events)."""
+        self._enqueue(connection, json.dumps(payload))
 
-    async def disconnect(self, doc_id: int):
+    def unsubscribe(self, connection: Connection, channel: str):
+        subscribers = self.subscriptions.get(channel)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.subscriptions[channel]
+        connection.channels.discard(channel)
+
+    async def disconnect(self, connection: Connection):
+        """Remove a websocket connection from every channel."""
+        if connection.closed:
+            return
+        connection.closed = True
+        self.active_count -= 1
+        WS_CONNECTIONS.dec()
+        for channel in list(connection.channels):
+            self.unsubscribe(connection, channel)
+        connection.queue.clear()
+        if connection.has_room is not None:
+            connection.has_room.set()
+        for task in connection.streams.values():
+            task.cancel()
+        if connection.sender and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+        logger.debug("Client disconnected")
+
+    # ------------------------------------------------------------
+    # 🔹 Fan-out (never awaits a client)
+    # ------------------------------------------------------------
+    def publish(self, channel: str, payload: dict) -> int:
         """
-        Remove a websocket connection for a document.
+        Queue `payload` for every subscriber of `channel` and return how many
+        connections it was queued for. Serialized once, sent by per-connection senders.
         """
-        ws = self.active_connections.pop(doc_id, None)
-        if ws:
-            print(f"🔌 [WebSocket] Client disconnected for document {doc_id}")
+        subscribers = self.subscriptions.get(channel)
+        if not subscribers:
+            return 0
 
-    async def send_status(self, doc_id: int, status: str, message: str = ""):
+        text = json.dumps(payload)
+        for connection in list(subscribers):
+            self._enqueue(connection, text)
+        return len(subscribers)
+
+    async def wait_for_room(self, connection: Connection):
         """
-        Send a status update to the websocket client for this document.
-        If no active connection exists yet, buffer the message to send later.
+        Wait until fewer than LOW_WATER messages are queued (or the client is gone).
+        For messages that must not be dropped (answer tokens): status updates
+        may be, chat streams pace themselves with this instead.
         """
-        ws = self.active_connections.get(doc_id)
-        payload = {"doc_id": doc_id, "status": status, "message": message}
+        while len(connection.queue) >= LOW_WATER and not connection.closed:
+            if connection.has_room is None:
+                connection.has_room = asyncio.Event()
+            connection.has_room.clear()
+            await connection.has_room.wait()
+
+    def _enqueue(self, connection: Connection, text: str):
+        if connection.closed:
+            return
 
-        if ws:
+        if len(connection.queue) >= settings.WS_SEND_QUEUE_SIZE:
+            if settings.WS_SLOW_CONSUMER_POLICY == "close":
+                logger.warning("Send queue full, closing slow client", extra={"channels": sorted(connection.channels)})
+                self._close_slow(connection)
+                return
+            # drop_oldest: status updates supersede each other
+            connection.queue.popleft()
+
+        connection.queue.append(text)
+        if connection.sender is None:
+            connection.sender = asyncio.create_task(self._drain(connection))
+
+    async def _drain(self, connection: Connection):
+        """Send queued messages until the queue is empty, then exit."""
+        try:
+            while connection.queue and not connection.closed:
+                text = connection.queue.popleft()
+                if connection.has_room is not None and len(connection.queue) < LOW_WATER:
+                    connection.has_room.set()
+                await asyncio.wait_for(
+                    connection.websocket.send_text(text),
+                    timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Failed to send message, dropping client: %s", e)
+            await self.disconnect(connection)
+        finally:
+            connection.sender = None
+
+    def _close_slow(self, connection: Connection):
+        async def close():
+            await self.disconnect(connection)
             try:
-                await ws.send_json(payload)
-                print(f"📡 [WebSocket] Sent status update for doc {doc_id}: {status}")
-            except Exception as e:
-                print(f"⚠️ [WebSocket] Failed to send message for doc {doc_id}: {e}")
-        else:
-            # Buffer for later if client isn’t connected yet
-            self.pending_messages.setdefault(doc_id, []).append(payload)
-            print(f"🕒 [WebSocket] Buffered message for doc {doc_id}: {status}")
+                await connection.websocket.close(code=1013)  # Try Again Later
+            except Exception:
+                pass
+
+        task = asyncio.create_task(close())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    # ------------------------------------------------------------
+    # 🔹 Ingestion status
+    # ------------------------------------------------------------
+    async def send_status(self, doc_id: int, status: str, message: str = "",
+                          department_ids: Iterable[int] = (), event_id: str | None = None):
+        """
+        Send a status update to every client watching this document and to the
+        given department channels. Clients that connect later replay it from
+        the ingestion stream, so nothing is buffered here.
+        """
+        payload = status_payload(doc_id, status, message, event_id)
+
+        delivered = self.publish(doc_channel(doc_id), payload)
+        for department_id in department_ids:
+            self.publish(department_channel(department_id), payload)
+
+        if sampled(logger):
+            logger.debug(
+                "Queued status update", extra={"doc_id": doc_id, "status": status, "clients": delivered},
+            )
+
+
+def status_payload(doc_id: int, status: str, message: str = "", event_id: str | None = None) -> dict:
+    """`event_id` lets clients resume with ?last_event_id= after a reconnect."""
+    return {"type": "status", "doc_id": doc_id, "status": status, "message": message, "event_id": event_id}
 
 manager = WebSocketManager()
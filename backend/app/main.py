@@ -3,20 +3,32 @@
 from fastapi import FastAPI,Depends
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
+import logging
 
 from .routers.admin import router as admin_router
 from fastapi.openapi.utils import get_openapi
-from app.utils.auth import require_admin
+from app.utils.auth import require_admin, require_scrape_token
 
 #Local imports
 from .config import settings
+from .core.logging_config import configure_logging
 from .core.database import init_db, close_db
 from .core.redis_client import init_redis, close_redis
+from .core.access_index import access_index
+from .core.reranker import reranker
+from .core.history_writer import chat_history_writer
+from .core.llm import close_llm_provider
+from .core.metrics import RequestMetricsMiddleware, mark_process_dead
+from .utils.hashing import hashing_executor
 from  .utils.auth import require_user
 
 #Import routers (they’ll be added later)
 from .routers import auth, chat, docs, monitor,ws
 
+# Every log record goes through a queue to a writer thread, never straight to stdout
+configure_logging()
+logger = logging.getLogger(__name__)
+
 
 # -------------------------------------------------------------
 # ✅ Initialize FastAPI App
@@ -44,6 +56,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route (app/core/metrics.py, exposed at /monitor/metrics)
+app.add_middleware(RequestMetricsMiddleware)
+
 
 # -------------------------------------------------------------
 # 🚀 Startup / Shutdown Events
@@ -51,7 +66,10 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     """Initialize connections & start event listener on app startup."""
-    from app.core.event_listener import listen_for_ingestion_events
+    from app.core.event_listener import (
+        listen_for_ingestion_events, persist_ingestion_statuses,
+        listen_for_validation_results, persist_monitor_logs,
+    )
     import asyncio
 
     # 1️⃣ Initialize external dependencies in parallel
@@ -62,19 +80,36 @@ async def startup_event():
 
     # 2️⃣ Launch the Redis pub/sub listener in the background
     asyncio.create_task(listen_for_ingestion_events())
-    print("📡 Redis event listener started")
-
-    print("✅ KnowServe backend started successfully.")
+    asyncio.create_task(persist_ingestion_statuses())
+    asyncio.create_task(listen_for_validation_results())
+    asyncio.create_task(persist_monitor_logs())
+    logger.info("Redis event listeners started")
+
+    # 3️⃣ Load the cross-encoder before the first chat query needs it
+    if settings.RERANK_ENABLED:
+        asyncio.create_task(reranker.warm_up())
+
+    logger.info(
+        "KnowServe backend started",
+        extra={"project": settings.PROJECT_NAME, "environment": settings.ENVIRONMENT},
+    )
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanly close connections on shutdown."""
+    # Rows still waiting for a batch insert
+    await chat_history_writer.close()
     await asyncio.gather(
         close_db(),
-        close_redis()
+        close_redis(),
+        access_index.close(),
+        close_llm_provider(),
     )
-    print("🛑 KnowServe backend shut down cleanly.")
+    hashing_executor.shutdown()
+    reranker.shutdown()
+    mark_process_dead()
+    logger.info("KnowServe backend shut down cleanly")
 
 
 # -------------------------------------------------------------
@@ -85,6 +120,7 @@ app.include_router(chat.router, prefix="/chat", tags=["Chat"],dependencies=[Depe
 app.include_router(docs.router, prefix="/documents", tags=["Documents"], dependencies=[Depends(require_user)])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"],dependencies=[Depends(require_admin)])
 app.include_router(monitor.router, prefix="/monitor", tags=["Monitoring"],dependencies=[Depends(require_admin)])
+app.include_router(monitor.metrics_router, prefix="/monitor", tags=["Monitoring"], dependencies=[Depends(require_scrape_token)])
 app.include_router(ws.router, prefix="/ws", tags=["WebSocket"])
 
 # -------------------------------------------------------------
@@ -3,6 +3,7 @@ from app.models.department import Department
 from app.models.organization import Organization
 from app.models.document import Document
 from app.models.chat_history import ChatHistory
+from app.models.chat_history_archive import ChatHistoryArchive
 from app.models.monitor_log import MonitorLog
 from app.core.database import Base
 
@@ -12,6 +13,7 @@ __all__ = [
     "Organization",
     "Document",
     "ChatHistory",
+    "ChatHistoryArchive",
     "MonitorLog",
     "Base",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -11,8 +11,13 @@ class ChatHistory(Base):
     query = Column(String, nullable=False)
     response = Column(String)
     created_at = Column(DateTime)
-    semantic_vector = Column(String)
+    semantic_vector = Column(LargeBinary)   # query embedding, packed float32 (1.5 KB for 384 dims)
     source_doc = Column(String)
 
     # Relationships
     user = relationship("User", back_populates="chat_history")
+
+    # Recent turns of a user (conversation context) and history pages (keyset on id)
+    __table_args__ = (
+        Index("ix_chat_history_user_id_id", "user_id", "id"),
+    )
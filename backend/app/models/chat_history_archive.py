@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, LargeBinary
+from app.core.database import Base
+
+
+class ChatHistoryArchive(Base):
+    """
+    Chat history past CHAT_HISTORY_RETENTION_DAYS: one row per user and
+    archival run, holding that user's turns (and their monitor logs) as
+    zlib-compressed JSON, newest last.
+    """
+    __tablename__ = "chat_history_archive"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    first_id = Column(Integer, nullable=False)   # chat_history ids covered
+    last_id = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime)
+    last_created_at = Column(DateTime)
+    turns = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    # History pages continue into the archive below a chat_history id
+    __table_args__ = (
+        Index("ix_chat_history_archive_user_id_last_id", "user_id", "last_id"),
+    )
@@ -1,5 +1,5 @@
 # app/models/department_documents_access.py
-from sqlalchemy import Column, Integer, ForeignKey, Table
+from sqlalchemy import Column, Integer, ForeignKey, Index, Table
 from app.core.database import Base
 
 # Association table between Departments and Documents
@@ -8,3 +8,9 @@ class DepartmentDocumentAccess(Base):
 
     department_id = Column(Integer, ForeignKey("departments.id"), primary_key=True)
     document_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+
+    # The composite PK (department_id, document_id) only serves lookups by department;
+    # per-document lookups (access diffs, allowed department names) need their own index.
+    __table_args__ = (
+        Index("ix_department_documents_access_document_id", "document_id"),
+    )
@@ -14,7 +14,7 @@ class Document(Base):
     status = Column(String(255), nullable=False)
 
     # NEW
-    owner_department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    owner_department_id = Column(Integer, ForeignKey("departments.id"), nullable=True, index=True)
     owner_department = relationship("Department", backref="owned_documents")
 
     # Existing many-to-many
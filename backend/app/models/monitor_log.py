@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
 from app.core.database import Base
 
 
@@ -7,6 +7,7 @@ class MonitorLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     query_id = Column(Integer, ForeignKey("chat_history.id"))
-    valid = Column(Boolean, default=False)
+    valid = Column(Boolean, default=False)   # None: answer not validated (sampled out, backlog, degraded)
     reason = Column(String)
     created_at = Column(DateTime)
+    stage_latencies = Column(JSON)   # {"embed": ms, "retrieval": ms, ..., "total": ms}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SqlEnum
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Enum as SqlEnum
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from enum import Enum
@@ -21,3 +21,8 @@ class User(Base):
     # Relationships
     department = relationship("Department", back_populates="users")
     chat_history = relationship("ChatHistory", back_populates="user")
+
+    # get_manager_for_department / get_admin filter on role (+ department)
+    __table_args__ = (
+        Index("ix_users_role_department_id", "role", "department_id"),
+    )
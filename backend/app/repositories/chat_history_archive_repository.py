@@ -0,0 +1,25 @@
+# app/repositories/chat_history_archive_repository.py
+
+from sqlalchemy.orm import Session
+
+from app.models.chat_history_archive import ChatHistoryArchive
+from app.repositories.base_repository import BaseRepository
+
+
+class ChatHistoryArchiveRepository(BaseRepository[ChatHistoryArchive]):
+    def __init__(self, session: Session):
+        super().__init__(session, ChatHistoryArchive)
+
+    def save_all(self, archives: list[ChatHistoryArchive]):
+        self.session.add_all(archives)
+        self.session.flush()
+
+    def page_for_user(self, user_id: int, limit: int, before_id: int | None = None) -> list[ChatHistoryArchive]:
+        """
+        Up to `limit` archives of a user holding turns with id below
+        `before_id`, newest first (uses ix_chat_history_archive_user_id_last_id).
+        """
+        query = self.session.query(ChatHistoryArchive).filter(ChatHistoryArchive.user_id == user_id)
+        if before_id is not None:
+            query = query.filter(ChatHistoryArchive.first_id < before_id)
+        return query.order_by(ChatHistoryArchive.last_id.desc()).limit(limit).all()
@@ -0,0 +1,102 @@
+# app/repositories/chat_history_repository.py
+
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.models.chat_history import ChatHistory
+from app.repositories.base_repository import BaseRepository
+
+
+class ChatHistoryRepository(BaseRepository[ChatHistory]):
+    def __init__(self, session: Session):
+        super().__init__(session, ChatHistory)
+
+    def recent_for_user(self, user_id: int, limit: int, since: datetime) -> list[tuple[str, str]]:
+        """Last `limit` (query, response) turns of a user since `since`, oldest first (uses ix_chat_history_user_id_id)."""
+        rows = (
+            self.session.query(ChatHistory.query, ChatHistory.response)
+            .filter(ChatHistory.user_id == user_id, ChatHistory.created_at >= since)
+            .order_by(ChatHistory.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [(row.query, row.response or "") for row in reversed(rows)]
+
+    def turns_outside_window(self, user_id: int, window: int, after_id: int, since: datetime, limit: int):
+        """
+        The oldest `limit` turns of a user since `since` with id above `after_id`
+        that are older than the user's last `window` turns (rows with id, query, response).
+        """
+        boundary = (
+            self.session.query(ChatHistory.id)
+            .filter(ChatHistory.user_id == user_id)
+            .order_by(ChatHistory.id.desc())
+            .offset(window - 1)
+            .limit(1)
+            .scalar()
+        )
+        if boundary is None:
+            return []
+        return (
+            self.session.query(ChatHistory.id, ChatHistory.query, ChatHistory.response)
+            .filter(
+                ChatHistory.user_id == user_id,
+                ChatHistory.id > after_id,
+                ChatHistory.id < boundary,
+                ChatHistory.created_at >= since,
+            )
+            .order_by(ChatHistory.id)
+            .limit(limit)
+            .all()
+        )
+
+    def save_bulk(self, rows: list[dict]) -> list[int]:
+        """Insert many turns (column dicts) with one executemany INSERT; returns their ids in row order."""
+        if not rows:
+            return []
+        table = ChatHistory.__table__
+        result = self.session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
+
+    # -----------------------------------------
+    # HISTORY PAGES (keyset on id, newest first)
+    # -----------------------------------------
+    def page_for_user(self, user_id: int, limit: int, before_id: int | None = None):
+        """Up to `limit` turns of a user with id below `before_id` (uses ix_chat_history_user_id_id)."""
+        query = self.session.query(
+            ChatHistory.id, ChatHistory.query, ChatHistory.response,
+            ChatHistory.created_at, ChatHistory.source_doc,
+        ).filter(ChatHistory.user_id == user_id)
+        if before_id is not None:
+            query = query.filter(ChatHistory.id < before_id)
+        return query.order_by(ChatHistory.id.desc()).limit(limit).all()
+
+    # -----------------------------------------
+    # ARCHIVAL
+    # -----------------------------------------
+    def oldest_before(self, cutoff: datetime, limit: int):
+        """The oldest turns created before `cutoff` (ids grow with created_at: a primary key range scan)."""
+        return (
+            self.session.query(
+                ChatHistory.id, ChatHistory.user_id, ChatHistory.query, ChatHistory.response,
+                ChatHistory.created_at, ChatHistory.source_doc,
+            )
+            .filter(ChatHistory.created_at < cutoff)
+            .order_by(ChatHistory.id)
+            .limit(limit)
+            .all()
+        )
+
+    def delete_ids(self, ids: list[int]) -> int:
+        if not ids:
+            return 0
+        result = self.session.execute(
+            delete(ChatHistory)
+                .where(ChatHistory.id.in_(ids))
+                .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
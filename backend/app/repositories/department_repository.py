@@ -1,4 +1,5 @@
 # app/repositories/department_repository.py
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.department import Department
 from app.repositories.base_repository import BaseRepository
@@ -17,4 +18,10 @@ class DepartmentRepository(BaseRepository[Department]):
         dept = self.get(department_id)
         return dept.owned_documents if dept else []
 
+    def get_existing_ids(self, department_ids: list[int]) -> set[int]:
+        """The subset of `department_ids` that exist."""
+        if not department_ids:
+            return set()
+        return set(self.session.scalars(select(Department.id).where(Department.id.in_(department_ids))))
+
 
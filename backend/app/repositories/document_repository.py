@@ -1,9 +1,31 @@
 # app/repositories/document_repository.py
+from sqlalchemy import Integer, bindparam, delete, func, insert, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import Session
 from app.models.document import Document
 from app.models.department import Department
+from app.models.department_documents_access import DepartmentDocumentAccess
 from app.repositories.base_repository import BaseRepository
 
+# Columns that listing endpoints may project (field name -> column)
+LISTING_COLUMNS = {
+    "id": Document.id,
+    "title": Document.title,
+    "source_url": Document.source_url,
+    "status": Document.status,
+    "owner_department_id": Document.owner_department_id,
+    "is_active": Document.is_active,
+}
+
+# Columns returned by the non-admin listings
+SUMMARY_COLUMNS = (Document.id, Document.title, Document.source_url, Document.status)
+
+
+def _unnest(name: str, values: list[int], column: str):
+    """unnest(:name) AS (column): an integer array parameter as a one-column table."""
+    return func.unnest(bindparam(name, values, type_=ARRAY(Integer))).table_valued(column).render_derived()
+
+
 class DocumentRepository(BaseRepository[Document]):
     def __init__(self, session: Session):
         super().__init__(session, Document)
@@ -12,11 +34,15 @@ class DocumentRepository(BaseRepository[Document]):
     # ACCESS (many-to-many)
     # -----------------------------------------
     def get_documents_with_access_for_department(self, department_id: int):
-        """Documents that a department is allowed to access."""
+        """
+        Documents that a department is allowed to access, as lightweight rows.
+        Selects only listing columns so no entity (or its joined departments) is built.
+        """
         return (
-            self.session.query(Document)
-                .join(Document.departments)
-                .filter(Department.id == department_id)
+            self.session.query(*SUMMARY_COLUMNS)
+                .join(DepartmentDocumentAccess, DepartmentDocumentAccess.document_id == Document.id)
+                .filter(DepartmentDocumentAccess.department_id == department_id)
+                .order_by(DepartmentDocumentAccess.document_id)
                 .all()
         )
 
@@ -24,27 +50,215 @@ class DocumentRepository(BaseRepository[Document]):
     # OWNERSHIP (one-to-many)
     # -----------------------------------------
     def get_documents_owned_by_department(self, department_id: int):
-        """Documents that originated from / are owned by the department."""
+        """Documents that originated from / are owned by the department, as lightweight rows."""
         return (
-            self.session.query(Document)
+            self.session.query(*SUMMARY_COLUMNS)
                 .filter(Document.owner_department_id == department_id)
+                .order_by(Document.id)
                 .all()
         )
 
     # -----------------------------------------
-    # MODIFY ACCESS
+    # PAGINATED LISTINGS (column-only, keyset)
     # -----------------------------------------
-    def set_document_access(self, doc_id: int, department_ids: list[int]):
-        """Set which departments may access this document."""
-        doc = self.get(doc_id)
-        if not doc:
-            return None
+    def _page_query(self, fields: list[str], cursor_column, after_id, status, owner_department_id):
+        """
+        Build a column-only query ordered by document id.
+        `cursor_column` is the id column the keyset condition is applied to,
+        so access listings can seek on the association table's primary key.
+        """
+        columns = [LISTING_COLUMNS["id"]] + [
+            LISTING_COLUMNS[f] for f in fields if f != "id"
+        ]
+        query = self.session.query(*columns)
+
+        if after_id is not None:
+            query = query.filter(cursor_column > after_id)
+        if status is not None:
+            query = query.filter(Document.status == status)
+        if owner_department_id is not None:
+            query = query.filter(Document.owner_department_id == owner_department_id)
+
+        return query
 
-        deps = (
-            self.session.query(Department)
-                .filter(Department.id.in_(department_ids))
+    def list_page(self, fields: list[str], limit: int, after_id: int | None = None,
+                  status: str | None = None, owner_department_id: int | None = None,
+                  with_allowed_departments: bool = False):
+        """
+        One page of all documents (admin view).
+        With `with_allowed_departments`, the allowed department names are
+        aggregated in SQL into an extra `allowed_departments` array column.
+        """
+        query = self._page_query(fields, Document.id, after_id, status, owner_department_id)
+
+        if with_allowed_departments:
+            query = query.add_columns(self._allowed_department_names_column())
+
+        return (
+            query
+                .order_by(Document.id)
+                .limit(limit)
                 .all()
         )
 
-        doc.departments = deps
-        return doc
+    def list_page_with_access_for_department(self, department_id: int, fields: list[str], limit: int,
+                                             after_id: int | None = None, status: str | None = None,
+                                             owner_department_id: int | None = None):
+        """One page of the documents a department is allowed to access."""
+        return (
+            self._page_query(fields, DepartmentDocumentAccess.document_id, after_id, status, owner_department_id)
+                .join(DepartmentDocumentAccess, DepartmentDocumentAccess.document_id == Document.id)
+                .filter(DepartmentDocumentAccess.department_id == department_id)
+                .order_by(DepartmentDocumentAccess.document_id)
+                .limit(limit)
+                .all()
+        )
+
+    def list_page_owned_by_department(self, department_id: int, fields: list[str], limit: int,
+                                      after_id: int | None = None, status: str | None = None):
+        """One page of the documents owned by a department."""
+        return (
+            self._page_query(fields, Document.id, after_id, status, department_id)
+                .order_by(Document.id)
+                .limit(limit)
+                .all()
+        )
+
+    @staticmethod
+    def _allowed_department_names_column():
+        """Correlated `array_agg` of the department names allowed to access each document row."""
+        return (
+            select(func.array_agg(Department.name))
+                .join(DepartmentDocumentAccess, DepartmentDocumentAccess.department_id == Department.id)
+                .where(DepartmentDocumentAccess.document_id == Document.id)
+                .correlate(Document)
+                .scalar_subquery()
+                .label("allowed_departments")
+        )
+
+    def get_allowed_department_names(self, doc_id: int) -> list[str]:
+        """Names of the departments allowed to access one document."""
+        return list(
+            self.session.scalars(
+                select(Department.name)
+                    .join(DepartmentDocumentAccess, DepartmentDocumentAccess.department_id == Department.id)
+                    .where(DepartmentDocumentAccess.document_id == doc_id)
+                    .order_by(Department.id)
+            )
+        )
+
+    def get_existing_ids(self, doc_ids: list[int]) -> set[int]:
+        """The subset of `doc_ids` that exist."""
+        if not doc_ids:
+            return set()
+        return set(self.session.scalars(select(Document.id).where(Document.id.in_(doc_ids))))
+
+    def filter_accessible_ids(self, department_id: int, doc_ids: list[int]) -> set[int]:
+        """The subset of `doc_ids` the department may access."""
+        if not doc_ids:
+            return set()
+        return set(self.session.scalars(
+            select(DepartmentDocumentAccess.document_id).where(
+                DepartmentDocumentAccess.department_id == department_id,
+                DepartmentDocumentAccess.document_id.in_(doc_ids),
+            )
+        ))
+
+    def iter_access_pairs(self, batch_size: int = 10000):
+        """Stream every (department_id, document_id) access row."""
+        yield from self.session.execute(
+            select(DepartmentDocumentAccess.department_id, DepartmentDocumentAccess.document_id)
+                .execution_options(yield_per=batch_size)
+        )
+
+    # -----------------------------------------
+    # STATUS
+    # -----------------------------------------
+    def set_status_bulk(self, status: str, doc_ids: list[int]) -> int:
+        """Set the status of many documents in one UPDATE; returns the number of rows updated."""
+        if not doc_ids:
+            return 0
+        result = self.session.execute(
+            update(Document)
+                .where(Document.id.in_(doc_ids))
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    # -----------------------------------------
+    # MODIFY ACCESS (diff-based, bulk statements)
+    # -----------------------------------------
+    def set_document_access(self, doc_id: int, department_ids: list[int]):
+        """
+        Set which departments may access this document.
+        Only the difference to the current access rows is written: one bulk
+        INSERT for added departments and one bulk DELETE for removed ones.
+        Unknown department ids are ignored.
+        Returns (added_ids, removed_ids), or None if the document does not exist.
+        """
+        if not self.get_existing_ids([doc_id]):
+            return None
+
+        wanted = set()
+        if department_ids:
+            wanted = set(self.session.scalars(
+                select(Department.id).where(Department.id.in_(department_ids))
+            ))
+
+        current = set(self.session.scalars(
+            select(DepartmentDocumentAccess.department_id)
+                .where(DepartmentDocumentAccess.document_id == doc_id)
+        ))
+
+        added = sorted(wanted - current)
+        removed = sorted(current - wanted)
+
+        if added:
+            self.session.execute(
+                insert(DepartmentDocumentAccess),
+                [{"department_id": dep_id, "document_id": doc_id} for dep_id in added],
+            )
+        if removed:
+            self.session.execute(
+                delete(DepartmentDocumentAccess).where(
+                    DepartmentDocumentAccess.document_id == doc_id,
+                    DepartmentDocumentAccess.department_id.in_(removed),
+                )
+            )
+
+        return added, removed
+
+    def change_access_bulk(self, doc_ids: list[int], add_department_ids: list[int],
+                           remove_department_ids: list[int]):
+        """
+        Grant and/or revoke departments on many documents with one INSERT and one DELETE.
+        The pairs are built server-side (INSERT ... SELECT from two unnest() arrays),
+        so the statement has two parameters whatever the number of pairs.
+        Pairs that already exist (or are already absent) are left untouched.
+        Returns (added, removed) as lists of (department_id, document_id) pairs actually changed.
+        """
+        added, removed = [], []
+
+        if doc_ids and add_department_ids:
+            docs = _unnest("doc_ids", doc_ids, "document_id")
+            deps = _unnest("dep_ids", add_department_ids, "department_id")
+            pairs = select(deps.c.department_id, docs.c.document_id).select_from(docs.join(deps, true()))
+            added = self.session.execute(
+                pg_insert(DepartmentDocumentAccess)
+                    .from_select(["department_id", "document_id"], pairs)
+                    .on_conflict_do_nothing()
+                    .returning(DepartmentDocumentAccess.department_id, DepartmentDocumentAccess.document_id)
+            ).all()
+
+        if doc_ids and remove_department_ids:
+            removed = self.session.execute(
+                delete(DepartmentDocumentAccess)
+                    .where(
+                        DepartmentDocumentAccess.document_id.in_(doc_ids),
+                        DepartmentDocumentAccess.department_id.in_(remove_department_ids),
+                    )
+                    .returning(DepartmentDocumentAccess.department_id, DepartmentDocumentAccess.document_id)
+            ).all()
+
+        return [tuple(r) for r in added], [tuple(r) for r in removed]
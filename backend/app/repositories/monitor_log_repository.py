@@ -0,0 +1,43 @@
+# app/repositories/monitor_log_repository.py
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.models.monitor_log import MonitorLog
+from app.repositories.base_repository import BaseRepository
+
+
+class MonitorLogRepository(BaseRepository[MonitorLog]):
+    def __init__(self, session: Session):
+        super().__init__(session, MonitorLog)
+
+    def save_bulk(self, rows: list[dict]) -> int:
+        """Insert many log rows (column dicts) in one executemany INSERT; returns the row count."""
+        if not rows:
+            return 0
+        # Table-level INSERT: ORM bulk insert would replace valid=None with the column default
+        self.session.execute(insert(MonitorLog.__table__), rows)
+        return len(rows)
+
+    def for_queries(self, query_ids: list[int]):
+        """Log rows of these chat history ids (for archival)."""
+        if not query_ids:
+            return []
+        return (
+            self.session.query(
+                MonitorLog.query_id, MonitorLog.valid, MonitorLog.reason,
+                MonitorLog.created_at, MonitorLog.stage_latencies,
+            )
+            .filter(MonitorLog.query_id.in_(query_ids))
+            .all()
+        )
+
+    def delete_for_queries(self, query_ids: list[int]) -> int:
+        if not query_ids:
+            return 0
+        result = self.session.execute(
+            delete(MonitorLog)
+                .where(MonitorLog.query_id.in_(query_ids))
+                .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
@@ -1,5 +1,6 @@
 # app/repositories/user_repository.py
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.models.user import User, UserRole
@@ -26,4 +27,7 @@ class UserRepository(BaseRepository[User]):
             .first()
         )
 
-    
+    def update_password_hash(self, user_id: int, password_hash: str):
+        self.session.execute(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)
+        )
@@ -1,7 +1,7 @@
 # app/routers/admin/docs.py
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from typing import Annotated, List
 from app.controllers.admin_docs_controller import AdminDocsController
 from app.schemas.document_schema import *
 router = APIRouter()
@@ -11,6 +11,14 @@ router = APIRouter()
 # -------------------------
 # Routes
 # -------------------------
+@router.get("/", summary="List all documents (paginated)")
+async def list_documents(params: Annotated[DocumentListParams, Query()]):
+    try:
+        return await AdminDocsController.list_documents(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/", summary="Create a new document with owner & allowed access")
 async def create_document(dto: CreateDocumentDTO):
     try:
@@ -19,6 +27,16 @@ async def create_document(dto: CreateDocumentDTO):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.patch("/access", summary="Grant/revoke department access for many documents")
+async def bulk_update_document_access(dto: BulkUpdateAccessDTO):
+    try:
+        return await AdminDocsController.bulk_update_document_access(dto)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.patch("/{doc_id}/access", summary="Update allowed departments for access")
 async def update_document_access(doc_id: int, dto: UpdateAccessDTO):
     try:
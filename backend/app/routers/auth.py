@@ -1,8 +1,11 @@
 # app/routers/auth.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from app.controllers.auth_controller import AuthController
+from app.core.rate_limiter import RateLimitExceeded
 from app.schemas.auth_schema import RegisterRequest, LoginRequest
+from app.utils.auth import get_current_user
+from app.utils.hashing import HashingBusyError
 import logging
 
 router = APIRouter(tags=["Auth"])
@@ -20,6 +23,9 @@ async def register_user(request: RegisterRequest):
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
 
+    except HashingBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry.", headers={"Retry-After": "1"})
+
     except Exception:
         logger.exception("Unexpected error during registration")
         raise HTTPException(
@@ -29,16 +35,42 @@ async def register_user(request: RegisterRequest):
 
 
 @router.post("/login")
-async def login_user(request: LoginRequest):
+async def login_user(request: LoginRequest, http_request: Request):
+    client_ip = http_request.client.host if http_request.client else None
     try:
-        return await AuthController.login(request)
+        return await AuthController.login(request, client_ip)
 
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid email or password.")
 
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429, detail="Too many login attempts.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    except HashingBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry.", headers={"Retry-After": "1"})
+
     except Exception:
         logger.exception("Unexpected error during login")
         raise HTTPException(
             status_code=500,
             detail="An unexpected error occurred. Please try again later.",
         )
+
+
+@router.post("/logout")
+async def logout_user(user: dict = Depends(get_current_user)):
+    try:
+        return await AuthController.logout(user)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception:
+        logger.exception("Unexpected error during logout")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred. Please try again later.",
+        )
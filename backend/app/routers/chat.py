@@ -1,10 +1,40 @@
 # app/routers/chat.py
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.controllers.chat_controller import ChatController
+from app.core.single_flight import FlightInterrupted
+from app.schemas.chat_schema import ChatHistoryPage, ChatHistoryParams, ChatRequest
+from app.utils.auth import require_user, require_user_with_department
 
 router = APIRouter()
 
-@router.get("/")
-async def get_chat_home():
-    return {"message": "💬 Chat module placeholder"}
+
+@router.post("/", summary="Ask a question (whole answer)")
+async def ask(request: ChatRequest, current_user=Depends(require_user_with_department)):
+    try:
+        return await ChatController.ask(current_user, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FlightInterrupted as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@router.post("/stream", summary="Ask a question (answer streamed as Server-Sent Events)")
+async def ask_stream(request: ChatRequest, current_user=Depends(require_user_with_department)):
+    # Starlette cancels the generator when the client disconnects, which stops generation
+    return StreamingResponse(
+        ChatController.stream(current_user, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
+@router.get("/history", response_model=ChatHistoryPage, summary="My past questions and answers, newest first")
+async def history(params: Annotated[ChatHistoryParams, Query()], current_user=Depends(require_user)):
+    try:
+        return await ChatController.history(current_user, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
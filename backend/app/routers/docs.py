@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.controllers.docs_controller import DocsController
+from app.schemas.document_schema import DocumentListParams
 from app.utils.auth import require_user_with_department
 
 router = APIRouter(tags=["Documents"])
 
 @router.get("/my/access", summary="List documents my department can access")
-async def list_my_accessible_documents(current_user=Depends(require_user_with_department)):
-    return await DocsController.list_allowed_docs(current_user)
+async def list_my_accessible_documents(
+    params: Annotated[DocumentListParams, Query()],
+    current_user=Depends(require_user_with_department),
+):
+    try:
+        return await DocsController.list_allowed_docs(current_user, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/my/owned", summary="Documents owned by my department")
-async def list_my_owned_documents(current_user=Depends(require_user_with_department)):
-    return await DocsController.list_my_owned_documents(current_user)
\ No newline at end of file
+async def list_my_owned_documents(
+    params: Annotated[DocumentListParams, Query()],
+    current_user=Depends(require_user_with_department),
+):
+    try:
+        return await DocsController.list_my_owned_documents(current_user, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -1,8 +1,23 @@
 # app/routers/monitor.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from app.core.database import pool_status
+from app.core.metrics import render_metrics
 
 router = APIRouter()
+# Outside the admin dependency: scraped with a static token (require_scrape_token)
+metrics_router = APIRouter()
 
 @router.get("/")
 async def monitor_home():
     return {"message": "🧠 Monitor route placeholder"}
+
+
+@router.get("/db/pool", summary="Connection pool utilisation per database engine")
+async def db_pool_status():
+    return pool_status()
+
+
+@metrics_router.get("/metrics", summary="Prometheus metrics of all API workers")
+async def metrics():
+    body, content_type = await render_metrics()
+    return Response(content=body, media_type=content_type)
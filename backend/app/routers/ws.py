@@ -1,11 +1,19 @@
 # app/routers/ws.py
 
+from typing import Optional
 from fastapi import APIRouter, WebSocket
 from app.controllers.ws_controller import WSController
 
 router = APIRouter(tags=["WebSocket"])
 
 
+@router.websocket("/session")
+async def session_ws(websocket: WebSocket, token: Optional[str] = None):
+    """One multiplexed socket per user session; authenticate with ?token=<access token>."""
+    await WSController.session(websocket, token)
+
+
 @router.websocket("/documents/{doc_id}")
-async def document_ws(websocket: WebSocket, doc_id: int):
-    await WSController.document_connection(websocket, doc_id)
+async def document_ws(websocket: WebSocket, doc_id: int, token: Optional[str] = None,
+                      last_event_id: Optional[str] = None):
+    await WSController.document_connection(websocket, doc_id, token, last_event_id)
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+# ----------------------------
+# Chat Request Schema
+# ----------------------------
+class ChatRequest(BaseModel):
+    """A question for the chat assistant."""
+
+    query: str = Field(..., min_length=1, max_length=2000)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "query": "How many vacation days do new employees get?"
+            }
+        }
+    }
+
+
+# ----------------------------
+# Chat history (keyset pagination, newest first)
+# ----------------------------
+class ChatHistoryParams(BaseModel):
+    """Query parameters of the chat history endpoint."""
+
+    limit: int = Field(20, ge=1, le=100)
+    before: Optional[int] = Field(None, ge=1, description="Return turns with id lower than this cursor")
+
+
+class ChatHistoryItem(BaseModel):
+    id: int
+    query: str
+    response: str
+    created_at: Optional[datetime]
+    doc_ids: List[int]
+
+
+class ChatHistoryPage(BaseModel):
+    items: List[ChatHistoryItem]
+    next_before: Optional[int] = Field(None, description="Cursor of the next (older) page, null on the last one")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional
 
 class CreateDocumentDTO(BaseModel):
     title: str
@@ -9,4 +9,52 @@ class CreateDocumentDTO(BaseModel):
 
 
 class UpdateAccessDTO(BaseModel):
-    allowed_department_ids: List[int]
\ No newline at end of file
+    allowed_department_ids: List[int]
+
+
+class BulkUpdateAccessDTO(BaseModel):
+    """Grant and/or revoke departments on many documents at once."""
+
+    document_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    # Every document × department pair is written: keep the product bounded
+    add_department_ids: List[int] = Field([], max_length=100)
+    remove_department_ids: List[int] = Field([], max_length=100)
+
+    @model_validator(mode="after")
+    def check_departments(self):
+        if not self.add_department_ids and not self.remove_department_ids:
+            raise ValueError("Provide add_department_ids and/or remove_department_ids.")
+        overlap = set(self.add_department_ids) & set(self.remove_department_ids)
+        if overlap:
+            raise ValueError(f"Departments {sorted(overlap)} are both added and removed.")
+        return self
+
+
+# ----------------------------
+# Document listing (keyset pagination)
+# ----------------------------
+class DocumentListParams(BaseModel):
+    """Query parameters shared by the document listing endpoints."""
+
+    limit: int = Field(50, ge=1, le=500)
+    after_id: Optional[int] = Field(None, ge=0, description="Return documents with id greater than this cursor")
+    status: Optional[str] = None
+    owner_department_id: Optional[int] = None
+    fields: Optional[List[str]] = Field(None, description="Fields to return, e.g. fields=id,title")
+
+    # ✅ Accept both ?fields=id,title and ?fields=id&fields=title
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, v):
+        if v is None:
+            return v
+        if isinstance(v, str):
+            v = [v]
+        return [f.strip() for item in v for f in item.split(",") if f.strip()]
+
+    def cache_field(self, fields: List[str]) -> str:
+        """Stable identifier of this page, used as the Redis hash field."""
+        return (
+            f"limit={self.limit}|after={self.after_id or 0}|status={self.status or ''}"
+            f"|owner={self.owner_department_id or ''}|fields={','.join(fields)}"
+        )
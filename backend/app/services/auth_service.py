@@ -1,7 +1,10 @@
 # app/services/auth_service.py
+from app.config import settings
+from app.core import rate_limiter
+from app.core.token_revocation import revocation_list
 from app.core.unit_of_work import UnitOfWork
 from app.models.user import UserRole,User
-from app.utils.hashing import hash_password, verify_password
+from app.utils.hashing import hash_password_async, verify_and_update_async
 from app.utils.jwt import create_access_token
 
 
@@ -11,10 +14,14 @@ class AuthService:
     # REGISTER USER
     # ----------------------------
     @staticmethod
-    def register(name: str, email: str, password: str, role: str, department_id: int):
+    async def register(name: str, email: str, password: str, role: str, department_id: int):
         # role = role.lower()
         role_enum = UserRole(role)
 
+        # Hash before opening the unit of work: don't hold a DB connection
+        # while the hash is computed (bounded executor, off the event loop)
+        hashed = await hash_password_async(password)
+
         with UnitOfWork() as uow:
 
             # 1️⃣ Check if email exists
@@ -31,10 +38,7 @@ class AuthService:
                 if uow.users.get_manager_for_department(department_id):
                     raise PermissionError("This department already has a manager.")
 
-            # 4️⃣ Hash password
-            hashed = hash_password(password)
-
-            # 5️⃣ Create the user
+            # 4️⃣ Create the user
             user = User(
                 name=name.strip(),
                 email=email.lower(),
@@ -44,7 +48,7 @@ class AuthService:
             )
 
             uow.users.save(user)
-        
+
 
         return {"message": "User registered successfully"}
 
@@ -52,17 +56,28 @@ class AuthService:
     # LOGIN USER
     # ----------------------------
     @staticmethod
-    def login(email: str, password: str):
+    async def login(email: str, password: str, client_ip: str | None = None):
+        # 🚦 Throttle before any hashing so brute force can't burn CPU
+        email_key = email.lower()
+        await rate_limiter.hit(
+            "login:email", email_key,
+            settings.LOGIN_RATE_LIMIT_PER_EMAIL, settings.LOGIN_RATE_WINDOW_SECONDS,
+        )
+        if client_ip:
+            await rate_limiter.hit(
+                "login:ip", client_ip,
+                settings.LOGIN_RATE_LIMIT_PER_IP, settings.LOGIN_RATE_WINDOW_SECONDS,
+            )
+
+        # Don't hold a DB connection while the hash is computed
         with UnitOfWork() as uow:
             user = uow.users.get_by_email(email)
 
             if not user:
                 raise ValueError("Invalid email or password.")
 
-            if not verify_password(password, user.password_hash):
-                raise ValueError("Invalid email or password.")
-
             # 🟢 Extract user data BEFORE session closes
+            password_hash = user.password_hash
             user_data = {
                 "id": user.id,
                 "name": user.name,
@@ -71,13 +86,24 @@ class AuthService:
                 "department_id": user.department_id,
             }
 
-            token = create_access_token(
-                {
-                    "user_id": user_data["id"],
-                    "role": user_data["role"],
-                    "department_id": user_data["department_id"],
-                }
-            )
+        valid, new_hash = await verify_and_update_async(password, password_hash)
+        if not valid:
+            raise ValueError("Invalid email or password.")
+
+        # 🔁 Stored hash used outdated Argon2 parameters: upgrade it transparently
+        if new_hash:
+            with UnitOfWork() as uow:
+                uow.users.update_password_hash(user_data["id"], new_hash)
+
+        await rate_limiter.reset("login:email", email_key)
+
+        token = create_access_token(
+            {
+                "user_id": user_data["id"],
+                "role": user_data["role"],
+                "department_id": user_data["department_id"],
+            }
+        )
 
         # 🟢 Now safe to return (no ORM object outside UoW)
         return {
@@ -85,3 +111,15 @@ class AuthService:
             "token_type": "bearer",
             "user": user_data,
         }
+
+    # ----------------------------
+    # LOGOUT (revoke current token)
+    # ----------------------------
+    @staticmethod
+    async def logout(token_payload: dict):
+        jti = token_payload.get("jti")
+        if not jti:
+            raise ValueError("Token cannot be revoked; it will expire on its own.")
+
+        await revocation_list.revoke(jti, token_payload["exp"])
+        return {"message": "Logged out successfully"}
@@ -0,0 +1,137 @@
+# app/services/chat_history_service.py
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.core.unit_of_work import UnitOfWork
+from app.models.chat_history_archive import ChatHistoryArchive
+from app.schemas.chat_schema import ChatHistoryParams
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistoryService:
+    """
+    A user's past questions and answers. Turns older than
+    CHAT_HISTORY_RETENTION_DAYS are moved out of chat_history into
+    chat_history_archive (compressed, per user); history pages read
+    chat_history first and continue into the archive transparently.
+    """
+
+    # -------------------------------------------------------------
+    # 🔹 History pages (keyset on the chat history id, newest first)
+    # -------------------------------------------------------------
+    @staticmethod
+    async def history_page(user: dict, params: ChatHistoryParams) -> dict:
+        return await asyncio.to_thread(ChatHistoryService._history_page, user["user_id"], params)
+
+    @staticmethod
+    def _history_page(user_id: int, params: ChatHistoryParams) -> dict:
+        # One extra turn tells whether another page exists
+        wanted = params.limit + 1
+        with UnitOfWork(read_only=True) as uow:
+            items = [
+                ChatHistoryService._item(row.id, row.query, row.response, row.created_at, row.source_doc)
+                for row in uow.chat_history.page_for_user(user_id, wanted, before_id=params.before)
+            ]
+            if len(items) < wanted:
+                # Archived turns are all older than the live ones
+                before = items[-1]["id"] if items else params.before
+                for archive in uow.chat_history_archive.page_for_user(user_id, wanted - len(items), before):
+                    turns = json.loads(zlib.decompress(archive.payload))
+                    items.extend(
+                        ChatHistoryService._item(
+                            turn["id"], turn["query"], turn["response"],
+                            datetime.fromisoformat(turn["created_at"]) if turn["created_at"] else None,
+                            turn["source_doc"],
+                        )
+                        for turn in reversed(turns)
+                        if before is None or turn["id"] < before
+                    )
+                    if len(items) >= wanted:
+                        break
+
+        has_more = len(items) > params.limit
+        items = items[:params.limit]
+        next_before = items[-1]["id"] if has_more else None
+        return {"items": items, "next_before": next_before}
+
+    @staticmethod
+    def _item(turn_id: int, query: str, response: str | None, created_at, source_doc: str | None) -> dict:
+        return {
+            "id": turn_id,
+            "query": query,
+            "response": response or "",
+            "created_at": created_at,
+            "doc_ids": [int(doc_id) for doc_id in source_doc.split(",") if doc_id] if source_doc else [],
+        }
+
+    # -------------------------------------------------------------
+    # 🔹 Retention (Celery, app/tasks/archive_task.py)
+    # -------------------------------------------------------------
+    @staticmethod
+    def archive_old_history_sync() -> int:
+        """
+        Move turns older than CHAT_HISTORY_RETENTION_DAYS, with their monitor
+        logs, into chat_history_archive: CHAT_ARCHIVE_BATCH_SIZE turns per
+        transaction, oldest first, one compressed archive row per user and
+        batch. Returns the number of turns archived.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=settings.CHAT_HISTORY_RETENTION_DAYS)
+        archived = 0
+        while True:
+            with UnitOfWork() as uow:
+                rows = uow.chat_history.oldest_before(cutoff, settings.CHAT_ARCHIVE_BATCH_SIZE)
+                if not rows:
+                    break
+                ids = [row.id for row in rows]
+
+                logs: dict[int, list[dict]] = {}
+                for log in uow.monitor_logs.for_queries(ids):
+                    logs.setdefault(log.query_id, []).append({
+                        "valid": log.valid,
+                        "reason": log.reason,
+                        "created_at": log.created_at.isoformat() if log.created_at else None,
+                        "stage_latencies": log.stage_latencies,
+                    })
+
+                by_user: dict[int, list] = {}
+                for row in rows:
+                    by_user.setdefault(row.user_id, []).append(row)
+                uow.chat_history_archive.save_all([
+                    ChatHistoryService._archive(user_id, turns, logs) for user_id, turns in by_user.items()
+                ])
+
+                # Monitor logs reference the turns
+                uow.monitor_logs.delete_for_queries(ids)
+                archived += uow.chat_history.delete_ids(ids)
+            logger.debug("%d chat history row(s) archived so far", archived)
+
+        return archived
+
+    @staticmethod
+    def _archive(user_id: int, turns: list, logs: dict[int, list[dict]]) -> ChatHistoryArchive:
+        # Query embeddings are not archived: nothing searches old turns by similarity
+        payload = [
+            {
+                "id": turn.id,
+                "query": turn.query,
+                "response": turn.response,
+                "created_at": turn.created_at.isoformat() if turn.created_at else None,
+                "source_doc": turn.source_doc,
+                "monitor": logs.get(turn.id, []),
+            }
+            for turn in turns
+        ]
+        return ChatHistoryArchive(
+            user_id=user_id,
+            first_id=turns[0].id,
+            last_id=turns[-1].id,
+            first_created_at=turns[0].created_at,
+            last_created_at=turns[-1].created_at,
+            turns=len(turns),
+            payload=zlib.compress(json.dumps(payload).encode(), level=9),
+        )
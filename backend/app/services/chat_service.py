@@ -0,0 +1,395 @@
+# app/services/chat_service.py
+import array
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from datetime import datetime
+from typing import AsyncIterator
+
+from app.config import settings
+from app.core.access_index import access_index
+from app.core.history_writer import chat_history_writer
+from app.core.llm import get_llm_provider
+from app.core.llm_scheduler import estimate_tokens
+from app.core.retrieval_cache import normalize_query
+from app.core.semantic_cache import cache_scope, semantic_cache
+from app.core.single_flight import FlightInterrupted, single_flight
+from app.services.conversation_service import ConversationService
+from app.services.monitor_service import MonitorService
+from app.services.retrieval_service import RetrievalService
+
+logger = logging.getLogger(__name__)
+
+GENERATION_TIMEOUT_ANSWER = "Sorry, the assistant did not respond in time. Please try again."
+INTERRUPTED_DETAIL = "The answer was interrupted. Please ask again."
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Cut `text` to about `tokens` tokens (the estimate_tokens ratio)."""
+    return text if estimate_tokens(text) <= tokens else text[:max(tokens, 0) * 4]
+
+
+class _Stages:
+    """
+    Deadlines and latencies of one chat request. A stage that misses its
+    deadline or fails returns its fallback and is recorded as degraded;
+    cancellation (client gone) is never swallowed.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, float] = {}
+        self.degraded: list[str] = []
+
+    async def run(self, name: str, awaitable, timeout_ms: int, fallback=None):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(awaitable, timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            logger.warning("Stage missed its deadline, degrading", extra={"stage": name, "timeout_ms": timeout_ms})
+            self.degraded.append(name)
+            return fallback
+        except Exception as e:
+            logger.warning("Stage failed, degrading: %s", e, extra={"stage": name})
+            self.degraded.append(name)
+            return fallback
+        finally:
+            self.latencies[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+class ChatService:
+    """
+    Answers questions from the documents a user can access.
+    The answer is produced as a stream of events so the first tokens reach
+    the client while the rest is still being generated:
+        {"type": "sources", "doc_ids": [...], "cached": bool}
+        {"type": "token", "text": "..."}            (repeated)
+        {"type": "done", "cached": bool, "answer_id": int | None, "first_token_ms": ...,
+         "total_ms": ..., "stages": {...}}   (+ "valid", "validation" in MONITOR_MODE "sync")
+        {"type": "error", "detail": "..."}  instead of done: a shared answer stopped midway
+    Closing the stream (client gone) cancels generation; nothing is cached or saved then.
+
+    Pipeline (every stage has a CHAT_*_TIMEOUT_MS deadline and a fallback):
+        history ─────────────────────────────────────┐  (→ no history)
+        embed ──┬─ semantic cache ─ validate ─ hit? ──┤  (→ lexical-only retrieval / miss / reject)
+                └─ retrieval (speculative) ──────────┴─ generate
+    Retrieval starts next to the cache lookup, so a miss or a rejected
+    cached answer costs no extra round trip; on a valid hit it is cancelled.
+    With CHAT_COALESCE_ENABLED, questions without recent history attach to an
+    identical (normalized query, scope) execution already in flight on any
+    worker and stream its answer (app/core/single_flight.py).
+    The answer is saved before the done event, whose answer_id (chat
+    history id) identifies it in a later "answer_flagged" / "answer_retracted"
+    WebSocket event; validation and MonitorLog run behind it (MonitorService).
+    """
+
+    # -------------------------------------------------------------
+    # 🔹 Streamed answer
+    # -------------------------------------------------------------
+    @staticmethod
+    async def stream_answer(user: dict, query: str) -> AsyncIterator[dict]:
+        started = time.perf_counter()
+        query = query.strip()
+        scope = cache_scope(user)
+        stages = _Stages()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        # 1️⃣ Conversation (summary + recent turns) loads while the query is embedded
+        history_task = asyncio.create_task(stages.run(
+            "history", ConversationService.load(user), settings.CHAT_HISTORY_TIMEOUT_MS, fallback=("", [])
+        ))
+        retrieval_task, handed_over = None, False
+
+        def start_retrieval() -> asyncio.Task:
+            return asyncio.create_task(stages.run(
+                "retrieval", RetrievalService.retrieve(user, query, embedding),
+                settings.CHAT_RETRIEVAL_TIMEOUT_MS, fallback=[],
+            ))
+
+        def produce() -> AsyncIterator[dict]:
+            # Whoever runs the producer (this request, or a flight it leads) owns the retrieval
+            nonlocal retrieval_task, handed_over
+            handed_over = True
+            if retrieval_task.cancelled() or retrieval_task.cancelling():
+                retrieval_task = start_retrieval()
+            return ChatService._produce(
+                query, embedding, scope, retrieval_task, summary, history, stages.degraded
+            )
+
+        try:
+            embedding = await stages.run(
+                "embed", RetrievalService.embed_query(query), settings.CHAT_EMBED_TIMEOUT_MS
+            )
+
+            # 2️⃣ Speculative retrieval runs while the cached answer is looked up and validated
+            retrieval_task = start_retrieval()
+            cached = None
+            if embedding is not None:
+                cached = await stages.run(
+                    "semantic_cache", semantic_cache.search_similar(embedding, scope),
+                    settings.CHAT_CACHE_TIMEOUT_MS,
+                )
+
+            reason = "fresh answer"
+            if cached:
+                valid, reason = await stages.run(
+                    "validate", ChatService._validate_cached(user, cached),
+                    settings.CHAT_VALIDATE_TIMEOUT_MS, fallback=(False, "validation timed out"),
+                )
+                if valid:
+                    retrieval_task.cancel()
+                    history_task.cancel()
+                    yield {"type": "sources", "doc_ids": cached["doc_ids"], "cached": True}
+                    yield {"type": "token", "text": cached["answer"]}
+                    first_token_ms = elapsed_ms()
+                    answer_id = await ChatService._save_history(
+                        user, query, cached["answer"], cached["doc_ids"], embedding
+                    )
+                    stages.latencies["total"] = elapsed_ms()
+                    yield {"type": "done", "cached": True, "answer_id": answer_id, "first_token_ms": first_token_ms,
+                           "total_ms": stages.latencies["total"], "stages": stages.latencies}
+                    if answer_id is not None:
+                        ConversationService.schedule_summary_update(user["user_id"])
+                        await MonitorService.submit(
+                            user, answer_id, query, cached["answer"], [], cached["doc_ids"], "cached answer",
+                            stages.latencies, verdict=(True, "sources still accessible"),
+                        )
+                    return
+                logger.info("Cached answer rejected: %s", reason, extra={"user_id": user["user_id"]})
+                reason = f"cached answer rejected ({reason}), fresh answer"
+
+            summary, history = await history_task
+
+            # 3️⃣ Standalone questions attach to an identical in-flight execution (any worker);
+            #    with history the answer is personal and runs alone
+            if settings.CHAT_COALESCE_ENABLED and not history:
+                events = single_flight.run(
+                    f"{normalize_query(query)}|{scope}", produce, on_join=retrieval_task.cancel
+                )
+                waiting_started = time.perf_counter()
+            else:
+                events = produce()
+
+            doc_ids, parts, first_token_ms, produced = [], [], None, {}
+            try:
+                async with aclosing(events) as events:
+                    async for event in events:
+                        if event["type"] == "done":
+                            # Replaced by this request's own done event below
+                            produced = event
+                            continue
+                        if event["type"] == "sources":
+                            doc_ids = event["doc_ids"]
+                        elif event["type"] == "token":
+                            first_token_ms = first_token_ms or elapsed_ms()
+                            parts.append(event["text"])
+                        yield event
+            except FlightInterrupted as e:
+                # Part of a shared answer was streamed and the rest will not come:
+                # tell the client, and keep the fragment out of the history
+                logger.warning("Shared answer interrupted: %s", e, extra={"user_id": user["user_id"]})
+                yield {"type": "error", "detail": INTERRUPTED_DETAIL}
+                return
+        finally:
+            # Client gone, a valid hit, or a joined flight: stop the work nobody will read
+            for task in (history_task, None if handed_over else retrieval_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        if not handed_over:
+            stages.latencies["coalesced"] = round((time.perf_counter() - waiting_started) * 1000, 1)
+            reason = f"{reason} (coalesced)"
+        stages.latencies.update(produced.get("stages", {}))
+        # No done event (a flight interrupted mid-answer raised above): count it as degraded
+        degraded = produced["degraded"] if produced else ["flight"]
+        answer, context = "".join(parts), produced.get("context", [])
+        answer_id = await ChatService._save_history(user, query, answer, doc_ids, embedding)
+
+        # Only complete, grounded answers are worth validating
+        validate = bool(context) and not degraded
+        verdict = None
+        if validate and settings.MONITOR_MODE == "sync":
+            # Timed out → validated in the background like in "async" mode
+            verdict = await stages.run(
+                "monitor", MonitorService.validate_answer(query, answer, context), settings.MONITOR_SYNC_TIMEOUT_MS
+            )
+        stages.latencies["total"] = elapsed_ms()
+        done = {
+            "type": "done",
+            "cached": False,
+            "answer_id": answer_id,
+            "first_token_ms": first_token_ms,
+            "total_ms": stages.latencies["total"],
+            "stages": stages.latencies,
+        }
+        if verdict is not None:
+            done["valid"], done["validation"] = verdict
+        yield done
+
+        if degraded:
+            reason = f"{reason}, degraded: {', '.join(degraded)}"
+        elif not context:
+            reason = f"{reason}, no sources"
+        if answer_id is not None:
+            ConversationService.schedule_summary_update(user["user_id"])
+            await MonitorService.submit(
+                user, answer_id, query, answer, context, doc_ids, reason, stages.latencies,
+                validate=validate, verdict=verdict,
+            )
+
+    @staticmethod
+    async def _produce(query: str, embedding: list[float] | None, scope: str, retrieval: asyncio.Task,
+                       summary: str, history: list[tuple[str, str]], degraded: list[str]) -> AsyncIterator[dict]:
+        """
+        Retrieval → generation for one (possibly shared) answer: sources,
+        tokens, then {"type": "done", "context", "degraded", "stages"}
+        (context: the chunk texts, for validation).
+        Complete, grounded answers are stored in the semantic cache.
+        """
+        chunks = await retrieval
+        doc_ids = sorted({chunk["doc_id"] for chunk in chunks})
+        yield {"type": "sources", "doc_ids": doc_ids, "cached": False}
+
+        # Deadline for the first token, then between tokens
+        parts, latencies = [], {}
+        prompt = ChatService.build_prompt(query, chunks, history, summary)
+        generation_started = time.perf_counter()
+        # The scope (department set) shares the per-department LLM concurrency limit
+        answer_stream = get_llm_provider().stream(prompt, settings.CHAT_MAX_ANSWER_TOKENS, department=scope)
+        async with aclosing(answer_stream) as tokens:
+            while True:
+                timeout_ms = settings.CHAT_TOKEN_TIMEOUT_MS if parts else settings.CHAT_FIRST_TOKEN_TIMEOUT_MS
+                try:
+                    text = await asyncio.wait_for(anext(tokens), timeout_ms / 1000)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    logger.warning("Generation stalled, ending the answer", extra={"timeout_ms": timeout_ms})
+                    degraded.append("generate")
+                    text = " …" if parts else GENERATION_TIMEOUT_ANSWER
+                    parts.append(text)
+                    yield {"type": "token", "text": text}
+                    break
+                if not parts:
+                    latencies["first_token"] = round((time.perf_counter() - generation_started) * 1000, 1)
+                parts.append(text)
+                yield {"type": "token", "text": text}
+        latencies["generate"] = round((time.perf_counter() - generation_started) * 1000, 1)
+
+        yield {"type": "done", "context": [chunk["text"] for chunk in chunks],
+               "degraded": list(degraded), "stages": latencies}
+
+        # Only complete, grounded answers are reused, and only for standalone questions:
+        # the cache is shared by the department, the conversation is the asker's own
+        if chunks and not degraded and not history and not summary:
+            await semantic_cache.store(embedding, query, "".join(parts), doc_ids, scope)
+
+    # -------------------------------------------------------------
+    # 🔹 Whole answer (non-streaming clients)
+    # -------------------------------------------------------------
+    @staticmethod
+    async def answer(user: dict, query: str) -> dict:
+        result = {"answer": "", "doc_ids": [], "cached": False, "answer_id": None}
+        parts = []
+        async with aclosing(ChatService.stream_answer(user, query)) as events:
+            async for event in events:
+                if event["type"] == "sources":
+                    result["doc_ids"] = event["doc_ids"]
+                elif event["type"] == "token":
+                    parts.append(event["text"])
+                elif event["type"] == "done":
+                    result["cached"] = event["cached"]
+                    result["answer_id"] = event["answer_id"]
+                elif event["type"] == "error":
+                    raise FlightInterrupted(event["detail"])
+        result["answer"] = "".join(parts)
+        return result
+
+    # -------------------------------------------------------------
+    # 🔹 Helpers
+    # -------------------------------------------------------------
+    @staticmethod
+    def build_prompt(query: str, chunks: list[dict], history: list[tuple[str, str]] = (), summary: str = "") -> str:
+        """
+        Prompt of at most CHAT_PROMPT_MAX_TOKENS (estimated). The conversation
+        gets up to CHAT_PROMPT_HISTORY_TOKENS: the summary of earlier turns,
+        then the newest turns that fit. Context chunks fill the rest in rank
+        order, the last one cut to fit.
+        """
+        instructions = (
+            "Answer the question using only the context below. "
+            "If the context does not contain the answer, say so.\n\n"
+        )
+        question = f"Question: {query}\nAnswer:"
+        # Headings and separators included
+        budget = settings.CHAT_PROMPT_MAX_TOKENS - estimate_tokens(instructions + question) - 16
+
+        history_budget = min(settings.CHAT_PROMPT_HISTORY_TOKENS, budget)
+        conversation = []
+        if summary:
+            summary_line = _truncate(f"Summary of earlier turns: {summary}\n", history_budget)
+            conversation.append(summary_line)
+            history_budget -= estimate_tokens(summary_line)
+        recent = []
+        for q, a in reversed(history):
+            turn = f"User: {q}\nAssistant: {a}\n"
+            if estimate_tokens(turn) > history_budget:
+                break
+            recent.insert(0, turn)
+            history_budget -= estimate_tokens(turn)
+        conversation = "".join(conversation + recent)
+        budget -= estimate_tokens(conversation)
+
+        context = []
+        for chunk in chunks:
+            if budget <= 0:
+                break
+            text = _truncate(chunk["text"], budget)
+            context.append(text)
+            budget -= estimate_tokens(text) + 1
+
+        return (
+            instructions
+            + "Context:\n" + "\n\n".join(context) + "\n\n"
+            + (f"Conversation so far:\n{conversation}\n" if conversation else "")
+            + question
+        )
+
+    @staticmethod
+    async def _validate_cached(user: dict, cached: dict) -> tuple[bool, str]:
+        """
+        Monitor check before a cached answer is served: it must be non-empty
+        and every cited document must still be accessible to the user (guards
+        against a missed cache invalidation).
+        """
+        if not cached["answer"].strip():
+            return False, "empty answer"
+        if user.get("role") == "admin":
+            return True, "ok"
+
+        doc_ids = cached["doc_ids"]
+        allowed = set(await access_index.filter_allowed(user.get("department_id"), doc_ids))
+        revoked = sorted(set(doc_ids) - allowed)
+        if revoked:
+            await semantic_cache.invalidate_documents(revoked)
+            return False, f"sources no longer accessible: {revoked}"
+        return True, "ok"
+
+    @staticmethod
+    async def _save_history(user: dict, query: str, answer: str, doc_ids: list[int],
+                            embedding: list[float] | None) -> int | None:
+        """Save the exchange (batched insert); returns its chat history id (the answer id), or None if saving failed."""
+        try:
+            return await chat_history_writer.save({
+                "user_id": user["user_id"],
+                "query": query,
+                "response": answer,
+                "created_at": datetime.utcnow(),
+                "semantic_vector": array.array("f", embedding).tobytes() if embedding is not None else None,
+                "source_doc": ",".join(str(doc_id) for doc_id in doc_ids),
+            })
+        except Exception as e:
+            logger.error("Failed to save chat history: %s", e, extra={"user_id": user["user_id"]})
+            return None
@@ -0,0 +1,148 @@
+# app/services/conversation_service.py
+"""
+Conversation context for the chat prompt: the last CHAT_HISTORY_TURNS turns
+verbatim, plus a running summary of the earlier turns of the conversation,
+so the prompt stays bounded however long the chat goes on.
+
+A conversation is a user's turns without a pause longer than
+CHAT_HISTORY_MAX_AGE_SECONDS. Its summary lives in Redis:
+    chat:summary:<user_id>        hash {"summary": text, "through_id": last chat_history id folded in},
+                                  expires CHAT_HISTORY_MAX_AGE_SECONDS after the last update
+    chat:summary:<user_id>:lock   held while one worker updates the summary (SET NX, expires)
+
+After each answer the turns that have dropped out of the verbatim window are
+folded into the summary in the background (one background-priority LLM
+call, CHAT_SUMMARY_BATCH_TURNS turns at most per update). Until that update
+lands, those turns are simply missing from the prompt.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.core.llm import get_llm_provider
+from app.core.llm_scheduler import Priority
+from app.core.redis_client import get_async_redis
+from app.core.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEY = "chat:summary:{user_id}"
+SUMMARY_LOCK_KEY = "chat:summary:{user_id}:lock"
+SUMMARY_LOCK_SECONDS = 60
+
+
+class ConversationService:
+    # Detached summary updates (strong references until they finish)
+    _updates: set[asyncio.Task] = set()
+
+    # -------------------------------------------------------------
+    # 🔹 Context for the next answer
+    # -------------------------------------------------------------
+    @staticmethod
+    async def load(user: dict) -> tuple[str, list[tuple[str, str]]]:
+        """(summary of earlier turns, last turns oldest first); empty for a new conversation."""
+        if settings.CHAT_HISTORY_TURNS <= 0:
+            return "", []
+        turns, summary = await asyncio.gather(
+            asyncio.to_thread(ConversationService._recent_turns, user["user_id"]),
+            ConversationService._get_summary(user["user_id"]),
+        )
+        # A summary without recent turns belongs to a conversation that has ended
+        return (summary["summary"] if summary and turns else ""), turns
+
+    @staticmethod
+    def _recent_turns(user_id: int) -> list[tuple[str, str]]:
+        # Primary: a follow-up comes seconds after the turn it follows was written, and read
+        # from a lagging replica it would look standalone (coalesced, cached for the department)
+        with UnitOfWork(read_only=True, use_replica=False) as uow:
+            return uow.chat_history.recent_for_user(
+                user_id, settings.CHAT_HISTORY_TURNS, since=ConversationService._since(),
+            )
+
+    @staticmethod
+    async def _get_summary(user_id: int) -> dict | None:
+        if not settings.CHAT_SUMMARY_ENABLED:
+            return None
+        try:
+            client = await get_async_redis()
+            summary = await client.hgetall(SUMMARY_KEY.format(user_id=user_id))
+        except Exception as e:
+            logger.warning("Summary lookup failed, using recent turns only: %s", e, extra={"user_id": user_id})
+            return None
+        return summary or None
+
+    @staticmethod
+    def _since() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.CHAT_HISTORY_MAX_AGE_SECONDS)
+
+    # -------------------------------------------------------------
+    # 🔹 Rolling summary (background, after each answer)
+    # -------------------------------------------------------------
+    @staticmethod
+    def schedule_summary_update(user_id: int):
+        """Fold turns that left the verbatim window into the summary, without blocking the caller."""
+        if not settings.CHAT_SUMMARY_ENABLED or settings.CHAT_HISTORY_TURNS <= 0:
+            return
+        task = asyncio.create_task(ConversationService._update_summary(user_id))
+        ConversationService._updates.add(task)
+        task.add_done_callback(ConversationService._updates.discard)
+
+    @staticmethod
+    async def _update_summary(user_id: int):
+        key = SUMMARY_KEY.format(user_id=user_id)
+        lock_key = SUMMARY_LOCK_KEY.format(user_id=user_id)
+        try:
+            client = await get_async_redis()
+            # Another worker is updating: the next answer picks up what it leaves behind
+            if not await client.set(lock_key, "1", nx=True, ex=SUMMARY_LOCK_SECONDS):
+                return
+        except Exception as e:
+            logger.warning("Summary update skipped: %s", e, extra={"user_id": user_id})
+            return
+
+        try:
+            current = await client.hgetall(key)
+            through_id = int(current.get("through_id", 0))
+            turns = await asyncio.to_thread(ConversationService._turns_to_fold, user_id, through_id)
+            if not turns:
+                return
+
+            prompt = ConversationService.build_summary_prompt(
+                current.get("summary", ""), [(row.query, row.response or "") for row in turns]
+            )
+            summary = await get_llm_provider().complete(
+                prompt, settings.CHAT_SUMMARY_MAX_TOKENS, priority=Priority.BACKGROUND
+            )
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"summary": summary.strip(), "through_id": turns[-1].id})
+                pipe.expire(key, settings.CHAT_HISTORY_MAX_AGE_SECONDS)
+                await pipe.execute()
+            logger.debug("Summary updated", extra={"user_id": user_id, "through_id": turns[-1].id})
+        except Exception as e:
+            logger.warning("Summary update failed: %s", e, extra={"user_id": user_id})
+        finally:
+            try:
+                await client.delete(lock_key)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _turns_to_fold(user_id: int, through_id: int):
+        with UnitOfWork(read_only=True) as uow:
+            return uow.chat_history.turns_outside_window(
+                user_id, settings.CHAT_HISTORY_TURNS, after_id=through_id,
+                since=ConversationService._since(), limit=settings.CHAT_SUMMARY_BATCH_TURNS,
+            )
+
+    @staticmethod
+    def build_summary_prompt(summary: str, turns: list[tuple[str, str]]) -> str:
+        conversation = "".join(f"User: {q}\nAssistant: {a}\n" for q, a in turns)
+        return (
+            "Update the summary of a conversation between a user and an assistant with the new turns. "
+            "Keep the facts, names and open questions the user may refer back to; drop pleasantries. "
+            f"Answer with the updated summary only, in at most {settings.CHAT_SUMMARY_MAX_TOKENS} tokens.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New turns:\n{conversation}\n"
+            "Updated summary:"
+        )
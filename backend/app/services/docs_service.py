@@ -1,89 +1,172 @@
+import asyncio
+import logging
 from app.core.unit_of_work import UnitOfWork
-from app.core.redis_client import get_cache, set_cache, invalidate_caches
+from app.core.access_index import access_index
+from app.core.lexical_index import lexical_index
+from app.core.logging_config import sampled
+from app.core.redis_client import get_cache_field, set_cache_field, invalidate_caches
+from app.core.retrieval_cache import retrieval_cache
+from app.core.semantic_cache import semantic_cache
 from app.tasks.ingestion_task import run_ingestion_task
 from app.models.document import Document
+from app.schemas.document_schema import DocumentListParams
+
+logger = logging.getLogger(__name__)
+
+# Fields each listing may project
+LISTING_FIELDS = ("id", "title", "source_url", "status", "owner_department_id", "is_active")
+LISTING_DEFAULT_FIELDS = ("id", "title", "source_url", "status")
+ADMIN_FIELDS = LISTING_FIELDS + ("allowed_departments",)
+ADMIN_DEFAULT_FIELDS = ADMIN_FIELDS
 
 
 class DocsService:
     """Handles creation, retrieval, ownership, and access control for documents."""
 
     # -------------------------------------------------------------
-    # 🔹 List ALL documents (admin, cached)
+    # 🔹 List ALL documents (admin, cached per page)
     # -------------------------------------------------------------
     @staticmethod
-    async def list_all_documents() -> list[dict]:
+    async def list_all_documents(params: DocumentListParams) -> dict:
+        fields = DocsService._resolve_fields(params.fields, ADMIN_FIELDS, ADMIN_DEFAULT_FIELDS)
         cache_key = "docs:all"
-        cached = await get_cache(cache_key)
+        cache_field = params.cache_field(fields)
+        cached = await get_cache_field(cache_key, cache_field)
         if cached:
-            print("✅ [Redis] Cache hit for list_all_documents()")
+            if sampled(logger):
+                logger.debug("Cache hit", extra={"cache_key": cache_key, "cache_field": cache_field})
             return cached
 
-        with UnitOfWork() as uow:
-            docs = uow.documents.get_all()
-
-            result = [
-                {
-                    "id": d.id,
-                    "title": d.title,
-                    "source_url": d.source_url,
-                    "status": d.status,
-                    "allowed_departments": [dep.name for dep in d.departments],
-                    "owner_department_id": getattr(d, "owner_department_id", None),
-                    "is_active": getattr(d, "is_active", True),
-                }
-                for d in docs
-            ]
+        column_fields = [f for f in fields if f != "allowed_departments"]
+        with_allowed = "allowed_departments" in fields
+
+        # Primary, not a replica: the page is cached right after, possibly just after an invalidation
+        with UnitOfWork(read_only=True, use_replica=False) as uow:
+            rows = uow.documents.list_page(
+                column_fields,
+                params.limit + 1,
+                after_id=params.after_id,
+                status=params.status,
+                owner_department_id=params.owner_department_id,
+                with_allowed_departments=with_allowed,
+            )
+            page = DocsService._build_page(rows, params.limit)
+
+        if with_allowed:
+            # array_agg over zero rows is NULL
+            for item in page["items"]:
+                item["allowed_departments"] = item["allowed_departments"] or []
 
-        await set_cache(cache_key, result, expire_seconds=600)
-        print("💾 [Redis] Cache set for list_all_documents()")
-        return result
+        DocsService._drop_unrequested_id(page, fields)
+
+        await set_cache_field(cache_key, cache_field, page, expire_seconds=600)
+        logger.debug("Cache set", extra={"cache_key": cache_key, "cache_field": cache_field})
+        return page
 
     # -------------------------------------------------------------
-    # 🔹 List documents a department IS ALLOWED to access (cached)
+    # 🔹 List documents a department IS ALLOWED to access (cached per page)
     # -------------------------------------------------------------
     @staticmethod
-    async def list_documents_with_access(department_id: int) -> list[dict]:
+    async def list_documents_with_access(department_id: int, params: DocumentListParams) -> dict:
+        fields = DocsService._resolve_fields(params.fields, LISTING_FIELDS, LISTING_DEFAULT_FIELDS)
         cache_key = f"docs:access:{department_id}"
-        cached = await get_cache(cache_key)
+        cache_field = params.cache_field(fields)
+        cached = await get_cache_field(cache_key, cache_field)
 
         if cached:
-            print(f"✅ [Redis] Cache hit for access of department {department_id}")
+            if sampled(logger):
+                logger.debug("Cache hit", extra={"cache_key": cache_key, "department_id": department_id})
             return cached
 
-        with UnitOfWork() as uow:
-            docs = uow.documents.get_documents_with_access_for_department(department_id)
-
-            result = [
-                {
-                    "id": d.id,
-                    "title": d.title,
-                    "source_url": d.source_url,
-                    "status": d.status,
-                }
-                for d in docs
-            ]
+        # Primary, not a replica: the page is cached right after (see list_all_documents)
+        with UnitOfWork(read_only=True, use_replica=False) as uow:
+            rows = uow.documents.list_page_with_access_for_department(
+                department_id,
+                fields,
+                params.limit + 1,
+                after_id=params.after_id,
+                status=params.status,
+                owner_department_id=params.owner_department_id,
+            )
+            page = DocsService._build_page(rows, params.limit)
 
-        await set_cache(cache_key, result, expire_seconds=900)
-        print(f"💾 [Redis] Cache set for department access {department_id}")
-        return result
+        DocsService._drop_unrequested_id(page, fields)
+
+        await set_cache_field(cache_key, cache_field, page, expire_seconds=900)
+        logger.debug("Cache set", extra={"cache_key": cache_key, "department_id": department_id})
+        return page
 
     # -------------------------------------------------------------
     # 🔹 List documents OWNED by a department
     # -------------------------------------------------------------
     @staticmethod
-    async def list_owned_documents(department_id: int) -> list[dict]:
-        with UnitOfWork() as uow:
-            docs = uow.documents.get_documents_owned_by_department(department_id)
-
-            return [
-                {
-                    "id": d.id,
-                    "title": d.title,
-                    "source_url": d.source_url,
-                    "status": d.status,
-                }
-                for d in docs
-            ]
+    async def list_owned_documents(department_id: int, params: DocumentListParams) -> dict:
+        fields = DocsService._resolve_fields(params.fields, LISTING_FIELDS, LISTING_DEFAULT_FIELDS)
+
+        with UnitOfWork(read_only=True) as uow:
+            rows = uow.documents.list_page_owned_by_department(
+                department_id,
+                fields,
+                params.limit + 1,
+                after_id=params.after_id,
+                status=params.status,
+            )
+            page = DocsService._build_page(rows, params.limit)
+
+        DocsService._drop_unrequested_id(page, fields)
+        return page
+
+    # -------------------------------------------------------------
+    # 🔹 Which of these documents may the user see?
+    # -------------------------------------------------------------
+    @staticmethod
+    async def filter_viewable_document_ids(user: dict, doc_ids: list[int]) -> list[int]:
+        """Admins see every document, everyone else what their department has access to."""
+        if user.get("role") == "admin":
+            return list(doc_ids)
+        if not user.get("department_id"):
+            return []
+        return await access_index.filter_allowed(user["department_id"], doc_ids)
+
+    # -------------------------------------------------------------
+    # 🔹 Pagination helpers
+    # -------------------------------------------------------------
+    @staticmethod
+    def _resolve_fields(requested: list[str] | None, allowed: tuple, default: tuple) -> list[str]:
+        """Validate the requested projection against the fields allowed for the endpoint."""
+        if not requested:
+            return list(default)
+
+        unknown = [f for f in requested if f not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}. Must be among {list(allowed)}")
+
+        # de-duplicate while preserving order
+        return list(dict.fromkeys(requested))
+
+    @staticmethod
+    def _build_page(rows, limit: int) -> dict:
+        """
+        Turn `limit + 1` column rows into a page.
+        The extra row only tells us whether another page exists.
+        """
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Build plain dicts straight from the row tuples (keys resolved once per page)
+        keys = list(rows[0]._fields) if rows else []
+        items = [dict(zip(keys, row)) for row in rows]
+        next_after_id = items[-1]["id"] if has_more and items else None
+
+        return {"items": items, "next_after_id": next_after_id}
+
+    @staticmethod
+    def _drop_unrequested_id(page: dict, fields: list[str]):
+        """The id is always selected for the cursor; hide it when it was not asked for."""
+        if "id" in fields:
+            return
+        for item in page["items"]:
+            item.pop("id", None)
 
     # -------------------------------------------------------------
     # 🔹 Add new document (sets owner + allowed access + ingestion)
@@ -117,11 +200,16 @@ class DocsService:
             new_doc.departments = allowed_departments
             new_doc_id = new_doc.id
 
-            print(f"📄 Created document {new_doc_id} owned by department {owner_department_id}")
+            logger.info("Document created", extra={"doc_id": new_doc_id, "department_id": owner_department_id})
+
+        # New (pending) document appears in cached listing pages
+        keys = ["docs:all"] + [f"docs:access:{dep_id}" for dep_id in allowed_department_ids]
+        await invalidate_caches(keys)
+        await access_index.apply_changes(granted=[(dep_id, new_doc_id) for dep_id in allowed_department_ids])
 
         # Kick off ingestion after commit
         run_ingestion_task.delay(new_doc_id, source_url, allowed_department_ids)
-        print(f"🚀 [Celery] Ingestion task dispatched for document {new_doc_id}")
+        logger.info("Ingestion task dispatched", extra={"doc_id": new_doc_id})
 
         return {"id": new_doc_id}
 
@@ -131,22 +219,82 @@ class DocsService:
     @staticmethod
     async def update_document_access(doc_id: int, new_allowed_department_ids: list[int]):
         with UnitOfWork() as uow:
-            updated_doc = uow.documents.set_document_access(doc_id, new_allowed_department_ids)
+            change = uow.documents.set_document_access(doc_id, new_allowed_department_ids)
 
-            if not updated_doc:
+            if change is None:
                 raise ValueError("Document not found.")
 
-            allowed_names = [d.name for d in updated_doc.departments]
+            added, removed = change
+            allowed_names = uow.documents.get_allowed_department_names(doc_id)
 
-        # Invalidate caches that depend on access
-        keys = ["docs:all"] + [f"docs:access:{dep_id}" for dep_id in new_allowed_department_ids]
-        await invalidate_caches(keys)
+        # Invalidate exactly the departments whose access changed (old and new)
+        changed_department_ids = sorted(set(added) | set(removed))
+        if changed_department_ids:
+            keys = ["docs:all"] + [f"docs:access:{dep_id}" for dep_id in changed_department_ids]
+            await invalidate_caches(keys)
+
+        await access_index.apply_changes(
+            granted=[(dep_id, doc_id) for dep_id in added],
+            revoked=[(dep_id, doc_id) for dep_id in removed],
+        )
+        if changed_department_ids:
+            await semantic_cache.invalidate_documents([doc_id])
+            await retrieval_cache.bump_generations(changed_department_ids)
 
         return {
             "message": "Access permissions updated.",
             "allowed_departments": allowed_names,
+            "added_department_ids": added,
+            "removed_department_ids": removed,
         }
 
+    # -------------------------------------------------------------
+    # 🔹 Grant / revoke access for many documents at once
+    # -------------------------------------------------------------
+    @staticmethod
+    async def bulk_update_document_access(document_ids: list[int], add_department_ids: list[int],
+                                          remove_department_ids: list[int]):
+        document_ids = sorted(set(document_ids))
+        add_department_ids = sorted(set(add_department_ids))
+        remove_department_ids = sorted(set(remove_department_ids))
+
+        # Up to 5000 documents × 100 departments: keep the statement and its result off the event loop
+        added, removed = await asyncio.to_thread(
+            DocsService._change_access_bulk, document_ids, add_department_ids, remove_department_ids
+        )
+
+        changed_department_ids = sorted({dep_id for dep_id, _ in added} | {dep_id for dep_id, _ in removed})
+        if changed_department_ids:
+            keys = ["docs:all"] + [f"docs:access:{dep_id}" for dep_id in changed_department_ids]
+            await invalidate_caches(keys)
+
+        await access_index.apply_changes(granted=added, revoked=removed)
+        await semantic_cache.invalidate_documents({doc_id for _, doc_id in added + removed})
+        if changed_department_ids:
+            await retrieval_cache.bump_generations(changed_department_ids)
+
+        return {
+            "message": "Access permissions updated.",
+            "granted": len(added),
+            "revoked": len(removed),
+            "changed_department_ids": changed_department_ids,
+        }
+
+    @staticmethod
+    def _change_access_bulk(document_ids: list[int], add_department_ids: list[int],
+                            remove_department_ids: list[int]):
+        with UnitOfWork() as uow:
+            missing_docs = set(document_ids) - uow.documents.get_existing_ids(document_ids)
+            if missing_docs:
+                raise ValueError(f"Documents not found: {sorted(missing_docs)}")
+
+            requested_deps = add_department_ids + remove_department_ids
+            missing_deps = set(requested_deps) - uow.departments.get_existing_ids(requested_deps)
+            if missing_deps:
+                raise ValueError(f"Departments not found: {sorted(missing_deps)}")
+
+            return uow.documents.change_access_bulk(document_ids, add_department_ids, remove_department_ids)
+
     # -------------------------------------------------------------
     # 🔹 Delete document (invalidate caches)
     # -------------------------------------------------------------
@@ -162,5 +310,19 @@ class DocsService:
 
         keys = ["docs:all"] + [f"docs:access:{dep_id}" for dep_id in affected_department_ids]
         await invalidate_caches(keys)
+        await access_index.apply_changes(revoked=[(dep_id, doc_id) for dep_id in affected_department_ids])
+        await semantic_cache.invalidate_documents([doc_id])
+        try:
+            await asyncio.to_thread(lexical_index.delete_document, doc_id)
+        except Exception as e:
+            logger.warning("Failed to remove document from the lexical index: %s", e, extra={"doc_id": doc_id})
+        try:
+            from app.core.vector_store import delete_document_vectors
+
+            await asyncio.to_thread(delete_document_vectors, doc_id)
+        except Exception as e:
+            # Retrieval also drops chunks of documents that no longer exist
+            logger.warning("Failed to remove document from the vector store: %s", e, extra={"doc_id": doc_id})
+        await retrieval_cache.bump_generations(affected_department_ids)
 
         return {"message": f"Document {doc_id} deleted successfully."}
@@ -1,11 +1,16 @@
 # app/services/ingestion_service.py
+import logging
 import requests
 import tempfile
+import time
 from langchain_community.document_loaders import PyMuPDFLoader, UnstructuredFileLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from app.core.vector_store import get_vector_store
+from app.core.lexical_index import lexical_index
+
+logger = logging.getLogger(__name__)
 
 class DocumentIngestionService:
     """Handles only technical ingestion: download, parse, embed, store."""
@@ -17,10 +22,10 @@ class DocumentIngestionService:
             try:
                 file_id = url.split("/d/")[1].split("/")[0]
                 converted = f"https://drive.google.com/uc?export=download&id={file_id}"
-                print(f"🔗 [Drive] Converted to direct download: {converted}")
+                logger.debug("Converted Drive link to direct download", extra={"url": converted})
                 return converted
             except Exception as e:
-                print(f"⚠️ [Drive] Failed to parse link: {e}")
+                logger.warning("Failed to parse Drive link: %s", e, extra={"url": url})
         return url
 
     @staticmethod
@@ -32,16 +37,33 @@ class DocumentIngestionService:
             raise Exception(f"Download failed ({response.status_code}) for {url}")
         with open(tmp_path, "wb") as f:
             f.write(response.content)
-        print(f"📥 [Downloader] File saved to {tmp_path}")
+        logger.debug("File downloaded", extra={"path": tmp_path, "bytes": len(response.content)})
         return tmp_path
 
     @staticmethod
     def ingest_from_url_sync(doc_id: int, source_url: str):
-        """Run the ingestion synchronously (for Celery worker)."""
-        print(f"🚀 [Ingestion] Starting pipeline for doc {doc_id}")
+        """
+        Run the ingestion synchronously (for Celery worker).
+        The result carries the duration of each stage ("stage_seconds"), which
+        travels with the ingestion_complete event to the API's metrics.
+        """
+        logger.info("Starting ingestion pipeline", extra={"doc_id": doc_id})
+        stage_seconds: dict[str, float] = {}
+        started = time.perf_counter()
+
+        def stage_done(stage: str, **fields):
+            nonlocal started
+            now = time.perf_counter()
+            stage_seconds[stage] = round(now - started, 4)
+            logger.info(
+                "Ingestion stage finished",
+                extra={"doc_id": doc_id, "stage": stage, "duration_ms": round((now - started) * 1000, 1), **fields},
+            )
+            started = now
 
         download_url = DocumentIngestionService._convert_drive_link(source_url)
         file_path = DocumentIngestionService._download_file(download_url)
+        stage_done("download")
 
         # Load PDF or fallback
         try:
@@ -50,12 +72,19 @@ class DocumentIngestionService:
         except Exception:
             loader = UnstructuredFileLoader(file_path)
             docs = loader.load()
-        print(f"📄 Loaded {len(docs)} pages")
+        stage_done("load", pages=len(docs))
 
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
         chunks = splitter.split_documents(docs)
-        print(f"✂️ Split into {len(chunks)} chunks")
+        stage_done("split", chunks=len(chunks))
+
+        # Retrieval filters chunks by document access, so every chunk carries its document id
+        for chunk in chunks:
+            chunk.metadata["doc_id"] = doc_id
         vector_store = get_vector_store()
         vector_store.add_documents(chunks)
-        print(f"💾 Stored {len(chunks)} chunks for doc {doc_id}")
-        return {"doc_id": doc_id, "status": "ingested"}
+        stage_done("embed")
+        # Same chunks in the BM25 index (replaces a previous ingestion of this document)
+        lexical_index.replace_document(doc_id, [chunk.page_content for chunk in chunks])
+        stage_done("index", chunks=len(chunks))
+        return {"doc_id": doc_id, "status": "ingested", "stage_seconds": stage_seconds}
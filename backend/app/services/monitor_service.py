@@ -0,0 +1,152 @@
+# app/services/monitor_service.py
+"""
+Validation of chat answers against the sources they were generated from.
+
+Checks: the answer must be non-empty and mostly made of terms that occur
+in its sources (MONITOR_MIN_GROUNDING); with MONITOR_LLM_JUDGE the LLM is
+then asked whether the sources support it.
+
+MONITOR_MODE decides where that runs:
+    "sync"   before the chat done event (adds a full LLM call to every answer)
+    "async"  the answer is returned at once and validated on the Celery
+             "monitor" queue (app/tasks/monitor_task.py); a failed answer is
+             flagged or retracted over the user's WebSocket afterwards
+Under load only MONITOR_SAMPLE_RATE of the answers is validated, and none
+while more than MONITOR_MAX_BACKLOG validations are queued.
+
+Every outcome (validated or not) is appended to the monitor stream
+(MONITOR_STREAM) and written to MonitorLog in batches by the API workers.
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from datetime import datetime
+
+from app.config import settings
+from app.core.celery_app import MONITOR_QUEUE, celery_app
+from app.core.llm import get_llm_provider
+from app.core.llm_scheduler import Priority
+from app.core.redis_client import append_monitor_result, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+VALIDATE_TASK = "app.tasks.monitor_task.validate_answer_task"
+VERDICT_KEY = "monitor:verdict:{digest}"
+
+_TERM = re.compile(r"[a-z0-9]{4,}")
+_VERDICT = re.compile(r"\b(UNSUPPORTED|SUPPORTED)\b")
+
+
+class MonitorService:
+    # ------------------------------------------------------------
+    # 🔹 Validation
+    # ------------------------------------------------------------
+    @staticmethod
+    async def validate_answer(query: str, answer: str, context: list[str]) -> tuple[bool, str]:
+        """(valid, reason) for an answer generated from the `context` chunks."""
+        if not answer.strip():
+            return False, "empty answer"
+        if not context:
+            return False, "no sources"
+
+        grounding = MonitorService.grounding(answer, context)
+        if grounding < settings.MONITOR_MIN_GROUNDING:
+            return False, f"answer not grounded in its sources ({grounding:.0%} of terms)"
+        if not settings.MONITOR_LLM_JUDGE:
+            return True, f"grounded ({grounding:.0%} of terms)"
+
+        judgement = await get_llm_provider().complete(
+            MonitorService.build_judge_prompt(query, answer, context), 8, priority=Priority.BACKGROUND
+        )
+        verdict = _VERDICT.search(judgement.upper())
+        if verdict is None:
+            # An unusable verdict never overrides the grounding check
+            return True, f"grounded ({grounding:.0%} of terms), no judge verdict"
+        if verdict.group(1) == "UNSUPPORTED":
+            return False, "judged unsupported by its sources"
+        return True, f"grounded ({grounding:.0%} of terms), judged supported"
+
+    @staticmethod
+    def grounding(answer: str, context: list[str]) -> float:
+        """Share of the answer's terms (4+ characters) that occur in the sources."""
+        terms = _TERM.findall(answer.lower())
+        if not terms:
+            return 1.0
+        source_terms = set(_TERM.findall(" ".join(context).lower()))
+        return sum(term in source_terms for term in terms) / len(terms)
+
+    @staticmethod
+    def build_judge_prompt(query: str, answer: str, context: list[str]) -> str:
+        sources = "\n\n".join(context)
+        return (
+            "Is every statement of the answer supported by the sources? "
+            "Reply with exactly one word: SUPPORTED or UNSUPPORTED.\n\n"
+            f"Sources:\n{sources}\n\nQuestion: {query}\nAnswer: {answer}\nVerdict:"
+        )
+
+    @staticmethod
+    def verdict_key(query: str, answer: str, context: list[str]) -> str:
+        """Redis key of a memoized verdict (coalesced requests validate the same answer)."""
+        digest = hashlib.sha256("\x1f".join([query, answer, *context]).encode()).hexdigest()
+        return VERDICT_KEY.format(digest=digest)
+
+    # ------------------------------------------------------------
+    # 🔹 Recording (after the answer was returned)
+    # ------------------------------------------------------------
+    @staticmethod
+    async def submit(user: dict, answer_id: int, query: str, answer: str, context: list[str],
+                     doc_ids: list[int], reason: str, latencies: dict[str, float],
+                     validate: bool = True, verdict: tuple[bool, str] | None = None):
+        """
+        Record the outcome for a saved answer: `verdict` if it was already
+        validated, otherwise queue the validation ("async" mode) or record
+        the answer as not validated (`validate` False, sampled out, backlog).
+        """
+        result = {
+            "answer_id": answer_id,
+            "user_id": user["user_id"],
+            "doc_ids": doc_ids,
+            "stage_latencies": latencies,
+            "created_at": datetime.utcnow().isoformat(),
+            "flagged": False,
+        }
+
+        if verdict is None and validate:
+            skipped = await MonitorService._skip_reason()
+            if skipped is None:
+                try:
+                    await asyncio.to_thread(
+                        celery_app.send_task, VALIDATE_TASK,
+                        args=[{**result, "query": query, "answer": answer, "context": context, "reason": reason}],
+                    )
+                    return
+                except Exception as e:
+                    logger.warning("Failed to queue answer validation: %s", e, extra={"answer_id": answer_id})
+                    skipped = "queue unavailable"
+            reason = f"{reason}, not validated ({skipped})"
+        elif not validate:
+            reason = f"{reason}, not validated"
+
+        if verdict is not None:
+            valid, verdict_reason = verdict
+            result.update(valid=valid, reason=f"{reason}, {verdict_reason}", flagged=not valid)
+        else:
+            result.update(valid=None, reason=reason)
+        await append_monitor_result(result)
+
+    @staticmethod
+    async def _skip_reason() -> str | None:
+        """Why this answer is not validated now, or None to validate it."""
+        if random.random() >= settings.MONITOR_SAMPLE_RATE:
+            return "sampled out"
+        try:
+            client = await get_async_redis()
+            backlog = await client.llen(MONITOR_QUEUE)
+        except Exception as e:
+            logger.warning("Cannot read the validation backlog: %s", e)
+            return "queue unavailable"
+        if backlog >= settings.MONITOR_MAX_BACKLOG:
+            return f"backlog of {backlog}"
+        return None
@@ -0,0 +1,148 @@
+# app/services/retrieval_service.py
+import asyncio
+import logging
+
+from app.config import settings
+from app.core.access_index import access_index
+from app.core.lexical_index import lexical_index
+from app.core.reranker import reranker
+from app.core.retrieval_cache import normalize_query, retrieval_cache
+from app.core.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: list[list[dict]], k: int) -> list[dict]:
+    """
+    Merge ranked chunk lists: each chunk scores sum(1 / (k + rank)) over the
+    lists it appears in (rank from 1). Chunks are identified by (doc_id, text).
+    Returns the merged list, best first, with an "rrf_score" on each chunk.
+    """
+    fused: dict[tuple, dict] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = (chunk["doc_id"], chunk["text"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**chunk, "rrf_score": 0.0}
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda chunk: chunk["rrf_score"], reverse=True)
+
+
+class RetrievalService:
+    """Finds the document chunks a user may see that best match a query."""
+
+    @staticmethod
+    async def embed_query(query: str) -> list[float]:
+        """Query embedding, memoized per normalized query across workers."""
+        query = normalize_query(query)
+        embedding = await retrieval_cache.get_embedding(query)
+        if embedding is None:
+            from app.core.vector_store import embed_query
+
+            embedding = await asyncio.to_thread(embed_query, query)
+            await retrieval_cache.store_embedding(query, embedding)
+        return embedding
+
+    @staticmethod
+    async def retrieve(user: dict, query: str, embedding: list[float] | None,
+                       k: int | None = None) -> list[dict]:
+        """
+        Top-k chunks for a query, restricted to documents the user can access.
+        Results are cached per (normalized query, department scope, corpus
+        generation); see app/core/retrieval_cache.py. Without an embedding
+        (embedding stage over its deadline) only the lexical search runs.
+        Returns [{"doc_id", "text", "rrf_score", ...}], best first.
+        With RERANK_ENABLED, k defaults to RERANK_TOP_K: reranked chunks are
+        relevant enough that generation needs fewer of them.
+        """
+        k = k or (settings.RERANK_TOP_K if settings.RERANK_ENABLED else settings.CHAT_RETRIEVAL_K)
+        key = await retrieval_cache.result_key(user, normalize_query(query), k)
+        if key is not None:
+            cached = await retrieval_cache.get_results(key)
+            if cached is not None:
+                return cached
+
+        chunks, complete = await RetrievalService._search(user, query, embedding, k)
+        # Degraded results (a search or the rerank over budget) are not worth keeping
+        if key is not None and complete:
+            await retrieval_cache.store_results(key, chunks)
+        return chunks
+
+    @staticmethod
+    async def _search(user: dict, query: str, embedding: list[float] | None,
+                      k: int) -> tuple[list[dict], bool]:
+        """
+        Vector (Chroma) and lexical (BM25) searches run concurrently, each
+        over-fetching CHAT_RETRIEVAL_OVERFETCH x k candidates; a search still
+        running after RETRIEVAL_SEARCH_TIMEOUT_MS is dropped. Candidates are
+        filtered through the access index (admins: against existing documents), merged by reciprocal-rank fusion
+        and, optionally, reranked by a cross-encoder.
+        Returns (chunks, False if any part was skipped for time or errors).
+        """
+        n = k * settings.CHAT_RETRIEVAL_OVERFETCH
+        if settings.RERANK_ENABLED:
+            n = max(n, settings.RERANK_MAX_CANDIDATES)
+
+        searches = []
+        if embedding is not None:
+            searches.append(asyncio.create_task(asyncio.to_thread(RetrievalService._vector_search, embedding, n)))
+        if settings.RETRIEVAL_HYBRID or embedding is None:
+            searches.append(asyncio.create_task(asyncio.to_thread(RetrievalService._lexical_search, query, n)))
+        try:
+            done, pending = await asyncio.wait(searches, timeout=settings.RETRIEVAL_SEARCH_TIMEOUT_MS / 1000)
+        finally:
+            for task in searches:
+                task.cancel()
+        if pending:
+            logger.warning(
+                "%d search(es) over the deadline, dropped", len(pending),
+                extra={"timeout_ms": settings.RETRIEVAL_SEARCH_TIMEOUT_MS},
+            )
+        # Searches keep their order (vector first) so fusion ties break the same way
+        rankings = [task.result() for task in searches if task in done]
+        complete = embedding is not None and not pending
+
+        # Chunks ingested without a document id can't be access-checked
+        rankings = [[c for c in ranking if c["doc_id"] is not None] for ranking in rankings]
+        candidate_ids = list({c["doc_id"] for ranking in rankings for c in ranking})
+        if user.get("role") != "admin":
+            allowed = set(await access_index.filter_allowed(user.get("department_id"), candidate_ids))
+        else:
+            # Admins skip the access check, but not chunks a deleted document left behind
+            allowed = await asyncio.to_thread(RetrievalService._existing_ids, candidate_ids)
+        rankings = [[c for c in ranking if c["doc_id"] in allowed] for ranking in rankings]
+
+        fused = reciprocal_rank_fusion(rankings, settings.RETRIEVAL_RRF_K)
+        if not settings.RERANK_ENABLED or len(fused) <= 1:
+            return fused[:k], complete
+
+        reranked = await reranker.rerank(query, fused)
+        if reranked is None:
+            return fused[:k], False
+        return reranked[:k], complete
+
+    @staticmethod
+    def _existing_ids(doc_ids: list[int]) -> set[int]:
+        # Primary: a lagging replica would still list a document just deleted
+        with UnitOfWork(read_only=True, use_replica=False) as uow:
+            return uow.documents.get_existing_ids(doc_ids)
+
+    @staticmethod
+    def _vector_search(embedding: list[float], n: int) -> list[dict]:
+        from app.core.vector_store import get_vector_store
+
+        results = get_vector_store().similarity_search_by_vector_with_relevance_scores(embedding, k=n)
+        return [
+            {"doc_id": doc.metadata.get("doc_id"), "text": doc.page_content, "distance": distance}
+            for doc, distance in results
+        ]
+
+    @staticmethod
+    def _lexical_search(query: str, n: int) -> list[dict]:
+        try:
+            return lexical_index.search(query, n)
+        except Exception as e:
+            # Vector results alone are still a usable answer
+            logger.warning("Lexical search failed, using vectors only: %s", e)
+            return []
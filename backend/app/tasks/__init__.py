@@ -1 +1,3 @@
 from .ingestion_task import run_ingestion_task
+from .monitor_task import validate_answer_task
+from .archive_task import archive_chat_history_task
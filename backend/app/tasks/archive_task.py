@@ -0,0 +1,14 @@
+# app/tasks/archive_task.py
+import logging
+from app.core.celery_app import celery_app
+from app.services.chat_history_service import ChatHistoryService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.archive_task.archive_chat_history_task")
+def archive_chat_history_task():
+    logger.info("Archiving old chat history")
+    archived = ChatHistoryService.archive_old_history_sync()
+    logger.info("%d chat history row(s) archived", archived)
+    return archived
@@ -0,0 +1,46 @@
+# app/tasks/monitor_task.py
+import asyncio
+import json
+import logging
+
+from app.config import settings
+from app.core.celery_app import celery_app
+from app.core.llm import close_llm_provider
+from app.core.redis_client import append_monitor_result_sync, get_sync_redis
+from app.services.monitor_service import MonitorService
+
+logger = logging.getLogger(__name__)
+
+
+async def _validate(query: str, answer: str, context: list[str]) -> tuple[bool, str]:
+    try:
+        return await MonitorService.validate_answer(query, answer, context)
+    finally:
+        # Pooled connections belong to this task's event loop
+        await close_llm_provider()
+
+
+@celery_app.task(name="app.tasks.monitor_task.validate_answer_task")
+def validate_answer_task(job: dict):
+    """Validate a returned answer and append the outcome to the monitor stream."""
+    query, answer, context = job.pop("query"), job.pop("answer"), job.pop("context")
+    reason = job.pop("reason")
+    verdict_key = MonitorService.verdict_key(query, answer, context)
+
+    client = get_sync_redis()
+    try:
+        cached = client.get(verdict_key)
+        if cached is not None:
+            valid, verdict_reason = json.loads(cached)
+        else:
+            valid, verdict_reason = asyncio.run(_validate(query, answer, context))
+            client.set(verdict_key, json.dumps([valid, verdict_reason]), ex=settings.MONITOR_VERDICT_TTL_SECONDS)
+    finally:
+        client.close()
+
+    append_monitor_result_sync({**job, "valid": valid, "reason": f"{reason}, {verdict_reason}", "flagged": not valid})
+    logger.log(
+        logging.INFO if valid else logging.WARNING,
+        "Answer %s: %s", "validated" if valid else "flagged", verdict_reason,
+        extra={"answer_id": job["answer_id"], "user_id": job.get("user_id")},
+    )
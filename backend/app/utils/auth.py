@@ -1,15 +1,33 @@
 # app/dependencies/auth.py
+import hmac
 from fastapi import Header, HTTPException, status, Depends
 from typing import Optional
-from app.utils.jwt import decode_access_token
-import json
+from app.config import settings
+from app.core.token_revocation import revocation_list
+from app.utils.jwt import forget_access_token, verify_access_token
 
 
 # ------------------------------------------------------
 #  Extract JWT manually from the Authorization header
 # ------------------------------------------------------
 
-def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+async def authenticate_token(token: str) -> dict | None:
+    """
+    Verified payload of a token, or None if it is invalid, expired or revoked.
+    Repeated calls with the same token hit the verified-token cache.
+    """
+    payload = verify_access_token(token)
+    if payload is None:
+        return None
+
+    if await revocation_list.is_revoked(payload.get("jti")):
+        forget_access_token(token)
+        return None
+
+    return payload
+
+
+async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     """
     Extracts and verifies the JWT token manually from the Authorization header.
     Expected format: 'Authorization: Bearer <token>'
@@ -27,7 +45,7 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
         )
 
     token = authorization.split(" ")[1]
-    payload = decode_access_token(token)
+    payload = await authenticate_token(token)
 
     if not payload:
         raise HTTPException(
@@ -35,13 +53,6 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
             detail="Invalid or expired token",
         )
 
-    # Parse payload if encoded as JSON string
-    if isinstance(payload, str):
-        try:
-            payload = json.loads(payload)
-        except Exception:
-            pass
-
     return payload
 
 
@@ -49,7 +60,7 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
 #  Role-based access guards
 # ------------------------------------------------------
 
-def require_user(user: dict = Depends(get_current_user)):
+async def require_user(user: dict = Depends(get_current_user)):
     """Accessible to any authenticated user."""
     if not user:
         raise HTTPException(
@@ -59,7 +70,7 @@ def require_user(user: dict = Depends(get_current_user)):
     return user
 
 
-def require_admin(user: dict = Depends(get_current_user)):
+async def require_admin(user: dict = Depends(get_current_user)):
     """Restrict access to admin users only."""
     if user.get("role") != "admin":
         raise HTTPException(
@@ -69,7 +80,23 @@ def require_admin(user: dict = Depends(get_current_user)):
     return user
 
 
-def require_user_with_department(user: dict = Depends(get_current_user)):
+async def require_scrape_token(authorization: Optional[str] = Header(None)):
+    """
+    Static bearer token of the metrics scraper (METRICS_SCRAPE_TOKEN): Prometheus
+    cannot renew an expiring admin JWT. Without a configured token the endpoint does not exist.
+    """
+    if not settings.METRICS_SCRAPE_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    expected = f"Bearer {settings.METRICS_SCRAPE_TOKEN}".encode()
+    if not authorization or not hmac.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid scrape token",
+        )
+
+
+async def require_user_with_department(user: dict = Depends(get_current_user)):
     """
     Ensure that the user belongs to a department.
     Admins automatically pass.
@@ -1,11 +1,26 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
-# Use Argon2 exclusively
+from app.config import settings
+
+# Use Argon2 exclusively. Cost parameters come from settings: hashes made with
+# other parameters still verify, and are flagged for rehash on the next login.
 pwd_context = CryptContext(
     schemes=["argon2"],
-    deprecated="auto"
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
 )
 
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
 def hash_password(password: str) -> str:
     """
     Hash a password using Argon2 (strong, memory-hard algorithm).
@@ -18,3 +33,59 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a password against its Argon2 hash.
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+# ------------------------------------------------------------
+# 🔹 Async variants (bounded executor, never on the event loop)
+# ------------------------------------------------------------
+class _HashingExecutor:
+    """
+    Dedicated thread pool for Argon2. argon2-cffi releases the GIL while
+    hashing, so threads hash in parallel without blocking the event loop.
+    At most PASSWORD_HASH_MAX_PENDING hashes may be running or queued;
+    beyond that callers get HashingBusyError instead of waiting forever.
+    """
+
+    def __init__(self):
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2"
+            )
+        return self._pool
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+                raise HashingBusyError("Too many concurrent password operations.")
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+hashing_executor = _HashingExecutor()
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_executor.run(hash_password, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password off the event loop.
+    Returns (valid, new_hash); new_hash is set when the stored hash was made
+    with outdated cost parameters and should be replaced.
+    """
+    return await hashing_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -1,3 +1,7 @@
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.config import settings
@@ -8,10 +12,10 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hour
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
-    """Create a signed JWT token."""
+    """Create a signed JWT token with a unique id (`jti`) so it can be revoked."""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str) -> dict | None:
@@ -21,3 +25,40 @@ def decode_access_token(token: str) -> dict | None:
         return payload
     except JWTError:
         return None
+
+
+# ------------------------------------------------------------
+# 🔹 Verified-token cache
+# ------------------------------------------------------------
+# key = SHA-256 digest of the token, value = verified payload (LRU order)
+_verified_tokens: "OrderedDict[bytes, dict]" = OrderedDict()
+
+
+def verify_access_token(token: str) -> dict | None:
+    """
+    decode_access_token() with a bounded in-process cache: a token whose
+    signature was already verified is accepted again without crypto work
+    until its own `exp`. Keyed by digest so raw tokens are not kept around.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            _verified_tokens.move_to_end(key)
+            return payload
+        del _verified_tokens[key]
+        return None
+
+    payload = decode_access_token(token)
+    if payload is None or "exp" not in payload:
+        return payload
+
+    _verified_tokens[key] = payload
+    if len(_verified_tokens) > settings.AUTH_TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return payload
+
+
+def forget_access_token(token: str):
+    """Drop a token from the verified cache (e.g. once it is revoked)."""
+    _verified_tokens.pop(hashlib.sha256(token.encode()).digest(), None)
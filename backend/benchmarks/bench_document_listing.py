@@ -0,0 +1,212 @@
+# benchmarks/bench_document_listing.py
+"""
+Benchmark the document listing read path: full ORM hydration (the old
+implementation) against the column-only repository methods.
+
+Seeds a scratch PostgreSQL database with DEPARTMENTS x DOCUMENTS and reports
+the median query and JSON serialization time of each variant.
+
+Usage (from backend/):
+    python -m benchmarks.bench_document_listing --database-url postgresql://.../knowserve_bench
+
+⚠️ Point --database-url at a throwaway database: it is migrated to head and
+seeded, and --reseed truncates the tables first.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade_database
+from app.models import Department, Document, Organization, User
+from app.models.user import UserRole
+from app.models.department_documents_access import DepartmentDocumentAccess
+from app.repositories.document_repository import DocumentRepository
+
+
+# ---------------------------
+# Seeding
+# ---------------------------
+def seed(session, departments: int, documents: int, max_access: int,
+         users_per_department: int = 50, batch_size: int = 5000):
+    """Insert departments (with users), documents and random access rows (owner always included)."""
+    rng = random.Random(42)
+
+    org_id = session.execute(
+        insert(Organization).values(name="bench-org").returning(Organization.id)
+    ).scalar_one()
+    dep_ids = list(session.execute(
+        insert(Department).returning(Department.id),
+        [{"name": f"Department {i}", "organization_id": org_id} for i in range(departments)],
+    ).scalars())
+
+    session.execute(insert(User), [
+        {
+            "name": f"User {dep_id}-{i}",
+            "email": f"user{dep_id}-{i}@example.com",
+            "password_hash": "not-a-real-hash",
+            "role": UserRole.MANAGER if i == 0 else UserRole.EMPLOYEE,
+            "department_id": dep_id,
+        }
+        for dep_id in dep_ids
+        for i in range(users_per_department)
+    ])
+
+    for start in range(0, documents, batch_size):
+        count = min(batch_size, documents - start)
+        owners = [rng.choice(dep_ids) for _ in range(count)]
+        doc_ids = list(session.execute(
+            insert(Document).returning(Document.id, sort_by_parameter_order=True),
+            [
+                {
+                    "title": f"Policy document {start + i}",
+                    "source_url": f"https://docs.example.com/{start + i}.pdf",
+                    "status": rng.choice(["ingested", "ingested", "ingested", "pending", "failed"]),
+                    "is_active": True,
+                    "owner_department_id": owner,
+                }
+                for i, owner in enumerate(owners)
+            ],
+        ).scalars())
+
+        access_rows = []
+        for doc_id, owner in zip(doc_ids, owners):
+            allowed = {owner, *rng.sample(dep_ids, rng.randint(0, max_access - 1))}
+            access_rows.extend({"department_id": d, "document_id": doc_id} for d in allowed)
+        session.execute(insert(DepartmentDocumentAccess), access_rows)
+        session.commit()
+        print(f"🌱 Seeded {start + count}/{documents} documents")
+
+    session.execute(text("ANALYZE"))
+    session.commit()
+
+
+# ---------------------------
+# Variants
+# ---------------------------
+def orm_access_list(session, department_id):
+    """Previous implementation: full entities + joined departments."""
+    docs = (
+        session.query(Document)
+            .join(Document.departments)
+            .filter(Department.id == department_id)
+            .all()
+    )
+    return [
+        {"id": d.id, "title": d.title, "source_url": d.source_url, "status": d.status}
+        for d in docs
+    ]
+
+
+def column_access_list(session, department_id):
+    rows = DocumentRepository(session).get_documents_with_access_for_department(department_id)
+    return [row._asdict() for row in rows]
+
+
+def column_access_page(session, department_id, limit):
+    rows = DocumentRepository(session).list_page_with_access_for_department(
+        department_id, ["id", "title", "source_url", "status"], limit
+    )
+    return [row._asdict() for row in rows]
+
+
+def orm_admin_page(session, limit):
+    """Previous admin shape, restricted to one page so it stays comparable."""
+    docs = session.query(Document).order_by(Document.id).limit(limit).all()
+    return [
+        {
+            "id": d.id,
+            "title": d.title,
+            "source_url": d.source_url,
+            "status": d.status,
+            "allowed_departments": [dep.name for dep in d.departments],
+            "owner_department_id": d.owner_department_id,
+            "is_active": d.is_active,
+        }
+        for d in docs
+    ]
+
+
+def column_admin_page(session, limit):
+    rows = DocumentRepository(session).list_page(
+        ["id", "title", "source_url", "status", "owner_department_id", "is_active"],
+        limit,
+        with_allowed_departments=True,
+    )
+    return [row._asdict() for row in rows]
+
+
+def measure(label, session_factory, fn, repeat):
+    query_times, serialize_times = [], []
+    for _ in range(repeat):
+        session = session_factory()
+        try:
+            start = time.perf_counter()
+            result = fn(session)
+            query_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            payload = json.dumps(result)
+            serialize_times.append(time.perf_counter() - start)
+        finally:
+            session.close()
+
+    print(
+        f"{label:<38} rows={len(result):>6}  "
+        f"query={statistics.median(query_times) * 1000:>9.2f} ms  "
+        f"serialize={statistics.median(serialize_times) * 1000:>8.2f} ms  "
+        f"size={len(payload) / 1024:>8.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--departments", type=int, default=100)
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--max-access", type=int, default=10, help="Max departments per document")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reseed", action="store_true")
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    SessionFactory = sessionmaker(bind=engine)
+
+    with SessionFactory() as session:
+        if args.reseed:
+            session.execute(text(
+                "TRUNCATE department_documents_access, documents, users, departments, organizations "
+                "RESTART IDENTITY CASCADE"
+            ))
+            session.commit()
+        if session.query(func.count(Document.id)).scalar() == 0:
+            seed(session, args.departments, args.documents, args.max_access)
+
+        # Benchmark the department with the most accessible documents
+        department_id = (
+            session.query(DepartmentDocumentAccess.department_id)
+                .group_by(DepartmentDocumentAccess.department_id)
+                .order_by(func.count().desc())
+                .limit(1)
+                .scalar()
+        )
+
+    print(f"\n📊 department={department_id}, page_size={args.page_size}, median of {args.repeat} runs\n")
+    measure("access list, ORM (old)", SessionFactory, lambda s: orm_access_list(s, department_id), args.repeat)
+    measure("access list, columns", SessionFactory, lambda s: column_access_list(s, department_id), args.repeat)
+    measure("access page, columns", SessionFactory,
+            lambda s: column_access_page(s, department_id, args.page_size), args.repeat)
+    measure("admin page, ORM + joined deps (old)", SessionFactory,
+            lambda s: orm_admin_page(s, args.page_size), args.repeat)
+    measure("admin page, columns + array_agg", SessionFactory,
+            lambda s: column_admin_page(s, args.page_size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
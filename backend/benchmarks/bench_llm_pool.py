@@ -0,0 +1,93 @@
+# benchmarks/bench_llm_pool.py
+"""
+Load test of the "http" LLM provider and its scheduler against the local
+stub server (benchmarks/llm_stub_server.py, started separately).
+
+Fires --interactive chat-like calls spread over --departments departments
+plus --background validation-like calls, all at once, and prints per
+priority the time to first token (admission wait included) and the total
+time, then the failed calls (429 after LLM_MAX_RETRIES) and the stub's
+counters: with the scheduler limits below the stub's limits there should be
+(almost) no 429s, and interactive calls should start before background ones.
+
+Usage (from backend/):
+    python -m benchmarks.llm_stub_server --tpm 60000 --max-concurrency 8 &
+    python -m benchmarks.bench_llm_pool --interactive 60 --background 60
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def call(provider, priority, department: str, prompt: str, max_tokens: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    first = None
+    async for _piece in provider.stream(prompt, max_tokens, priority=priority, department=department):
+        first = first or time.perf_counter() - started
+    return (first or 0) * 1000, (time.perf_counter() - started) * 1000
+
+
+async def run(args):
+    from app.core.llm import close_llm_provider, get_llm_provider
+    from app.core.llm_scheduler import Priority
+
+    provider = get_llm_provider()
+    prompt = "context " * args.prompt_words
+    jobs = [
+        (Priority.INTERACTIVE, f"deps:{i % args.departments}", args.max_tokens) for i in range(args.interactive)
+    ] + [
+        (Priority.BACKGROUND, None, 8) for _ in range(args.background)
+    ]
+    started = time.perf_counter()
+    results = await asyncio.gather(*[call(provider, p, d, prompt, n) for p, d, n in jobs], return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    await close_llm_provider()
+
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"{len(jobs)} calls in {elapsed:.1f}s, {failed} failed\n")
+    print(f"{'priority':<12}  {'first p50':>10}  {'first p99':>10}  {'total p50':>10}  {'total p99':>10}")
+    for priority in Priority:
+        rows = [result for (p, _, _), result in zip(jobs, results)
+                if p == priority and not isinstance(result, Exception)]
+        if not rows:
+            continue
+        firsts, totals = [r[0] for r in rows], [r[1] for r in rows]
+        print(f"{priority.name.lower():<12}  {statistics.median(firsts):>7.0f} ms  {percentile(firsts, 0.99):>7.0f} ms  "
+              f"{statistics.median(totals):>7.0f} ms  {percentile(totals, 0.99):>7.0f} ms")
+
+    async with httpx.AsyncClient() as client:
+        stats = (await client.get(settings.LLM_BASE_URL.rsplit("/v1", 1)[0] + "/stats")).json()
+    print(f"\nstub: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8100/v1")
+    parser.add_argument("--interactive", type=int, default=60)
+    parser.add_argument("--background", type=int, default=60)
+    parser.add_argument("--departments", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--prompt-words", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=settings.LLM_MAX_CONCURRENCY)
+    parser.add_argument("--tpm", type=int, default=settings.LLM_TOKENS_PER_MINUTE)
+    args = parser.parse_args()
+
+    settings.LLM_PROVIDER = "http"
+    settings.LLM_BASE_URL = args.url
+    settings.LLM_MAX_CONCURRENCY = args.concurrency
+    settings.LLM_TOKENS_PER_MINUTE = args.tpm
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
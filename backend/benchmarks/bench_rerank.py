@@ -0,0 +1,109 @@
+# benchmarks/bench_rerank.py
+"""
+Cost / benefit benchmark for the cross-encoder rerank stage.
+
+Latency: scores RERANK_MAX_CANDIDATES-sized batches of synthetic ~200-word
+chunks with the configured model (or --model) and reports p50 / p99 for
+one batched forward pass vs. scoring the same pairs one at a time.
+
+Context shrink (needs labelled data, --eval): a JSONL file with one line per
+question, candidates in the order retrieval returns them today:
+    {"query": "...", "candidates": ["chunk text", ...], "relevant": [0, 7]}
+For retrieval order and reranked order it prints recall@k (share of
+relevant chunks within the first k) and the smallest k reaching
+--target recall; the ratio between the two is how far CHAT_RETRIEVAL_K
+(context tokens sent to the LLM) can shrink when RERANK_TOP_K is used.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rerank
+    python -m benchmarks.bench_rerank --candidates 10 20 40 --eval eval/rerank.jsonl
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.config import settings
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def timed(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_latency(model, candidates: list[int], words: int, repeat: int, rng: random.Random):
+    vocabulary = [f"term{i}" for i in range(5000)]
+    query = " ".join(rng.choices(vocabulary, k=10))
+    print(f"{'candidates':>10}  {'batched p50':>12}  {'batched p99':>12}  {'one-by-one p50':>15}")
+    for n in candidates:
+        pairs = [(query, " ".join(rng.choices(vocabulary, k=words))) for _ in range(n)]
+        batched = timed(lambda: model.predict(pairs, batch_size=n, show_progress_bar=False), repeat)
+        single = timed(lambda: [model.predict([pair], show_progress_bar=False) for pair in pairs], max(1, repeat // 5))
+        print(f"{n:>10}  {statistics.median(batched):>9.1f} ms  {percentile(batched, 0.99):>9.1f} ms  "
+              f"{statistics.median(single):>12.1f} ms")
+
+
+def recall_at(order: list[int], relevant: set[int], k: int) -> float:
+    return len(relevant.intersection(order[:k])) / len(relevant)
+
+
+def bench_shrink(model, path: str, target: float, max_candidates: int):
+    with open(path) as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    orders = {"retrieval": [], "reranked": []}
+    relevant_sets = []
+    for question in questions:
+        candidates = question["candidates"][:max_candidates]
+        relevant_sets.append({i for i in question["relevant"] if i < len(candidates)})
+        scores = model.predict([(question["query"], text) for text in candidates],
+                               batch_size=len(candidates), show_progress_bar=False)
+        orders["retrieval"].append(list(range(len(candidates))))
+        orders["reranked"].append(sorted(range(len(candidates)), key=lambda i: -scores[i]))
+
+    pairs = [(i, relevant) for i, relevant in enumerate(relevant_sets) if relevant]
+    print(f"\n{len(pairs)} labelled questions, candidates capped at {max_candidates}")
+    needed = {}
+    for name, per_question in orders.items():
+        curve = [statistics.mean(recall_at(per_question[i], relevant, k) for i, relevant in pairs)
+                 for k in range(1, max_candidates + 1)]
+        needed[name] = next((k for k, recall in enumerate(curve, start=1) if recall >= target), None)
+        shown = ", ".join(f"@{k} {curve[k - 1]:.0%}" for k in (1, 3, 5, 10) if k <= len(curve))
+        print(f"{name:<10} recall {shown}   k for {target:.0%}: {needed[name]}")
+
+    if needed["retrieval"] and needed["reranked"]:
+        print(f"\nContext needed shrinks {needed['retrieval']} → {needed['reranked']} chunks "
+              f"({1 - needed['reranked'] / needed['retrieval']:.0%} fewer context tokens)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.RERANK_MODEL)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[settings.RERANK_MAX_CANDIDATES])
+    parser.add_argument("--words", type=int, default=200, help="Words per synthetic chunk")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--eval", help="Labelled JSONL file for the context-shrink report")
+    parser.add_argument("--target", type=float, default=0.9, help="Recall the context must reach")
+    args = parser.parse_args()
+
+    from sentence_transformers import CrossEncoder
+
+    model = CrossEncoder(args.model, max_length=settings.RERANK_MAX_LENGTH, device="cpu")
+    print(f"Model {args.model}, max_length {settings.RERANK_MAX_LENGTH}\n")
+    bench_latency(model, args.candidates, args.words, args.repeat, random.Random(7))
+    if args.eval:
+        bench_shrink(model, args.eval, args.target, max(args.candidates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/check_query_plans.py
+"""
+Query-plan regression check for the access model.
+
+Migrates a scratch PostgreSQL database to head, seeds a realistic dataset
+(same generator as bench_document_listing), runs every repository query
+used by the listing / access / auth paths and EXPLAINs the exact SQL each
+one sent. Fails (exit code 1) if any plan contains a sequential scan on one
+of the large tables, which is how a missing or unusable index shows up.
+
+Usage (from backend/):
+    python -m benchmarks.check_query_plans --database-url postgresql://.../knowserve_plans
+
+Writes are executed inside a transaction that is rolled back.
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import upgrade_database
+from app.models import Document, User
+from app.models.department_documents_access import DepartmentDocumentAccess
+from app.repositories.department_repository import DepartmentRepository
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.user_repository import UserRepository
+from benchmarks.bench_document_listing import seed
+
+# Tables that grow with the organisation; a Seq Scan on them is a regression
+LARGE_TABLES = {"documents", "department_documents_access", "users"}
+
+LISTING_FIELDS = ["id", "title", "source_url", "status"]
+
+
+def build_checks(ctx: dict) -> list:
+    """
+    (name, callable(documents, departments, users), tables allowed to be seq-scanned)
+    for every repository query under test.
+    """
+    dep, doc, after = ctx["department_id"], ctx["doc_id"], ctx["after_id"]
+    return [
+        ("documents.list_page",
+         lambda docs, deps, users: docs.list_page(LISTING_FIELDS, 101, after_id=after)),
+        ("documents.list_page (status filter)",
+         lambda docs, deps, users: docs.list_page(LISTING_FIELDS, 101, after_id=after, status="failed")),
+        ("documents.list_page (allowed_departments)",
+         lambda docs, deps, users: docs.list_page(LISTING_FIELDS, 101, after_id=after,
+                                                  with_allowed_departments=True)),
+        ("documents.list_page_with_access_for_department",
+         lambda docs, deps, users: docs.list_page_with_access_for_department(dep, LISTING_FIELDS, 101,
+                                                                             after_id=after)),
+        ("documents.list_page_owned_by_department",
+         lambda docs, deps, users: docs.list_page_owned_by_department(dep, LISTING_FIELDS, 101)),
+        # Unbounded listing of a few % of all documents: hashing a sequential scan of
+        # `documents` is the cheaper plan there. The paged variant above must use indexes.
+        ("documents.get_documents_with_access_for_department",
+         lambda docs, deps, users: docs.get_documents_with_access_for_department(dep),
+         {"documents"}),
+        ("documents.get_documents_owned_by_department",
+         lambda docs, deps, users: docs.get_documents_owned_by_department(dep)),
+        ("documents.get_allowed_department_names",
+         lambda docs, deps, users: docs.get_allowed_department_names(doc)),
+        ("documents.filter_accessible_ids",
+         lambda docs, deps, users: docs.filter_accessible_ids(dep, list(range(doc, doc + 500)))),
+        ("documents.set_document_access",
+         lambda docs, deps, users: docs.set_document_access(doc, [dep])),
+        ("documents.change_access_bulk",
+         lambda docs, deps, users: docs.change_access_bulk(list(range(doc, doc + 50)), [dep], [dep + 1])),
+        ("users.get_by_email",
+         lambda docs, deps, users: users.get_by_email(ctx["email"])),
+        ("users.get_admin",
+         lambda docs, deps, users: users.get_admin()),
+        ("users.get_manager_for_department",
+         lambda docs, deps, users: users.get_manager_for_department(dep)),
+    ]
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Relation names scanned sequentially anywhere in a JSON plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def explain_check(engine, SessionFactory, name, fn) -> list[str]:
+    """Run one check, EXPLAIN every statement it issued, return the offending tables."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE", "WITH")):
+            captured.append((statement, parameters))
+
+    session = SessionFactory()
+    try:
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            fn(DocumentRepository(session), DepartmentRepository(session), UserRepository(session))
+            session.flush()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        offending = []
+        connection = session.connection()
+        for statement, parameters in captured:
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            offending += [t for t in seq_scans(plan[0]["Plan"]) if t in LARGE_TABLES]
+        return offending
+    finally:
+        session.rollback()
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--departments", type=int, default=100)
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--max-access", type=int, default=10)
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    SessionFactory = sessionmaker(bind=engine)
+
+    with SessionFactory() as session:
+        if session.query(func.count(Document.id)).scalar() == 0:
+            seed(session, args.departments, args.documents, args.max_access)
+
+        max_doc_id = session.query(func.max(Document.id)).scalar()
+        ctx = {
+            "department_id": session.query(func.min(DepartmentDocumentAccess.department_id)).scalar(),
+            "doc_id": max_doc_id // 2,
+            "after_id": max_doc_id // 2,
+            "email": session.query(User.email).order_by(User.id.desc()).limit(1).scalar(),
+        }
+
+    failures = 0
+    for name, fn, *allowed in build_checks(ctx):
+        allowed = allowed[0] if allowed else set()
+        offending = [t for t in explain_check(engine, SessionFactory, name, fn) if t not in allowed]
+        if offending:
+            failures += 1
+            print(f"❌ {name:<52} Seq Scan on {', '.join(sorted(set(offending)))}")
+        else:
+            print(f"✅ {name:<52} index access only")
+
+    engine.dispose()
+    if failures:
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} fell back to sequential scans.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
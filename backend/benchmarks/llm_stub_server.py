@@ -0,0 +1,93 @@
+# benchmarks/llm_stub_server.py
+"""
+Local stand-in for an OpenAI-compatible LLM endpoint, for load testing the
+"http" provider and the LLM scheduler without a real model or quota.
+
+POST /v1/chat/completions (stream=True only) answers with max_tokens words,
+after --first-token-ms and at --tokens-per-second, as Server-Sent Events.
+Like a hosted provider it rate limits: a request over --tpm tokens in the
+last minute (prompt ~4 characters per token + max_tokens), or beyond
+--max-concurrency open streams, gets 429 with a Retry-After header.
+GET /stats returns the counters.
+
+Usage (from backend/):
+    python -m benchmarks.llm_stub_server --port 8100 --tpm 60000 --max-concurrency 8
+    LLM_PROVIDER=http LLM_BASE_URL=http://localhost:8100/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(first_token_ms: float, tokens_per_second: float, tpm: int, max_concurrency: int) -> FastAPI:
+    app = FastAPI(title="LLM stub server")
+    window: deque[tuple[float, int]] = deque()   # (time, tokens) admitted in the last minute
+    stats = {"requests": 0, "rate_limited": 0, "open_streams": 0, "max_open_streams": 0}
+
+    def used_tokens(now: float) -> int:
+        while window and window[0][0] <= now - 60:
+            window.popleft()
+        return sum(tokens for _, tokens in window)
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+        max_tokens = int(body.get("max_tokens", 256))
+        tokens = len(prompt) // 4 + 1 + max_tokens
+
+        now = time.monotonic()
+        stats["requests"] += 1
+        if used_tokens(now) + tokens > tpm or stats["open_streams"] >= max_concurrency:
+            stats["rate_limited"] += 1
+            retry_after = 60 - (now - window[0][0]) if window and used_tokens(now) + tokens > tpm else 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                status_code=429, headers={"Retry-After": f"{max(retry_after, 0.1):.1f}"},
+            )
+        window.append((now, tokens))
+        stats["open_streams"] += 1
+        stats["max_open_streams"] = max(stats["max_open_streams"], stats["open_streams"])
+
+        async def events():
+            try:
+                await asyncio.sleep(first_token_ms / 1000)
+                for i in range(max_tokens):
+                    if i:
+                        await asyncio.sleep(1 / tokens_per_second)
+                    chunk = {"choices": [{"index": 0, "delta": {"content": f" word{i}"}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["open_streams"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "tokens_last_minute": used_tokens(time.monotonic())}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--tpm", type=int, default=60000, help="Tokens per minute before 429")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Open streams before 429")
+    args = parser.parse_args()
+
+    app = create_app(args.first_token_ms, args.tokens_per_second, args.tpm, args.max_concurrency)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
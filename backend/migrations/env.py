@@ -0,0 +1,77 @@
+# migrations/env.py
+import time
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, text
+
+from app.models import Base
+
+config = context.config
+
+# Programmatic runs (app startup) keep the application's logging setup
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Serializes concurrent upgrades (several uvicorn workers starting at once)
+MIGRATION_LOCK_KEY = 7_231_004
+LOCK_POLL_SECONDS = 0.5
+
+
+def get_url() -> str:
+    url = config.get_main_option("sqlalchemy.url")
+    if url:
+        return url
+
+    from app.core.database import DATABASE_URL
+    return DATABASE_URL
+
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of running it (alembic upgrade head --sql)."""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def acquire_migration_lock(engine):
+    """
+    Poll for the advisory lock on a separate autocommit connection. Waiting in
+    pg_advisory_lock() keeps a transaction open, and CREATE INDEX CONCURRENTLY
+    in the lock holder waits for every open transaction: a deadlock.
+    """
+    lock_connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    while not lock_connection.execute(
+        text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+    ).scalar():
+        time.sleep(LOCK_POLL_SECONDS)
+    return lock_connection
+
+
+def run_migrations_online():
+    engine = create_engine(get_url())
+    lock_connection = acquire_migration_lock(engine)
+
+    try:
+        with engine.connect() as connection:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        lock_connection.close()
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,97 @@
+"""Initial schema (tables previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by the old create_all() startup already have this schema:
+    # adopt it as-is so they can move on to the following revisions.
+    if sa.inspect(op.get_bind()).has_table("documents"):
+        return
+
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+    )
+    op.create_index("ix_organizations_id", "organizations", ["id"])
+
+    op.create_table(
+        "departments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id")),
+    )
+    op.create_index("ix_departments_id", "departments", ["id"])
+
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("source_url", sa.String(512), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("status", sa.String(255), nullable=False),
+        sa.Column("owner_department_id", sa.Integer(), sa.ForeignKey("departments.id"), nullable=True),
+    )
+    op.create_index("ix_documents_id", "documents", ["id"])
+
+    op.create_table(
+        "department_documents_access",
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id"), primary_key=True),
+        sa.Column("document_id", sa.Integer(), sa.ForeignKey("documents.id"), primary_key=True),
+    )
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("role", sa.Enum("EMPLOYEE", "MANAGER", "ADMIN", name="userrole"), nullable=False),
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id")),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "chat_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("response", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("semantic_vector", sa.String()),
+        sa.Column("source_doc", sa.String()),
+    )
+    op.create_index("ix_chat_history_id", "chat_history", ["id"])
+
+    op.create_table(
+        "monitor_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("query_id", sa.Integer(), sa.ForeignKey("chat_history.id")),
+        sa.Column("valid", sa.Boolean()),
+        sa.Column("reason", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_monitor_log_id", "monitor_log", ["id"])
+
+
+def downgrade():
+    op.drop_table("monitor_log")
+    op.drop_table("chat_history")
+    op.drop_table("users")
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
+    op.drop_table("department_documents_access")
+    op.drop_table("documents")
+    op.drop_table("departments")
+    op.drop_table("organizations")
@@ -0,0 +1,38 @@
+"""Indexes for the document access model
+
+- documents.owner_department_id           (owned listings)
+- department_documents_access.document_id (per-document access lookups;
+                                           the composite PK leads with department_id)
+- users(role, department_id)              (get_manager_for_department / get_admin)
+
+Built CONCURRENTLY so large tables stay writable during the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_documents_owner_department_id", "documents", ["owner_department_id"]),
+    ("ix_department_documents_access_document_id", "department_documents_access", ["document_id"]),
+    ("ix_users_role_department_id", "users", ["role", "department_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
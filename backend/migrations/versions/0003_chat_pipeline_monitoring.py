@@ -0,0 +1,34 @@
+"""Chat pipeline monitoring
+
+- monitor_log.stage_latencies     per-stage latencies (ms) of the answer
+- chat_history(user_id, id)       recent turns of a user, loaded for every answer
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("monitor_log", sa.Column("stage_latencies", sa.JSON(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chat_history_user_id_id", "chat_history", ["user_id", "id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_chat_history_user_id_id", table_name="chat_history",
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column("monitor_log", "stage_latencies")
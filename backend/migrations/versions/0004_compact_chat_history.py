@@ -0,0 +1,48 @@
+"""Compact chat history storage
+
+- chat_history.semantic_vector     text → bytea (packed float32)
+- chat_history_archive             compressed turns past the retention period
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing ever wrote the text column: no vectors to convert
+    op.alter_column(
+        "chat_history", "semantic_vector",
+        type_=sa.LargeBinary(), existing_type=sa.String(), postgresql_using="NULL::bytea",
+    )
+
+    op.create_table(
+        "chat_history_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("first_id", sa.Integer(), nullable=False),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.Column("first_created_at", sa.DateTime()),
+        sa.Column("last_created_at", sa.DateTime()),
+        sa.Column("turns", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        "ix_chat_history_archive_user_id_last_id", "chat_history_archive", ["user_id", "last_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_chat_history_archive_user_id_last_id", table_name="chat_history_archive")
+    op.drop_table("chat_history_archive")
+    op.alter_column(
+        "chat_history", "semantic_vector",
+        type_=sa.String(), existing_type=sa.LargeBinary(), postgresql_using="NULL::varchar",
+    )